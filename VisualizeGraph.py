@@ -1,20 +1,152 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+# networkx and matplotlib are imported where they are used, so worker processes and headless runs only load what they need
+
+BACKGROUND = "campus_xl.png"
+ROUTE_COLOR = '#02CCFE'
+START_COLOR = '#FA8072'
+
+# Decoded background images of this process, keyed by (file, downsampling factor)
+background_cache = {}
+
+
+def load_background(filename=BACKGROUND, max_width=None):
+    """
+    Decodes a background image once per process and keeps a downsampled (box filtered) copy per output width.
+
+    Args:
+        filename (str): Image file
+        max_width (int): Width in pixels the image is shown at, None for the full resolution
+
+    Returns:
+        tuple: The (downsampled) image as uint8 array and the (width, height) of the full resolution image
+    """
+    full = background_cache.get((filename, 1))
+    if full is None:
+        import matplotlib.image as mpimg
+        full = mpimg.imread(filename)
+        if full.dtype != np.uint8:
+            full = (full * 255).round().astype(np.uint8)
+        background_cache[(filename, 1)] = full
+    height, width = full.shape[:2]
+    factor = 1 if max_width is None else max(1, width // max_width)
+    if (filename, factor) not in background_cache:
+        cropped = full[:height // factor * factor, :width // factor * factor].astype(np.float32)
+        blocks = cropped.reshape(height // factor, factor, width // factor, factor, -1)
+        background_cache[(filename, factor)] = blocks.mean(axis=(1, 3)).round().astype(np.uint8)
+    return background_cache[(filename, factor)], (width, height)
+
+
+class RouteRenderer:
+    def __init__(self, positions, size=(480, 360), dpi=100, background=BACKGROUND, labels=True):
+        '''
+        Headless renderer that draws the background once and only redraws the route overlay for every route.
+        `positions` holds the pixel coordinates of every node on the full resolution background, `size` the output size in pixels
+        '''
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.positions = np.asarray(positions, dtype=float)
+        self.figure = Figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_axes([0, 0, 1, 1])
+        self.axes.set_axis_off()
+        image, (width, height) = load_background(background, size[0])
+        # shown in full resolution pixel coordinates, so the positions do not depend on the output size
+        self.axes.imshow(image, extent=(0, width, height, 0))
+        self.axes.set_xlim(0, width)
+        self.axes.set_ylim(height, 0)
+
+        # the overlay is animated: it is left out of the background and drawn on top of a copy of it for every route
+        self.route, = self.axes.plot([], [], color=ROUTE_COLOR, linewidth=1.5, animated=True)
+        self.start, = self.axes.plot([], [], 'o', color=START_COLOR, markersize=5, animated=True)
+        self.labels = [] if labels else None
+        self.font_size = max(3, size[0] / 160)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+
+    def update(self, path, weights=None):
+        points = self.positions[np.asarray(path)]
+        self.route.set_data(points[:, 0], points[:, 1])
+        self.start.set_data(points[:1, 0], points[:1, 1])
+        overlay = [self.route, self.start]
+        if self.labels is not None and weights is not None:
+            middles = (points[:-1] + points[1:]) / 2
+            while len(self.labels) < len(middles):
+                self.labels.append(self.axes.text(0, 0, '', fontsize=self.font_size, ha='center', va='center', animated=True))
+            for i, middle in enumerate(middles):
+                self.labels[i].set_position(middle)
+                self.labels[i].set_text("[{}] {:g}".format(i + 1, weights[i]))
+            overlay.extend(self.labels[:len(middles)])
+        return overlay
+
+    def render(self, path, weights=None, filename=None):
+        '''
+        Draws a route over the cached background and writes it to `filename` (PNG). Returns the image as (height x width x 4) uint8 array
+        '''
+        self.canvas.restore_region(self.background)
+        for artist in self.update(path, weights):
+            self.axes.draw_artist(artist)
+        image = np.asarray(self.canvas.buffer_rgba())
+        if filename is not None:
+            import matplotlib.image as mpimg
+            mpimg.imsave(filename, image)
+        return image
+
+
+# Renderer of a worker process, prepared once by start_renderer
+renderer = None
+
+
+def start_renderer(positions, size, background, labels):
+    global renderer
+    renderer = RouteRenderer(positions, size, background=background, labels=labels)
+
+
+def render_job(job):
+    filename, path, weights = job
+    renderer.render(path, weights, filename)
+    return filename
+
+
+def render_routes(routes, output_dir, positions, size=(480, 360), background=BACKGROUND, labels=True, max_workers=None):
+    '''
+    Renders many routes to PNG files in parallel worker processes, every worker decodes the background and prepares the figure once.
+    `routes` is a list of (path, weights), weights may be None. Returns the file names, route i is written to route_{i:05d}.png
+    '''
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(os.path.join(output_dir, "route_{:05d}.png".format(i)), list(path), None if weights is None else list(weights))
+            for i, (path, weights) in enumerate(routes)]
+    settings = (positions, size, background, labels)
+    if max_workers == 1 or len(jobs) <= 1:
+        start_renderer(*settings)
+        return [render_job(job) for job in jobs]
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=start_renderer, initargs=settings) as executor:
+        return list(executor.map(render_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
 
 class GraphVisualization:
     def __init__(self):
-        pass
+        self.renderer = None
 
     def create_network(self, path, position, weights):
         '''
         `path`, `position`, and `weights` are of type list
         '''
+        import networkx as nx
 
         n_nodes = len(path)
+        self.path = path
+        self.position = position
+        self.weights = weights
         self.edges = []
         self.labels = {}
         self.color_map = []
-        
+
         self.graph = nx.Graph()
 
         for i in range(n_nodes - 1):
@@ -26,23 +158,39 @@ class GraphVisualization:
 
         self.graph.add_edges_from(self.edges)
 
-    def visualize(self):
-        img = plt.imread("campus_xl.png")
+    def visualize(self, output=None, size=(1200, 900)):
+        '''
+        Shows the network interactively, or renders it headless to the image file `output` (no window, the figure is reused by later calls)
+        '''
+        if output is not None:
+            if self.renderer is None or self.renderer.positions.shape != np.shape(self.position):
+                self.renderer = RouteRenderer(self.position, size)
+            self.renderer.render(self.path, self.weights, output)
+            return
+
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
+        img, _ = load_background()
         plt.imshow(img)
 
         pos = nx.get_node_attributes(self.graph, 'pos')
         nx.draw(self.graph, pos, node_color=self.color_map, with_labels=True, node_size=0, font_size=0)
         nx.draw_networkx_edge_labels(self.graph, pos, edge_labels=self.labels, font_size=6)
-        plt.show() 
+        plt.show()
         plt.figure()
 
 #xd = g.graph[1][2]["weights"]
 
 # nodes =[1,5,4,3,2,1]
-# posisition = [(100,100), (350,400), (200,300), (750,100), (600,150)] 
+# posisition = [(100,100), (350,400), (200,300), (750,100), (600,150)]
 # cost = [10, 8, 11, 3, 25]
 
 
 # g = GraphVisualization()
 # g.create_network(nodes, posisition, cost)
 # g.visualize()
+# g.visualize(output="route.png")  # headless
+
+# Thousands of route thumbnails in parallel (positions as in campusLayout.POSITIONS):
+# render_routes([(path, weights), ...], "thumbnails", POSITIONS, size=(320, 240))
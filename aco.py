@@ -1,96 +1,652 @@
 # Acknowledge to project "Ant Colony Optimization Algorithm using Python": https://github.com/Akavall/AntColonyOptimization
+import json
+import os
+import time
+
 import numpy as np
 from numpy.random import choice as np_choice
+from createGraph import as_campus_graph
+from instrumentation import ColonyInstrumentation
+from localSearch import improve_tour
+from tourCache import TourCostCache
+
+# Bump when the content of a checkpoint changes
+CHECKPOINT_VERSION = 1
+# Bump when the format of a tuning profile (autoTuning.py) changes
+PROFILE_VERSION = 1
+# Colony settings a tuning profile may set
+PROFILE_SETTINGS = ('number_ants', 'best_ants', 'number_iterations', 'decay', 'alpha', 'beta')
+# Nodes whose candidate lists are computed together, bounds the weights copied at a time
+CANDIDATE_BLOCK_SIZE = 256
 
 
 class AntColony(object):
 
-    def __init__(self, distances, campus_graph):
+    def __init__(self, distances, campus_graph, construction='vectorized', seed=None):
         """
         Args:
             distances (2D numpy.array): Square matrix of distances. Distance uses the example provided by Franziska-Sophie
-            campus_graph = provides list of nodes and edges from the list provided by Franziska-Sophie
+            campus_graph = provides list of nodes and edges from the list provided by Franziska-Sophie. Either a CampusGraph or a NetworkX graph (converted to a CampusGraph)
             number_ants (int): Number of ants running per iteration 
             best_ants (int): Number of best ants who deposit pheromone 
             n_iteration (int): Number of iterations
             decay (float): Rate it which pheromone decays. The pheromone value is multiplied by decay, so 0.95 will lead to decay, 0.5 to much faster decay.
             alpha (int or float): exponenet on pheromone, higher alpha gives pheromone more weight. Default=1
             beta (int or float): exponent on distance, higher beta give distance more weight. Default=1
+            construction (str): 'vectorized' advances all ants together one step at a time, 'per_ant' builds each ant's path on its own. Default='vectorized'
+            seed (int): Seed for the random generator used by the vectorized construction. Default=None
+            patience (int): Stop when the best path has not improved for this many iterations. Default=None (off)
+            convergence_branching (float): Stop when the average lambda-branching factor of the pheromone drops to this value (1 means every node has a single dominant edge). Default=None (off)
+            time_budget (float): Stop after this many seconds of wall-clock time. Default=None (off)
+            The stopping criteria can be combined, the first one reached stops the run (number_iterations is always the upper bound)
+            pheromone_reset (float): Share of the pheromone on an edge that is reset when its occupancy changes. Default=0.5
+            warm_iterations (int): Number of iterations of a warm-started run after an occupancy update. Default=100
+            candidate_list_size (int): If set, each step only considers the k unvisited nodes with the smallest edge weight at the step's time slot
+                (falling back to all nodes when none is left), and the visibility is the reciprocal of that weight. Use it for large graphs. Default=None (off)
+            local_search (bool): Improve the tours of the best ants with time-dependent 2-opt / Or-opt moves before they deposit pheromone (vectorized construction). Default=False
+            local_search_passes (int): Maximum number of moves applied to each of those tours per iteration. Default=10
+            instrumentation (ColonyInstrumentation): Per-phase timers and counters, see enable_instrumentation(). Default=None (off, no overhead)
+            tour_cache (TourCostCache): LRU cache of evaluated tour costs with hit/miss statistics (tour_cache.stats()). Default=TourCostCache(4096), None disables it
+            iteration_callback (callable): Called after every iteration as callback(iteration, best_cost, timing) with timing = {'iteration': seconds, 'elapsed': seconds}.
+                Returning True stops the run. Default=None
+            checkpoint_path (str): File the state of a run is written to every checkpoint_interval iterations and when the run stops,
+                resume(checkpoint_path) continues the run exactly where the checkpoint was taken. Default=None (off)
+            checkpoint_interval (int): Iterations between two checkpoints. Default=50
+            load_profile(path) replaces number_ants, best_ants, number_iterations, decay, alpha and beta with the settings a tuning
+                profile (autoTuning.py) found for the graph size closest to this graph
 
-            Parameters only require distances and campus graph
+            Parameters only require distances and campus graph (distances may be None to use the distances of the CampusGraph)
         Example:
             ant_colony = AntColony(distances, campus_graph)          
         """
         # All these values are standard process for ant algorithm
-        self.distances = distances
-        self.campus_graph = campus_graph
-        self.pheromone = np.ones(self.distances.shape) / len(distances)
-        self.all_indexes = range(len(distances))
+        self.campus_graph = as_campus_graph(campus_graph)
+        self.distances = np.asarray(self.campus_graph.distances if distances is None else distances)
+        # (n x n x T) weight tensor, weights[u, v, t] is the weight of edge (u, v) at time slot t
+        self.weights = self.campus_graph.weights
+        self.pheromone = np.ones(self.distances.shape) / len(self.distances)
+        self.all_indexes = range(len(self.distances))
         self.number_ants = 30  # If we want fast converge we can reduce ants
         self.best_ants = 5  # From the 20 paths received just see best 5
         self.number_iterations = 700  # If we want fast converge we can reduce iterations
         self.decay = 0.9  # Higher decay reduces pheromone path - range from [0.5 to 1] for evaporation
         self.alpha = 0.7  # Higher alpha for more relevance to pheromones received
         self.beta = 0.7  # Higher beta for more relevance to weight received
+        self.construction = construction
+        self.rng = np.random.default_rng(seed)
+        self.edge_deposits = None  # Pheromone an ant deposits on each edge, 1 / sum of the edge's weights, computed once per graph
+        self.first_visibility = None
+        self.step_visibility = None
+        self.patience = None  # Stop early if the best path does not improve for this many iterations
+        self.convergence_branching = None  # Stop early once the pheromone has converged to this branching factor
+        self.branching_lambda = 0.05  # Share of the pheromone range an edge needs to count as a branch
+        self.time_budget = None  # Hard wall-clock limit of a run in seconds
+        self.iterations_run = 0
+        self.stop_reason = None
+        self.pheromone_reset = 0.5  # Share of pheromone reset on edges whose occupancy changed
+        self.warm_iterations = 100  # Iterations of a warm-started run after an occupancy update
+        self.best_path = None  # Best path (list of nodes) of the last run
+        self.incumbent = None  # (path, cost) a run starts from instead of the placeholder
+        self.candidate_list_size = None  # Number of nearest nodes an ant considers per step, None for all nodes
+        self.candidate_lists = None
+        self.local_search = False  # Improve the best ants' tours with 2-opt / Or-opt before depositing
+        self.local_search_passes = 10
+        self.instrumentation = None  # ColonyInstrumentation, None keeps the hot loop free of any bookkeeping
+        self.iteration_callback = None  # callback(iteration, best_cost, timing), returning True stops the run
+        self.tour_cache = TourCostCache(4096)  # Costs of already evaluated tours (LRU), None to disable
+        self.graph_version = self.campus_graph.version
+        self.checkpoint_path = None  # File the run state is written to, None for no checkpoints
+        self.checkpoint_interval = 50  # Iterations between two checkpoints
+        self.resume_state = None  # Run state loaded by load_checkpoint, picked up by the next run
+        self.engine = 'ant_system'  # Pheromone update rule, acoVariants.py has the MAX-MIN and Ant Colony System engines
 
     def run(self):
+        result = None
+        for result in self.solutions():
+            pass
+        return result
+
+    # Continues the run saved in a checkpoint. With the same graph and settings the result is identical to a run that was never interrupted
+    def resume(self, path):
+        self.load_checkpoint(path)
+        return self.run()
+
+    # Anytime version of run: yields (cost, path, weights) every time the best path improves, until a stopping criterion is reached
+    def solutions(self):
         shortest_path = None
         # To indicate that no value has been calculated yet
         # Any calculated path would be less than the placeholder value.
         # Only positive infinite values
         all_time_shortest_path = ("placeholder", np.inf)
-        for _ in range(self.number_iterations):
-            all_paths = self.generate_all_paths()
-            self.spread_pheromone(all_paths, self.best_ants)
-            shortest_path = min(all_paths, key=lambda x: x[1])
-            
+        without_improvement = 0
+        first_iteration = 0
+        elapsed = 0.0
+        self.iterations_run = 0
+        self.stop_reason = 'iterations'
+        if self.resume_state is not None:
+            state = self.resume_state
+            self.resume_state = None
+            all_time_shortest_path = state['best']
+            without_improvement = state['without_improvement']
+            first_iteration = self.iterations_run = state['iteration']
+            elapsed = state['elapsed']
+            if state['stop_reason']:
+                self.stop_reason = state['stop_reason']
+                first_iteration = self.number_iterations
+            if np.isfinite(all_time_shortest_path[1]):
+                path, cost = all_time_shortest_path
+                self.best_path = path
+                yield cost, path, self.prepare_weights(path)
+        elif self.incumbent is not None:
+            all_time_shortest_path = self.incumbent
+            self.incumbent = None
+            path, cost = all_time_shortest_path
+            yield cost, path, self.prepare_weights(path)
+        # the time budget also counts the time spent before the checkpoint
+        start_time = time.perf_counter() - elapsed
+        iteration_start = time.perf_counter()
+        for iteration in range(first_iteration, self.number_iterations):
+            shortest_path = self.iterate()
+            self.iterations_run = iteration + 1
+
             if shortest_path[1] < all_time_shortest_path[1]:
                 # print("New path:{}".format(shortest_path))
                 # print("This is new shortest:{}".format(shortest_path[1]))
                 all_time_shortest_path = shortest_path
-            
-            self.pheromone = self.pheromone * self.decay
+                without_improvement = 0
+                path, cost = all_time_shortest_path
+                self.best_path = path
+                yield cost, path, self.prepare_weights(path)
+            else:
+                without_improvement += 1
+
+            stop_reason = self.check_stopping(without_improvement, start_time)
+            if self.iteration_callback is not None:
+                now = time.perf_counter()
+                timing = {'iteration': now - iteration_start, 'elapsed': now - start_time}
+                iteration_start = now
+                if self.iteration_callback(iteration, all_time_shortest_path[1], timing) and stop_reason is None:
+                    stop_reason = 'callback'
+            if stop_reason is not None:
+                self.stop_reason = stop_reason
+            if self.checkpoint_path is not None and (stop_reason is not None or self.iterations_run % self.checkpoint_interval == 0
+                                                     or self.iterations_run == self.number_iterations):
+                self.save_checkpoint(self.checkpoint_path, all_time_shortest_path, without_improvement,
+                                     time.perf_counter() - start_time, stop_reason)
+            if stop_reason is not None:
+                break
+
+    # Writes everything a run needs to continue to path: pheromone, best path, counters and the state of both random generators
+    # (the vectorized construction draws from self.rng, the per-ant construction from numpy's global generator).
+    # The file is written next to path first and then renamed, so a run killed while writing keeps the previous checkpoint
+    def save_checkpoint(self, path, best, without_improvement, elapsed, stop_reason=None):
+        best_path, best_cost = best
+        has_path = np.isfinite(best_cost) and best_path is not None
+        legacy = np.random.get_state()
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'pheromone': self.pheromone,
+            'best_path': np.asarray(best_path if has_path else [], dtype=np.intp),
+            'best_cost': best_cost if has_path else np.inf,
+            'iteration': self.iterations_run,
+            'without_improvement': without_improvement,
+            'elapsed': elapsed,
+            'stop_reason': stop_reason or '',
+            'rng_state': json.dumps(self.rng.bit_generator.state),
+            'legacy_keys': legacy[1],
+            'legacy_position': np.array(legacy[2:4]),
+            'legacy_gaussian': legacy[4],
+            'graph_shape': np.array(self.weights.shape),
+            'graph_checksum': float(np.sum(self.weights)),
+            'engine': self.engine,
+        }
+        state.update(self.engine_state())
+        with open(path + '.tmp', 'wb') as file:
+            np.savez(file, **state)
+        os.replace(path + '.tmp', path)
+
+    # Restores a checkpoint written by save_checkpoint, the next run() continues from it
+    def load_checkpoint(self, path):
+        with np.load(path) as checkpoint:
+            if int(checkpoint['version']) != CHECKPOINT_VERSION:
+                raise ValueError("Unsupported checkpoint version {} in {}".format(int(checkpoint['version']), path))
+            if tuple(checkpoint['graph_shape']) != self.weights.shape or not np.isclose(float(checkpoint['graph_checksum']), np.sum(self.weights)):
+                raise ValueError("Checkpoint {} was taken on a different graph".format(path))
+            engine = str(checkpoint['engine']) if 'engine' in checkpoint.files else 'ant_system'
+            if engine != self.engine:
+                raise ValueError("Checkpoint {} was taken by the {} engine, not {}".format(path, engine, self.engine))
+            self.check_graph_version()
+            self.pheromone = checkpoint['pheromone'].copy()
+            self.rng.bit_generator.state = json.loads(str(checkpoint['rng_state']))
+            position, has_gaussian = checkpoint['legacy_position']
+            np.random.set_state(('MT19937', checkpoint['legacy_keys'], int(position), int(has_gaussian), float(checkpoint['legacy_gaussian'])))
+            best_cost = float(checkpoint['best_cost'])
+            best_path = checkpoint['best_path'].tolist() if np.isfinite(best_cost) else None
+            self.resume_state = {'best': (best_path, best_cost), 'iteration': int(checkpoint['iteration']),
+                                 'without_improvement': int(checkpoint['without_improvement']),
+                                 'elapsed': float(checkpoint['elapsed']), 'stop_reason': str(checkpoint['stop_reason'])}
+            self.restore_engine_state(checkpoint)
+
+    # Arrays an engine keeps between iterations besides the pheromone, saved in checkpoints (names start with 'engine_')
+    def engine_state(self):
+        return {}
+
+    # Restores the arrays of engine_state from a loaded checkpoint
+    def restore_engine_state(self, checkpoint):
+        pass
+
+    # Applies the settings of a tuning profile written by autoTuning.py, taken from the tuned graph size closest to this graph
+    # (the larger one on a tie). Returns the number of nodes of the size that was used
+    def load_profile(self, path):
+        with open(path) as file:
+            profile = json.load(file)
+        if profile.get('version') != PROFILE_VERSION:
+            raise ValueError("Unsupported tuning profile version {} in {}".format(profile.get('version'), path))
+        if profile.get('engine', 'ant_system') != self.engine:
+            raise ValueError("Tuning profile {} was tuned for the {} engine, not {}".format(path, profile.get('engine', 'ant_system'), self.engine))
+        if not profile.get('sizes'):
+            raise ValueError("Tuning profile {} has no tuned graph sizes".format(path))
+        n = self.campus_graph.nr_of_nodes
+        size = min(profile['sizes'], key=lambda nodes: (abs(int(nodes) - n), -int(nodes)))
+        settings = profile['sizes'][size]['settings']
+        for name in PROFILE_SETTINGS:
+            if name in settings:
+                setattr(self, name, settings[name])
+        # the visibility depends on beta
+        self.first_visibility = None
+        self.step_visibility = None
+        return int(size)
 
-        shortest_path, cost = all_time_shortest_path
-        path = self.edges_to_nodes_ordered(shortest_path)
-        weights = self.prepare_weights(path)
-        
-        return cost, path, weights
+    # Updates the occupancies of some edges in place, refreshes only the affected precomputed values and partially resets their pheromone
+    def update_occupancies(self, edges, occupancies):
+        self.check_graph_version()
+        rows, cols = self.campus_graph.update_occupancies(edges, occupancies)
+        self.graph_version = self.campus_graph.version
+        if self.tour_cache is not None:
+            self.tour_cache.clear()
+        if self.edge_deposits is not None:
+            self.edge_deposits[rows, cols] = 1.0 / self.weights[rows, cols].sum(axis=1)
+        if self.candidate_lists is not None:
+            self.prepare_candidate_lists(np.unique(rows))
+        mean_pheromone = self.pheromone.mean()
+        self.pheromone[rows, cols] = (1 - self.pheromone_reset) * self.pheromone[rows, cols] + self.pheromone_reset * mean_pheromone
+
+    # Warm start: updates the occupancies, keeps the learned pheromone and runs a short run starting from the previous best path
+    def reoptimize(self, edges, occupancies, number_iterations=None):
+        self.update_occupancies(edges, occupancies)
+        if self.best_path is not None:
+            self.incumbent = (self.best_path, self.campus_graph.tour_weights(self.best_path).sum())
+        full_iterations = self.number_iterations
+        self.number_iterations = self.warm_iterations if number_iterations is None else number_iterations
+        try:
+            return self.run()
+        finally:
+            self.number_iterations = full_iterations
+
+    # Drops every value derived from the weights if the graph was changed behind the colony's back
+    def check_graph_version(self):
+        if self.campus_graph.version != self.graph_version:
+            self.graph_version = self.campus_graph.version
+            self.edge_deposits = None
+            self.first_visibility = None
+            self.step_visibility = None
+            self.candidate_lists = None
+            if self.tour_cache is not None:
+                self.tour_cache.clear()
+
+    def prepare_edge_deposits(self):
+        self.edge_deposits = self.generate_reciprocal_matrix(self.weights.sum(axis=2))
+
+    # Turns on the per-phase timers and counters and returns them
+    def enable_instrumentation(self):
+        self.instrumentation = ColonyInstrumentation()
+        return self.instrumentation
+
+    # Returns the name of the first stopping criterion that is reached, None to continue
+    def check_stopping(self, without_improvement, start_time):
+        if self.patience is not None and without_improvement >= self.patience:
+            return 'patience'
+        if self.time_budget is not None and time.perf_counter() - start_time >= self.time_budget:
+            return 'time_budget'
+        if self.convergence_branching is not None and self.branching_factor() <= self.convergence_branching:
+            return 'convergence'
+        return None
+
+    # Average lambda-branching factor: number of edges per node whose pheromone is above min + lambda * (max - min) of that node
+    def branching_factor(self):
+        n = len(self.pheromone)
+        off_diagonal = ~np.eye(n, dtype=bool)
+        pheromone = self.pheromone[off_diagonal].reshape(n, n - 1)
+        low = pheromone.min(axis=1, keepdims=True)
+        high = pheromone.max(axis=1, keepdims=True)
+        threshold = low + self.branching_lambda * (high - low)
+        return np.mean((pheromone >= threshold).sum(axis=1))
+
+    # One iteration: construct all paths, spread pheromone, evaporate. Returns the shortest path of the iteration as (nodes, cost)
+    # With instrumentation on, every phase is timed with one lap
+    def iterate(self):
+        self.check_graph_version()
+        stats = self.instrumentation
+        if stats is not None:
+            stats.start()
+        if self.construction == 'vectorized':
+            tours = self.construct_tours()
+            if stats is not None:
+                stats.lap('construction')
+            costs = self.evaluate_tours(tours)
+            if stats is not None:
+                stats.lap('evaluation')
+            if self.local_search:
+                self.improve_best_tours(tours, costs)
+                if stats is not None:
+                    stats.lap('local_search')
+            self.deposit_pheromone(tours, costs)
+            best = np.argmin(costs)
+            shortest_path = (tours[best].tolist(), costs[best])
+        elif self.construction == 'per_ant':
+            paths = self.construct_paths()
+            if stats is not None:
+                stats.lap('construction')
+            all_paths = [(path, self.generate_path_distance(path)) for path in paths]
+            if stats is not None:
+                stats.lap('evaluation')
+            self.spread_pheromone(all_paths, self.best_ants)
+            path, cost = min(all_paths, key=lambda x: x[1])
+            shortest_path = (self.edges_to_nodes_ordered(path), cost)
+        else:
+            raise ValueError("Unknown construction mode: {}".format(self.construction))
+        if stats is not None:
+            stats.lap('pheromone')
+
+        self.pheromone = self.pheromone * self.decay
+        if stats is not None:
+            stats.lap('evaporation')
+            stats.count('iterations', 1)
+        return shortest_path
+
+    # Adds amount to a work counter of the instrumentation, called where the work is done (nothing if the instrumentation is off)
+    def count(self, counter, amount):
+        if self.instrumentation is not None:
+            self.instrumentation.count(counter, amount)
+
+    # Costs of a (ants x n+1) matrix of tours, every tour looks up the weights of its n edges
+    def evaluate_tours(self, tours, start_slots=0):
+        self.count('tours_evaluated', len(tours))
+        self.count('edge_weight_lookups', tours.shape[0] * (tours.shape[1] - 1))
+        return self.campus_graph.tour_costs(tours, start_slots)
     # Spread pheromones from ants
 
     def spread_pheromone(self, all_paths, best_ants):
+        if self.edge_deposits is None:
+            self.prepare_edge_deposits()
         sorted_paths = sorted(all_paths, key=lambda x: x[1])
         for path, path_distance in sorted_paths[:best_ants]:
+            self.count('edge_weight_lookups', len(path))
             for move in path:
                 if path_distance != 0:
-                    # Move path to the weights
-                    weights = self.campus_graph.edges[move]['weights']
-                    distance = sum(weights)
-                    self.pheromone[move] += 1.0 / distance
+                    # Precomputed 1 / sum of the edge's weights
+                    self.pheromone[move] += self.edge_deposits[move]
                 else:
                     self.pheromone[move] += 0
+
+    # Applies local search to the tours of the best ants in place
+    def improve_best_tours(self, tours, costs):
+        for ant in np.argsort(costs, kind='stable')[:self.best_ants]:
+            tours[ant], costs[ant] = improve_tour(self.campus_graph, tours[ant], self.local_search_passes)
+
+    # Vectorized version of spread_pheromone for tours stored as a (number_ants x n+1) matrix of nodes
+    def deposit_pheromone(self, tours, costs):
+        if self.edge_deposits is None:
+            self.prepare_edge_deposits()
+        best = np.argsort(costs, kind='stable')[:self.best_ants]
+        best = best[costs[best] != 0]
+        rows = tours[best, :-1].ravel()
+        cols = tours[best, 1:].ravel()
+        self.count('edge_weight_lookups', len(rows))
+        np.add.at(self.pheromone, (rows, cols), self.edge_deposits[rows, cols])
+
     # Generates the path distance available. Checks distances
 
     def generate_path_distance(self, path):
         # Format paths
         formatted_path = self.edges_to_nodes_ordered(path)
-        weights = self.prepare_weights(formatted_path)
-        # Calculate the shortest distances
-        distance = sum(weights)
+        self.count('tours_evaluated', 1)
+        if self.tour_cache is None:
+            self.count('edge_weight_lookups', len(path))
+            return sum(self.prepare_weights(formatted_path))
+        key = self.tour_cache.encode(formatted_path)
+        distance = self.tour_cache.get(key)
+        if distance is None:
+            self.count('edge_weight_lookups', len(path))
+            weights = self.prepare_weights(formatted_path)
+            # Calculate the shortest distances
+            distance = sum(weights)
+            self.tour_cache.put(key, distance)
         return distance
 
     def generate_all_paths(self):
-        all_paths = []
+        # This will send the entire path and the shortest distance from that path
+        return [(path, self.generate_path_distance(path)) for path in self.construct_paths()]
+
+    # Builds the path (list of edges) of every ant, one ant at a time
+    def construct_paths(self):
+        paths = []
         # example_node = [0,1,2,3,4]
         all_nodes = list(self.campus_graph.nodes)
         for _ in range(self.number_ants):
             # randomly select a starting node
             node_choice = np_choice(all_nodes)
-            path = self.generate_path(node_choice)
-            # This will send the entire path and the shortest distance from that path
-            all_paths.append((path, self.generate_path_distance(path)))
-        return all_paths
+            paths.append(self.generate_path(node_choice))
+            # one pick_move draw per step, the last step returns to the start
+            self.count('ant_steps', len(paths[-1]))
+            self.count('roulette_draws', len(paths[-1]) - 1)
+        return paths
     
+    # Precomputes visibility ** beta of the first step exactly as generate_path / pick_move see it: the reciprocal of the distances.
+    # The following steps pass 1 / weights of edge (previous, start) through generate_reciprocal again, so their visibility is the
+    # weight vector itself; walk_tours gathers it per step for the ants' (previous, start) edges instead of keeping an (n x n x n) copy
+    def prepare_visibility(self):
+        self.first_visibility = self.generate_reciprocal_matrix(self.distances) ** self.beta
+
+    # Advances all ants together one step at a time, using a visited mask and one batched roulette wheel draw per step.
+    # Samples from the same distribution as generate_path / pick_move. Returns tours (number_ants x n+1) and their costs
+    def generate_all_tours(self):
+        tours = self.construct_tours()
+        return tours, self.evaluate_tours(tours)
+
+    # Builds the tours (number_ants x n+1 matrix of nodes) of all ants
+    def construct_tours(self):
+        if self.candidate_list_size is not None:
+            return self.construct_tours_candidates()
+        if self.first_visibility is None:
+            self.prepare_visibility()
+        n = len(self.distances)
+        starts = self.rng.integers(n, size=self.number_ants)
+        # tau ** alpha is refreshed once per iteration
+        return self.walk_tours(starts, self.pheromone ** self.alpha)
+
+    # Advances one ant per start node together one step at a time. attractiveness is tau ** alpha, either one (n x n) matrix
+    # shared by all ants or a (Q x n x n) stack of them, in which case colonies gives the matrix each ant follows.
+    # start_slots (departure slot of every ant) is not used by this visibility, the engines of acoVariants.py use it
+    def walk_tours(self, starts, attractiveness, colonies=None, start_slots=None):
+        n = len(self.distances)
+        slots = self.campus_graph.time_slots(n)
+        ants = np.arange(len(starts))
+        tours = np.empty((len(starts), n + 1), dtype=np.intp)
+        tours[:, 0] = starts
+        tours[:, -1] = starts
+        unvisited = np.ones((len(starts), n), dtype=bool)
+        unvisited[ants, starts] = False
+
+        previous = starts
+        for step in range(n - 1):
+            if step == 0:
+                visibility = self.first_visibility[previous]
+            else:
+                visibility = self.weights[previous, starts][:, slots] ** self.beta
+            if colonies is None:
+                rows = attractiveness[previous] * visibility * unvisited
+            else:
+                rows = attractiveness[colonies, previous] * visibility * unvisited
+            move = self.roulette_wheel(rows, unvisited)
+            tours[:, step + 1] = move
+            unvisited[ants, move] = False
+            previous = move
+
+        self.count('ant_steps', len(starts) * n)
+        return tours
+
+    # Batched solve of many (start node, departure time slot) queries on the same graph. Every distinct query gets its own
+    # pheromone matrix (seeded from the colony's) and number_ants ants, and all ants of all queries are walked together by
+    # walk_tours, so the visibility and weight tensors are prepared once and the per-step overhead is shared by the batch.
+    # Stops after number_iterations, when no query improved for patience iterations or when the time budget is spent.
+    # Query ants are not restricted to candidate lists and their tours are not improved by local search, so colonies with
+    # either are rejected rather than silently answered without them.
+    # Returns one (cost, path, weights) per query, in the order of the queries
+    def solve_queries(self, queries, number_iterations=None):
+        if self.local_search or self.candidate_list_size is not None:
+            raise ValueError("Local search and candidate lists are not supported by batched queries")
+        self.check_graph_version()
+        if self.first_visibility is None:
+            self.prepare_visibility()
+        if self.edge_deposits is None:
+            self.prepare_edge_deposits()
+        queries = np.asarray(queries, dtype=np.intp).reshape(-1, 2)
+        n = len(self.distances)
+        if len(queries) == 0:
+            return []
+        if (queries[:, 0] < 0).any() or (queries[:, 0] >= n).any():
+            raise ValueError("Start nodes must be between 0 and {}".format(n - 1))
+        # identical queries are solved once
+        unique_queries, query_index = np.unique(queries, axis=0, return_inverse=True)
+        query_index = query_index.ravel()
+        nr_of_queries = len(unique_queries)
+
+        colonies = np.repeat(np.arange(nr_of_queries), self.number_ants)
+        starts = unique_queries[colonies, 0]
+        start_slots = unique_queries[colonies, 1]
+        pheromone = np.repeat(self.pheromone[None], nr_of_queries, axis=0)
+        best_costs = np.full(nr_of_queries, np.inf)
+        best_tours = np.zeros((nr_of_queries, n + 1), dtype=np.intp)
+        first_ants = np.arange(nr_of_queries)[:, None] * self.number_ants
+        depositing = min(self.best_ants, self.number_ants)
+
+        start_time = time.perf_counter()
+        without_improvement = 0
+        self.iterations_run = 0
+        self.stop_reason = 'iterations'
+        for iteration in range(self.number_iterations if number_iterations is None else number_iterations):
+            tours = self.walk_tours(starts, pheromone ** self.alpha, colonies, start_slots)
+            costs = self.evaluate_tours(tours, start_slots)
+
+            # the best ants of every query deposit on that query's pheromone
+            order = np.argsort(costs.reshape(nr_of_queries, self.number_ants), axis=1, kind='stable')[:, :depositing]
+            best = (order + first_ants).ravel()
+            best = best[costs[best] != 0]
+            rows = tours[best, :-1].ravel()
+            cols = tours[best, 1:].ravel()
+            np.add.at(pheromone, (np.repeat(colonies[best], n), rows, cols), self.edge_deposits[rows, cols])
+            pheromone *= self.decay
+
+            iteration_best = order[:, 0] + first_ants[:, 0]
+            improved = costs[iteration_best] < best_costs
+            best_costs[improved] = costs[iteration_best[improved]]
+            best_tours[improved] = tours[iteration_best[improved]]
+            self.iterations_run = iteration + 1
+            without_improvement = 0 if improved.any() else without_improvement + 1
+            if self.patience is not None and without_improvement >= self.patience:
+                self.stop_reason = 'patience'
+                break
+            if self.time_budget is not None and time.perf_counter() - start_time >= self.time_budget:
+                self.stop_reason = 'time_budget'
+                break
+
+        results = []
+        for query, index in zip(queries, query_index):
+            path = best_tours[index].tolist()
+            results.append((best_costs[index], path, list(self.campus_graph.tour_weights(path, query[1]))))
+        return results
+
+    # candidate_lists[t, u] are the k nodes with the smallest weight of their edge from u at time slot t, ordered by that weight.
+    # Computed per slot for blocks of CANDIDATE_BLOCK_SIZE nodes, so only (block x n) weights are copied at a time.
+    # nodes limits the update to the lists of these nodes (after an occupancy update)
+    def prepare_candidate_lists(self, nodes=None):
+        n = len(self.distances)
+        k = min(self.candidate_list_size, n - 1)
+        if nodes is None:
+            nodes = np.arange(n)
+            self.candidate_lists = np.empty((self.campus_graph.nr_of_slots, n, k), dtype=np.intp)
+        for first in range(0, len(nodes), CANDIDATE_BLOCK_SIZE):
+            block = nodes[first:first + CANDIDATE_BLOCK_SIZE]
+            for slot in range(self.campus_graph.nr_of_slots):
+                weights = self.weights[block, :, slot].astype(float)
+                weights[np.arange(len(block)), block] = np.inf
+                nearest = np.argpartition(weights, k - 1, axis=1)[:, :k] if k < n - 1 else np.argsort(weights, axis=1)[:, :k]
+                order = np.argsort(np.take_along_axis(weights, nearest, axis=1), axis=1, kind='stable')
+                self.candidate_lists[slot, block] = np.take_along_axis(nearest, order, axis=1)
+
+    # Candidate list version of construct_tours: every step costs O(k) per ant instead of O(n),
+    # only ants whose candidates are all visited look at the full set of nodes
+    def construct_tours_candidates(self):
+        if self.candidate_lists is None or self.candidate_lists.shape[2] != min(self.candidate_list_size, len(self.distances) - 1):
+            self.prepare_candidate_lists()
+        n = len(self.distances)
+        ants = np.arange(self.number_ants)
+        starts = self.rng.integers(n, size=self.number_ants)
+        slots = self.campus_graph.time_slots(n)
+
+        tours = np.empty((self.number_ants, n + 1), dtype=np.intp)
+        tours[:, 0] = starts
+        tours[:, -1] = starts
+        unvisited = np.ones((self.number_ants, n), dtype=bool)
+        unvisited[ants, starts] = False
+
+        previous = starts
+        for step in range(n - 1):
+            candidates = self.candidate_lists[slots[step], previous]
+            allowed = unvisited[ants[:, None], candidates]
+            move = np.empty(self.number_ants, dtype=np.intp)
+
+            stuck = ~allowed.any(axis=1)
+            free = ~stuck
+            if free.any():
+                prev = previous[free, None]
+                cand = candidates[free]
+                rows = self.pheromone[prev, cand] ** self.alpha
+                rows *= self.generate_reciprocal_matrix(self.weights[prev, cand, slots[step]]) ** self.beta
+                rows *= allowed[free]
+                move[free] = cand[np.arange(len(cand)), self.roulette_wheel(rows, allowed[free])]
+            if stuck.any():
+                prev = previous[stuck]
+                rows = self.pheromone[prev] ** self.alpha
+                rows *= self.generate_reciprocal_matrix(self.weights[prev, :, slots[step]]) ** self.beta
+                rows *= unvisited[stuck]
+                move[stuck] = self.roulette_wheel(rows, unvisited[stuck])
+
+            tours[:, step + 1] = move
+            unvisited[ants, move] = False
+            previous = move
+
+        self.count('ant_steps', self.number_ants * n)
+        return tours
+
+    # Draws one column per row with probability proportional to the row. Rows without any weight fall back to a uniform draw over the allowed nodes.
+    # Only columns with a positive weight (so never a visited node) are drawn
+    def roulette_wheel(self, rows, allowed):
+        self.count('roulette_draws', len(rows))
+        empty = ~(rows > 0).any(axis=1)
+        if empty.any():
+            rows[empty] = allowed[empty]
+        cumulative = np.cumsum(rows, axis=1)
+        # scaled by the last cumulative value and not by rows.sum(), whose rounding differs, so a draw does not run past the end
+        draws = self.rng.random(len(rows)) * cumulative[:, -1]
+        moves = (cumulative <= draws[:, None]).sum(axis=1)
+        # a draw rounded up to the total takes the last column with a positive weight
+        overflow = moves == rows.shape[1]
+        if overflow.any():
+            moves[overflow] = rows.shape[1] - 1 - np.argmax(rows[overflow, ::-1] > 0, axis=1)
+        return moves
+
     def generate_path(self, start):
         path = []
         visited = set()
@@ -102,7 +658,7 @@ class AntColony(object):
                 distances = self.distances[previous]
             else:
                 # This is formatted as [1,2,3,4,5,...]
-                weights = self.campus_graph.edges[previous, start]["weights"]
+                weights = self.weights[previous, start]
                 distances = 1 / weights
                 # update local with occupancy information to check availability of ants
                 # remove occupancy if not required. 
@@ -127,6 +683,13 @@ class AntColony(object):
                 reciprocal_array[i] = 0
         return reciprocal_array
 
+    # Element-wise reciprocal of an array of any shape, zero entries stay zero
+    def generate_reciprocal_matrix(self, path_distance):
+        path_distance = np.asarray(path_distance, dtype=float)
+        reciprocal_array = np.zeros_like(path_distance)
+        np.divide(1.0, path_distance, out=reciprocal_array, where=path_distance != 0)
+        return reciprocal_array
+
     def pick_move(self, pheromone, path_distance, visited):
         pheromone = np.copy(pheromone)
 
@@ -155,23 +718,9 @@ class AntColony(object):
         return array
 
     # From random path nodes - Updated to current code
+    # The i-th edge of the path is taken at time slot i, gathered from the weight tensor in one go
     def prepare_weights(self, best_path):
-        weights = []
-        previous_node = best_path[0]
-        current_node = 0
-        step = 0
-
-        for i in range(1, len(best_path)):
-            current_node = best_path[i]
-
-            new_weight = self.campus_graph.edges[previous_node,
-                                                 current_node]['weights'][step]
-            weights.append(new_weight)
-
-            previous_node = current_node
-            step += 1
-
-        return weights
+        return list(self.campus_graph.tour_weights(best_path))
 
     # Example usage: Create a file example.py and copy the following code, you will be able to test the code
     # -- code --
@@ -181,7 +730,7 @@ class AntColony(object):
 
     campus_graph = create_campus_graph()
     # Sending format into array
-    distances = np.array(dist_map)
+    distances = campus_graph.distances
     # It selects random nodes as any start, then it follows the shortest path and returns best result
     ant_colony = AntColony(distances, campus_graph)
     cost, path, weight = ant_colony.run()
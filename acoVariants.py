@@ -0,0 +1,343 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Faster converging engines for the ant colony: MAX-MIN Ant System and Ant Colony System.
+#
+# Summary:
+# Both engines are AntColony subclasses, so run(), solutions(), the stopping criteria, callbacks, instrumentation, local search and
+# checkpoints work unchanged; only the construction and the pheromone update differ. Unlike the Ant System of AntColony, whose
+# visibility keeps the quirks of the original sampler, both engines see the reciprocal of the edge weight at the time slot of each step.
+# Trails start from the cost of a time-dependent nearest neighbour tour.
+#
+# MaxMinAntColony (Stuetzle & Hoos): only one ant deposits per iteration (the iteration best, every global_best_interval iterations the
+# best so far), the pheromone is kept between tau_min and tau_max (derived from the best cost so far), and all trails are reset to
+# tau_max when the colony stagnates (converged branching factor, or no improvement for restart_patience iterations).
+#
+# AntColonySystem (Dorigo & Gambardella): an ant takes the best edge with probability exploitation and samples as usual otherwise
+# (pseudo-random proportional rule). Every step pulls the pheromone of the edges just taken back towards tau_0 (local update, so the
+# following ants explore other edges), and after every iteration only the edges of the best tour so far evaporate and are reinforced.
+# All ants take a step together, so the local update of a step is seen by the ants from their next step on.
+#
+# The visibility of a step is computed from the weights of the step's time slot for the rows of the ants' current nodes only, so no
+# (n x n x n) visibility tensor is kept. Batched queries (solve_queries) use the Ant System update of AntColony with one pheromone
+# matrix per query; the ants walk with the engine's visibility from the departure slot of their query, without the engine's update.
+#
+# ENGINES maps the engine names to the classes: AntColony (ant_system), MaxMinAntColony (max_min) and AntColonySystem (colony_system).
+# Example:
+# colony = ENGINES['max_min'](None, campus_graph, seed=0)
+# cost, path, weights = colony.run()
+
+import numpy as np
+
+from aco import AntColony
+
+
+class TimeSlotColony(AntColony):
+    """
+    Ant colony whose visibility is the reciprocal of the edge weight at the time slot of each step, the common part of the engines.
+    Subclasses implement initial_trail, deposit_pheromone (which is passed the tours of an iteration and their costs), evaporate
+    and refresh_trails (the weights changed after the trails were initialized).
+    """
+
+    def __init__(self, distances, campus_graph, construction='vectorized', seed=None):
+        super().__init__(distances, campus_graph, construction, seed)
+        self.alpha = 1.0
+        self.beta = 2.0
+        self.tour_cache = None
+        self.trail_start = None  # Pheromone the trails start from, set by the first iteration
+        self.best_tour = None  # Best tour so far (nodes) and its cost, the pheromone update follows it
+        self.best_cost = np.inf
+        self.improved = False  # Whether the last iteration found a new best tour
+
+    def update_occupancies(self, edges, occupancies):
+        super().update_occupancies(edges, occupancies)
+        self.graph_changed()
+
+    # A graph changed behind the colony's back also invalidates the best tour's cost
+    def check_graph_version(self):
+        if self.campus_graph.version != self.graph_version:
+            super().check_graph_version()
+            self.graph_changed()
+
+    # The best tour keeps its nodes but is re-costed with the new weights, and the trail values derived from costs follow it
+    def graph_changed(self):
+        if self.best_tour is not None:
+            self.best_cost = float(self.campus_graph.tour_weights(self.best_tour).sum())
+        if self.trail_start is not None:
+            self.refresh_trails()
+
+    # The visibility is computed per step by visibility(), nothing is precomputed
+    def prepare_visibility(self):
+        pass
+
+    # visibility ** beta of the edges leaving the nodes previous (one per ant) at time slot slots (shared or one per ant), (ants x n)
+    def visibility(self, previous, slots):
+        return self.generate_reciprocal_matrix(self.weights[previous, :, slots]) ** self.beta
+
+    # Cost of the time-dependent nearest neighbour tour from node 0, the usual estimate the initial trails are derived from
+    def nearest_neighbour_cost(self):
+        n = len(self.distances)
+        slots = self.campus_graph.time_slots(n)
+        tour = [0]
+        unvisited = np.ones(n, dtype=bool)
+        unvisited[0] = False
+        for step in range(n - 1):
+            weights = np.where(unvisited, self.weights[tour[-1], :, slots[step]], np.inf)
+            tour.append(int(np.argmin(weights)))
+            unvisited[tour[-1]] = False
+        tour.append(0)
+        return float(self.campus_graph.tour_weights(tour).sum())
+
+    def construct_tours(self):
+        starts = self.rng.integers(len(self.distances), size=self.number_ants)
+        return self.walk_tours(starts, self.pheromone ** self.alpha)
+
+    def walk_tours(self, starts, attractiveness, colonies=None, start_slots=None):
+        n = len(self.distances)
+        ants = np.arange(len(starts))
+        # the time slot of every step, per ant if the ants leave at different slots
+        if start_slots is None:
+            slots = self.campus_graph.time_slots(n)
+        else:
+            slots = self.campus_graph.time_slots(n, np.asarray(start_slots)[:, None]).T
+        tours = np.empty((len(starts), n + 1), dtype=np.intp)
+        tours[:, 0] = starts
+        tours[:, -1] = starts
+        unvisited = np.ones((len(starts), n), dtype=bool)
+        unvisited[ants, starts] = False
+
+        previous = starts
+        for step in range(n - 1):
+            if colonies is None:
+                rows = attractiveness[previous] * self.visibility(previous, slots[step]) * unvisited
+            else:
+                rows = attractiveness[colonies, previous] * self.visibility(previous, slots[step]) * unvisited
+            move = self.roulette_wheel(rows, unvisited)
+            tours[:, step + 1] = move
+            unvisited[ants, move] = False
+            previous = move
+        self.count('ant_steps', len(starts) * n)
+        return tours
+
+    # One iteration: construct all tours, update the pheromone as the engine does. Returns the shortest tour of the iteration as (nodes, cost)
+    def iterate(self):
+        if self.construction != 'vectorized' or self.candidate_list_size is not None:
+            raise ValueError("The {} engine needs the vectorized construction without candidate lists".format(self.engine))
+        self.check_graph_version()
+        if self.trail_start is None:
+            self.trail_start = self.initial_trail()
+            self.pheromone = np.full(self.distances.shape, self.trail_start)
+        stats = self.instrumentation
+        if stats is not None:
+            stats.start()
+        tours = self.construct_tours()
+        if stats is not None:
+            stats.lap('construction')
+        costs = self.evaluate_tours(tours)
+        if stats is not None:
+            stats.lap('evaluation')
+        if self.local_search:
+            self.improve_best_tours(tours, costs)
+            if stats is not None:
+                stats.lap('local_search')
+        best = np.argmin(costs)
+        self.improved = bool(costs[best] < self.best_cost)
+        if self.improved:
+            self.best_tour = tours[best].copy()
+            self.best_cost = float(costs[best])
+        self.deposit_pheromone(tours, costs)
+        if stats is not None:
+            stats.lap('pheromone')
+
+        self.evaporate()
+        if stats is not None:
+            stats.lap('evaporation')
+            stats.count('iterations', 1)
+        return tours[best].tolist(), costs[best]
+
+    # Pheromone on the edges of a tour (n + 1 nodes)
+    def tour_edges(self, tour):
+        return tour[:-1], tour[1:]
+
+    def engine_state(self):
+        has_tour = self.best_tour is not None
+        return {'engine_trail_start': np.nan if self.trail_start is None else self.trail_start,
+                'engine_best_tour': self.best_tour if has_tour else np.zeros(0, dtype=np.intp),
+                'engine_best_cost': self.best_cost}
+
+    def restore_engine_state(self, checkpoint):
+        trail_start = float(checkpoint['engine_trail_start'])
+        self.trail_start = None if np.isnan(trail_start) else trail_start
+        self.best_cost = float(checkpoint['engine_best_cost'])
+        self.best_tour = checkpoint['engine_best_tour'].copy() if np.isfinite(self.best_cost) else None
+
+
+class MaxMinAntColony(TimeSlotColony):
+
+    def __init__(self, distances, campus_graph, construction='vectorized', seed=None):
+        """
+        MAX-MIN Ant System, see the module summary. Takes the arguments of AntColony and uses its parameters, with these changes:
+            decay (float): Share of the pheromone kept per iteration, MAX-MIN needs slow evaporation. Default=0.98
+            alpha, beta: Default=1 and 2, beta applies to the reciprocal of the edge weight at the time slot of the step
+            best_ants: Not used, one ant deposits per iteration
+            global_best_interval (int): Every this many iterations the best tour so far deposits instead of the iteration best. Default=5
+            best_probability (float): Probability that a converged colony builds the best tour again, sets tau_min. Default=0.05
+            restart_branching (float): Reset the trails when the average number of edges per node with pheromone well above tau_min
+                drops to this value (see trail_branching). Default=1.1
+            restart_patience (int): Reset the trails after this many iterations without a new best tour. Default=100
+        Example:
+            ant_colony = MaxMinAntColony(None, campus_graph)
+            cost, path, weights = ant_colony.run()
+        """
+        super().__init__(distances, campus_graph, construction, seed)
+        self.engine = 'max_min'
+        self.decay = 0.98
+        self.global_best_interval = 5
+        self.best_probability = 0.05
+        self.restart_branching = 1.1
+        self.restart_patience = 100
+        self.tau_max = None
+        self.tau_min = None
+        self.iteration = 0  # Iterations of this colony, selects when the best tour so far deposits
+        self.since_improvement = 0  # Iterations since the best tour so far improved (or the trails were reset)
+        self.restarts = 0  # Number of trail resets
+
+    def initial_trail(self):
+        self.update_trail_limits(self.nearest_neighbour_cost())
+        return self.tau_max
+
+    def refresh_trails(self):
+        self.update_trail_limits(self.best_cost if self.best_tour is not None else self.nearest_neighbour_cost())
+        self.trail_start = self.tau_max
+        np.clip(self.pheromone, self.tau_min, self.tau_max, out=self.pheromone)
+
+    # tau_max is the pheromone an edge that every iteration reinforces converges to, tau_min is set such that a colony that converged
+    # to the best tour builds it again with probability best_probability
+    def update_trail_limits(self, best_cost):
+        n = len(self.distances)
+        self.tau_max = self.decay / ((1 - self.decay) * best_cost)
+        root = self.best_probability ** (1.0 / n)
+        self.tau_min = min(self.tau_max * (1 - root) / ((n / 2 - 1) * root), self.tau_max) if n > 2 else self.tau_max
+
+    def deposit_pheromone(self, tours, costs):
+        self.iteration += 1
+        if self.improved:
+            self.update_trail_limits(self.best_cost)
+            self.since_improvement = 0
+        else:
+            self.since_improvement += 1
+        best = np.argmin(costs)
+        if self.iteration % self.global_best_interval == 0:
+            tour, cost = self.best_tour, self.best_cost
+        else:
+            tour, cost = tours[best], costs[best]
+        if cost != 0:
+            self.pheromone[self.tour_edges(tour)] += 1.0 / cost
+
+    def evaporate(self):
+        self.pheromone *= self.decay
+        np.clip(self.pheromone, self.tau_min, self.tau_max, out=self.pheromone)
+        if self.since_improvement >= self.restart_patience or self.trail_branching() <= self.restart_branching:
+            self.pheromone[...] = self.tau_max
+            self.since_improvement = 0
+            self.restarts += 1
+
+    # Average number of edges per node whose pheromone is above tau_min + lambda * (tau_max - tau_min). Right after a reset all edges
+    # are at tau_max, a converged colony keeps about one edge per node away from tau_min
+    def trail_branching(self):
+        n = len(self.pheromone)
+        threshold = self.tau_min + self.branching_lambda * (self.tau_max - self.tau_min)
+        return ((self.pheromone > threshold).sum() - (np.diag(self.pheromone) > threshold).sum()) / n
+
+    def engine_state(self):
+        state = super().engine_state()
+        state.update({'engine_trail_limits': np.array([np.nan, np.nan] if self.tau_max is None else [self.tau_min, self.tau_max]),
+                      'engine_counters': np.array([self.iteration, self.since_improvement, self.restarts])})
+        return state
+
+    def restore_engine_state(self, checkpoint):
+        super().restore_engine_state(checkpoint)
+        tau_min, tau_max = checkpoint['engine_trail_limits']
+        self.tau_min, self.tau_max = (None, None) if np.isnan(tau_max) else (float(tau_min), float(tau_max))
+        self.iteration, self.since_improvement, self.restarts = (int(value) for value in checkpoint['engine_counters'])
+
+
+class AntColonySystem(TimeSlotColony):
+
+    def __init__(self, distances, campus_graph, construction='vectorized', seed=None):
+        """
+        Ant Colony System, see the module summary. Takes the arguments of AntColony and uses its parameters, with these changes:
+            number_ants (int): Default=10
+            decay (float): Share of the pheromone the edges of the best tour keep in the global update (1 - rho). Default=0.9
+            alpha, beta: Default=1 and 2, beta applies to the reciprocal of the edge weight at the time slot of the step
+            best_ants: Not used, only the best tour so far is reinforced
+            exploitation (float): Probability q0 that an ant takes the best edge instead of sampling one. Default=0.75 (0.9 in the
+                literature stagnates on some campus graphs)
+            local_decay (float): Share xi of the pheromone of an edge an ant just took that is replaced by tau_0. Default=0.1
+        Example:
+            ant_colony = AntColonySystem(None, campus_graph)
+            cost, path, weights = ant_colony.run()
+        """
+        super().__init__(distances, campus_graph, construction, seed)
+        self.engine = 'colony_system'
+        self.number_ants = 10
+        self.decay = 0.9
+        self.exploitation = 0.75
+        self.local_decay = 0.1
+
+    # tau_0 = 1 / (n * cost of the nearest neighbour tour)
+    def initial_trail(self):
+        return 1.0 / (len(self.distances) * self.nearest_neighbour_cost())
+
+    # tau_0 follows the nearest neighbour tour on the new weights, the local update pulls the trails towards it
+    def refresh_trails(self):
+        self.trail_start = self.initial_trail()
+
+    # Pseudo-random proportional rule with the local pheromone update after every step. The attractiveness changes during the
+    # construction, so it is recomputed per step for the rows of the current nodes only
+    def construct_tours(self):
+        n = len(self.distances)
+        ants = np.arange(self.number_ants)
+        starts = self.rng.integers(n, size=self.number_ants)
+        slots = self.campus_graph.time_slots(n)
+        tours = np.empty((self.number_ants, n + 1), dtype=np.intp)
+        tours[:, 0] = starts
+        tours[:, -1] = starts
+        unvisited = np.ones((self.number_ants, n), dtype=bool)
+        unvisited[ants, starts] = False
+
+        previous = starts
+        for step in range(n - 1):
+            rows = self.pheromone[previous] ** self.alpha * self.visibility(previous, slots[step]) * unvisited
+            exploit = (self.rng.random(self.number_ants) < self.exploitation) & (rows.max(axis=1) > 0)
+            move = np.empty(self.number_ants, dtype=np.intp)
+            move[exploit] = np.argmax(rows[exploit], axis=1)
+            explore = ~exploit
+            if explore.any():
+                move[explore] = self.roulette_wheel(rows[explore], unvisited[explore])
+            self.local_update(previous, move)
+            tours[:, step + 1] = move
+            unvisited[ants, move] = False
+            previous = move
+        self.local_update(previous, starts)
+        self.count('ant_steps', self.number_ants * n)
+        return tours
+
+    def local_update(self, rows, cols):
+        self.pheromone[rows, cols] = (1 - self.local_decay) * self.pheromone[rows, cols] + self.local_decay * self.trail_start
+
+    # Global update: only the edges of the best tour so far evaporate and are reinforced
+    def deposit_pheromone(self, tours, costs):
+        if self.best_cost == 0:
+            return
+        edges = self.tour_edges(self.best_tour)
+        self.pheromone[edges] = self.decay * self.pheromone[edges] + (1 - self.decay) / self.best_cost
+
+    def evaporate(self):
+        pass
+
+
+ENGINES = {
+    'ant_system': AntColony,
+    'max_min': MaxMinAntColony,
+    'colony_system': AntColonySystem,
+}
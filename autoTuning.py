@@ -0,0 +1,311 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Automatic tuning of the ant colony settings (number_ants, best_ants, decay, alpha, beta) per graph size.
+#
+# Summary:
+# For every graph size, a set of candidate settings (the current defaults and random samples of PARAMETER_SPACE) races over training
+# graphs from create_campus_graph. The target of a training graph is, by default, the cost a colony with the current default settings
+# reaches in 700 iterations (or its optimum from exactSolver.py), plus a gap. A candidate scores the CPU seconds its colony needs to
+# reach the target. A colony that does not reach it within the iteration budget scores a penalty (UNSOLVED_PENALTY times the longest
+# run on that graph, times how far its best cost stayed above the target), so the race still separates candidates on graphs no
+# candidate solves. Each round evaluates the remaining candidates on the next training graph, in parallel on a process pool.
+# After the first rounds, a candidate is dropped as soon as a paired t-test on the log scores shows it is slower than the current best,
+# so most of the time is spent on the good candidates. All candidates of a round run on the same graph with the same seed.
+# The winner of every size is written to a JSON profile, which AntColony.load_profile applies to a colony (for the closest tuned size).
+# The profile also sets number_iterations: twice the most iterations the winner needed to reach a target, at least
+# MIN_TUNED_ITERATIONS and capped at the budget.
+#
+# Usage:
+# python3 autoTuning.py --nodes 8 12 15 --output profile.json
+# colony.load_profile('profile.json')
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from aco import AntColony, PROFILE_VERSION
+from createGraph import create_campus_graph
+from exactSolver import exact_path
+from experimentRunner import derive_seed
+
+PARAMETER_SPACE = {
+    'number_ants': [10, 20, 30, 50],
+    'best_ants': [1, 3, 5, 10],
+    'decay': [0.5, 0.7, 0.8, 0.9, 0.95],
+    'alpha': [0.5, 0.7, 1.0, 1.5, 2.0],
+    'beta': [0.0, 0.35, 0.7, 1.0, 2.0],
+}
+# The hard-coded settings of AntColony, always one of the candidates
+DEFAULT_SETTINGS = {'number_ants': 30, 'best_ants': 5, 'decay': 0.9, 'alpha': 0.7, 'beta': 0.7}
+DEFAULT_NODES = [8, 12, 15]
+# The target of a training graph: 'default' is the cost a colony with DEFAULT_SETTINGS reaches in MAX_ITERATIONS, so the race looks
+# for the cheapest settings that match today's quality, 'optimum' is the optimum of exactSolver.py
+REFERENCE = 'default'
+# Relative gap above the reference cost a run has to reach
+TARGET_GAP = 0.0
+# Iterations a run may take to reach the target (the default number_iterations of AntColony)
+MAX_ITERATIONS = 700
+# Score factor of a run that does not reach the target
+UNSOLVED_PENALTY = 10
+# number_iterations of a profile is this factor times the most iterations the winner needed
+ITERATION_MARGIN = 2
+# Smallest number_iterations of a profile, easy training graphs are solved in a handful of iterations that do not carry over
+MIN_TUNED_ITERATIONS = 50
+# One-sided 95% critical values of Student's t distribution by degrees of freedom (larger ones use the value of the next smaller key)
+T_CRITICAL = {1: 6.314, 2: 2.920, 3: 2.353, 4: 2.132, 5: 2.015, 6: 1.943, 7: 1.895, 8: 1.860, 9: 1.833, 10: 1.812,
+              12: 1.782, 15: 1.753, 20: 1.725, 30: 1.697, 60: 1.671, 120: 1.658}
+
+# Training graphs built by this process, keyed by (nodes, instance, seed)
+training_graphs = {}
+
+
+def sample_candidates(nr_of_candidates, seed=0):
+    """
+    Draws distinct candidate settings from PARAMETER_SPACE (best_ants never exceeds number_ants).
+
+    Returns:
+        list: DEFAULT_SETTINGS followed by nr_of_candidates - 1 random settings (dicts)
+    """
+    rng = np.random.default_rng(derive_seed('candidates', seed))
+    candidates = [dict(DEFAULT_SETTINGS)]
+    seen = {tuple(sorted(DEFAULT_SETTINGS.items()))}
+    size = np.prod([len(values) for values in PARAMETER_SPACE.values()])
+    for _ in range(100 * nr_of_candidates):
+        if len(candidates) >= min(nr_of_candidates, size):
+            break
+        settings = {name: values[rng.integers(len(values))] for name, values in PARAMETER_SPACE.items()}
+        key = tuple(sorted(settings.items()))
+        if settings['best_ants'] <= settings['number_ants'] and key not in seen:
+            seen.add(key)
+            candidates.append(settings)
+    return candidates
+
+
+def training_graph(nodes, instance, seed=0):
+    """
+    Returns:
+        CampusGraph: Training graph, the same seeds give the same graph in every process
+    """
+    key = (nodes, instance, seed)
+    if key not in training_graphs:
+        np.random.seed(derive_seed('tuning graph', nodes, instance, seed))
+        training_graphs[key] = create_campus_graph(nodes)
+    return training_graphs[key]
+
+
+def instance_target(task):
+    """
+    Computes the target cost of a training graph. Executed in a worker process.
+
+    Args:
+        task (dict): 'nodes', 'instance', 'seed', 'gap', 'reference' and 'max_iterations'
+
+    Returns:
+        float: (1 + gap) times the reference cost: the optimum for 'optimum', the cost a colony with DEFAULT_SETTINGS reaches in
+            max_iterations for 'default'
+    """
+    campus_graph = training_graph(task['nodes'], task['instance'], task['seed'])
+    if task['reference'] == 'optimum':
+        cost = exact_path(campus_graph)[0]
+    elif task['reference'] == 'default':
+        colony = AntColony(None, campus_graph, seed=derive_seed('tuning reference', task['nodes'], task['instance'], task['seed']))
+        colony.number_iterations = task['max_iterations']
+        cost = colony.run()[0]
+    else:
+        raise ValueError("Unknown reference: {}".format(task['reference']))
+    return float(cost) * (1 + task['gap'])
+
+
+def evaluate(task):
+    """
+    Runs one candidate on one training graph until it reaches the target or the iteration budget. Executed in a worker process.
+
+    Args:
+        task (dict): 'settings', 'nodes', 'instance', 'seed', 'target' and 'max_iterations'
+
+    Returns:
+        dict: 'reached', 'seconds' (CPU time), 'iterations', 'cost' and 'excess' (cost / target) of the run, score_runs adds the 'score'
+    """
+    campus_graph = training_graph(task['nodes'], task['instance'], task['seed'])
+    target = task['target']
+    colony = AntColony(None, campus_graph, seed=derive_seed('tuning run', task['nodes'], task['instance'], task['seed']))
+    for name, value in task['settings'].items():
+        setattr(colony, name, value)
+    colony.number_iterations = task['max_iterations']
+    colony.iteration_callback = lambda iteration, best_cost, timing: best_cost <= target
+    start = time.process_time()
+    cost = colony.run()[0]
+    seconds = max(time.process_time() - start, 1e-6)
+    return {'reached': bool(cost <= target), 'seconds': seconds, 'iterations': colony.iterations_run, 'cost': float(cost),
+            'excess': float(cost / target)}
+
+
+def score_runs(runs):
+    """
+    Scores the runs of all candidates on one training graph in place. A run that reached the target scores its CPU seconds, one that
+    did not scores UNSOLVED_PENALTY times the longest run on the graph times the factor its cost stayed above the target, so a
+    candidate cannot make up for missing the target by being fast.
+    """
+    longest = max(run['seconds'] for run in runs)
+    for run in runs:
+        run['score'] = run['seconds'] if run['reached'] else UNSOLVED_PENALTY * longest * run['excess']
+
+
+def t_critical(degrees_of_freedom):
+    return T_CRITICAL[max(key for key in T_CRITICAL if key <= degrees_of_freedom)]
+
+
+def eliminate(log_scores, alive):
+    """
+    Paired t-tests of every remaining candidate against the one with the lowest mean log score.
+
+    Args:
+        log_scores (numpy.array): (candidates x instances) log scores of the instances raced so far
+        alive (numpy.array): Boolean mask of the remaining candidates
+
+    Returns:
+        numpy.array: The new mask, candidates significantly slower than the best are dropped
+    """
+    means = np.where(alive, log_scores.mean(axis=1), np.inf)
+    best = np.argmin(means)
+    differences = log_scores - log_scores[best]
+    k = log_scores.shape[1]
+    spread = differences.std(axis=1, ddof=1) / math.sqrt(k)
+    slower = differences.mean(axis=1) > t_critical(k - 1) * spread
+    survivors = alive & ~slower
+    survivors[best] = True
+    return survivors
+
+
+def map_tasks(function, tasks, executor):
+    if executor is None:
+        return [function(task) for task in tasks]
+    return list(executor.map(function, tasks))
+
+
+def race(nodes, candidates, targets, first_instances, max_iterations, seed, executor, verbose=False):
+    """
+    Races the candidates over the training graphs of one size, targets holds the target cost of every training graph.
+
+    Returns:
+        dict: Profile entry of the size: the winner's 'settings', its 'time_to_target' and 'reached' share, and the race statistics
+    """
+    alive = np.ones(len(candidates), dtype=bool)
+    results = [[] for _ in candidates]
+    evaluations = 0
+    instance = 0
+    nr_of_instances = len(targets)
+    while instance < nr_of_instances and alive.sum() > 1:
+        # the first round evaluates first_instances graphs at once, later rounds one graph each
+        batch = range(instance, min(nr_of_instances, max(instance + 1, first_instances)))
+        racing = np.flatnonzero(alive)
+        tasks = [{'settings': candidates[candidate], 'nodes': nodes, 'instance': graph, 'seed': seed, 'target': targets[graph],
+                  'max_iterations': max_iterations} for candidate in racing for graph in batch]
+        outcomes = np.array(map_tasks(evaluate, tasks, executor), dtype=object).reshape(len(racing), len(batch))
+        for column in range(len(batch)):
+            score_runs(outcomes[:, column])
+        for candidate, runs in zip(racing, outcomes):
+            results[candidate].extend(runs)
+        evaluations += len(tasks)
+        instance = batch.stop
+
+        log_scores = np.full((len(candidates), instance), np.inf)
+        for candidate in racing:
+            log_scores[candidate] = np.log([result['score'] for result in results[candidate]])
+        if instance >= 2:
+            alive = eliminate(np.where(alive[:, None], log_scores, 0.0), alive)
+        if verbose:
+            print("nodes={} graphs={} candidates left {}/{}".format(nodes, instance, alive.sum(), len(candidates)))
+
+    survivors = np.flatnonzero(alive)
+    winner = min(survivors, key=lambda candidate: np.mean(np.log([result['score'] for result in results[candidate]])))
+    runs = results[winner]
+    reached = [result for result in runs if result['reached']]
+    iterations = max([result['iterations'] for result in reached], default=max_iterations)
+    settings = dict(candidates[winner])
+    settings['number_iterations'] = int(min(max_iterations, max(MIN_TUNED_ITERATIONS, ITERATION_MARGIN * iterations)))
+    return {
+        'settings': settings,
+        'time_to_target': {'mean': float(np.mean([result['seconds'] for result in reached])) if reached else None,
+                           'max': float(max(result['seconds'] for result in reached)) if reached else None},
+        'reached': len(reached) / len(runs),
+        'instances': len(runs),
+        'survivors': [candidates[candidate] for candidate in survivors],
+        'evaluations': evaluations,
+    }
+
+
+def tune(node_counts=None, nr_of_candidates=32, nr_of_instances=12, first_instances=4, gap=TARGET_GAP, reference=REFERENCE,
+         max_iterations=MAX_ITERATIONS, seed=0, max_workers=None, verbose=False):
+    """
+    Races candidate settings for every graph size.
+
+    Args:
+        node_counts (list): Graph sizes to tune, DEFAULT_NODES if not given
+        nr_of_candidates (int): Number of candidate settings, the defaults included
+        nr_of_instances (int): Maximum number of training graphs per size
+        first_instances (int): Training graphs every candidate runs on before candidates can be dropped
+        gap (float): Relative gap above the reference cost a run has to reach
+        reference (str): 'default' for the cost the current default settings reach in max_iterations, 'optimum' for the optimum
+        max_iterations (int): Iteration budget of a run
+        seed (int): Seed of the candidates and the training graphs
+        max_workers (int): Number of worker processes, default is the number of cores (1 runs in this process)
+
+    Returns:
+        dict: The profile, one entry per size under 'sizes'
+    """
+    candidates = sample_candidates(nr_of_candidates, seed)
+    profile = {'version': PROFILE_VERSION, 'engine': 'ant_system', 'reference': reference, 'target_gap': gap, 'max_iterations': max_iterations, 'seed': seed, 'sizes': {}}
+    executor = None if max_workers == 1 else ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        for nodes in node_counts or DEFAULT_NODES:
+            targets = map_tasks(instance_target, [{'nodes': nodes, 'instance': instance, 'seed': seed, 'gap': gap, 'reference': reference,
+                                                   'max_iterations': max_iterations} for instance in range(nr_of_instances)], executor)
+            profile['sizes'][str(nodes)] = race(nodes, candidates, targets, max(2, first_instances), max_iterations, seed, executor, verbose)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return profile
+
+
+def save_profile(path, profile):
+    # written to a temporary file first, so a colony never loads a half written profile
+    with open(path + '.tmp', 'w') as file:
+        json.dump(profile, file, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Tune the ant colony settings per graph size")
+    parser.add_argument('--output', default='profile.json', help="JSON file the profile is written to")
+    parser.add_argument('--nodes', nargs='+', type=int, default=DEFAULT_NODES)
+    parser.add_argument('--candidates', type=int, default=32)
+    parser.add_argument('--instances', type=int, default=12, help="Maximum number of training graphs per size")
+    parser.add_argument('--first-instances', type=int, default=4, help="Training graphs raced before candidates are dropped")
+    parser.add_argument('--reference', choices=['default', 'optimum'], default=REFERENCE,
+                        help="Target cost: what the default settings reach in --max-iterations, or the optimum")
+    parser.add_argument('--gap', type=float, default=TARGET_GAP, help="Relative gap above the reference cost a run has to reach")
+    parser.add_argument('--max-iterations', type=int, default=MAX_ITERATIONS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args(arguments)
+
+    profile = tune(args.nodes, args.candidates, args.instances, args.first_instances, args.gap, args.reference, args.max_iterations,
+                   args.seed, args.workers, verbose=True)
+    save_profile(args.output, profile)
+    for nodes, entry in profile['sizes'].items():
+        seconds = entry['time_to_target']['mean']
+        print("nodes={:<3} {} reached {:.0%} in {} ({} runs)".format(
+            nodes, entry['settings'], entry['reached'], "n/a" if seconds is None else "{:.3f}s".format(seconds), entry['evaluations']))
+    print("Profile written to {}".format(args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Reproducible benchmark suite for the throughput and solution quality of the path finding algorithms.
+#
+# Summary:
+# Sweeps node count, number of ants, iterations and seeds across the solvers in SOLVERS and records, per configuration,
+# the wall time, ant steps per second, peak memory (tracemalloc, measured in a separate run so it does not slow down the timing)
+# and the distribution of the solution costs over the seeds. Results are written as JSON and can be compared against a stored baseline.
+# With --engines, the colony engines (acoVariants.py) are also compared on time to equal quality: the time each engine needs to reach
+# the cost the Ant System reaches in the full number of iterations.
+#
+# Usage:
+# python3 benchmark.py --output bench.json                              runs the default grid
+# python3 benchmark.py --output bench.json --baseline baseline.json     also reports regressions against the baseline
+# python3 benchmark.py --solvers aco --iterations 700 --engines          also compares the engines on time to equal quality
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from acoVariants import ENGINES
+from createGraph import create_campus_graph
+from exactSolver import exact_path
+from randomPath import randomPathFinding, randomPathFindingBatch
+
+DEFAULT_GRID = {
+    'solvers': ['aco', 'aco_local_search', 'aco_max_min', 'aco_colony_system', 'random', 'random_batch', 'exact'],
+    'nodes': [5, 10, 15],
+    'ants': [30],
+    'iterations': [100, 700],
+    'seeds': [0, 1, 2],
+}
+# Relative slowdown (wall time) or quality loss (mean cost) above which a configuration counts as a regression
+REGRESSION_TOLERANCE = 0.2
+
+
+def run_aco(campus_graph, ants, iterations, seed, engine='ant_system', **settings):
+    """
+    Runs an ant colony (AntColony or one of the engines of acoVariants.py) once. ants=None keeps the engine's number of ants.
+
+    Returns:
+        tuple: Cost of the best path and number of ant steps taken
+    """
+    colony = ENGINES[engine](None, campus_graph, seed=seed)
+    if ants is not None:
+        colony.number_ants = ants
+    colony.number_iterations = iterations
+    for name, value in settings.items():
+        setattr(colony, name, value)
+    cost, _, _ = colony.run()
+    return cost, colony.iterations_run * colony.number_ants * campus_graph.nr_of_nodes
+
+
+def run_aco_local_search(campus_graph, ants, iterations, seed):
+    return run_aco(campus_graph, ants, iterations, seed, local_search=True)
+
+
+def run_aco_max_min(campus_graph, ants, iterations, seed):
+    return run_aco(campus_graph, ants, iterations, seed, engine='max_min')
+
+
+def run_aco_colony_system(campus_graph, ants, iterations, seed):
+    return run_aco(campus_graph, ants, iterations, seed, engine='colony_system')
+
+
+def run_random(campus_graph, ants, iterations, seed):
+    """
+    Best of `iterations` random tours, like runExperiments.iterate_algorithm. The number of ants is not used.
+    """
+    random.seed(seed)
+    best = min(randomPathFinding(campus_graph)[0] for _ in range(iterations))
+    return best, iterations * campus_graph.nr_of_nodes
+
+
+def run_random_batch(campus_graph, ants, iterations, seed):
+    """
+    Best of `iterations` random tours drawn and scored in one batch.
+    """
+    return randomPathFindingBatch(campus_graph, iterations, seed)[0], iterations * campus_graph.nr_of_nodes
+
+
+def run_exact(campus_graph, ants, iterations, seed):
+    return exact_path(campus_graph)[0], 0
+
+
+# name -> (solver, whether the number of ants and iterations change its result)
+SOLVERS = {
+    'aco': (run_aco, True),
+    'aco_local_search': (run_aco_local_search, True),
+    'aco_max_min': (run_aco_max_min, True),
+    'aco_colony_system': (run_aco_colony_system, True),
+    'random': (run_random, True),
+    'random_batch': (run_random_batch, True),
+    'exact': (run_exact, False),
+}
+
+
+def expand_grid(grid):
+    """
+    Expands a grid into the list of configurations to benchmark. Solvers that ignore ants and iterations get a single configuration per node count.
+
+    Args:
+        grid (dict): Lists of 'solvers', 'nodes', 'ants' and 'iterations' (see DEFAULT_GRID)
+
+    Returns:
+        list: Configurations as dicts with 'solver', 'nodes', 'ants' and 'iterations'
+    """
+    configurations = []
+    for solver in grid['solvers']:
+        parametrized = SOLVERS[solver][1]
+        for nodes in grid['nodes']:
+            if not parametrized:
+                configurations.append({'solver': solver, 'nodes': nodes, 'ants': None, 'iterations': None})
+                continue
+            for ants in (grid['ants'] if solver.startswith('aco') else [None]):
+                for iterations in grid['iterations']:
+                    configurations.append({'solver': solver, 'nodes': nodes, 'ants': ants, 'iterations': iterations})
+    return configurations
+
+
+def run_once(configuration, seed):
+    """
+    Runs one configuration with one seed. The graph and the solver are seeded, so the run is reproducible.
+
+    Returns:
+        tuple: Cost, number of ant steps and wall time in seconds
+    """
+    np.random.seed(seed)
+    campus_graph = create_campus_graph(configuration['nodes'])
+    solver = SOLVERS[configuration['solver']][0]
+    start = time.perf_counter()
+    cost, steps = solver(campus_graph, configuration['ants'], configuration['iterations'], seed)
+    return float(cost), steps, time.perf_counter() - start
+
+
+def peak_memory(configuration, seed):
+    """
+    Returns:
+        int: Peak memory in bytes allocated while running the configuration (graph construction included)
+    """
+    tracemalloc.start()
+    try:
+        run_once(configuration, seed)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_configuration(configuration, seeds):
+    """
+    Runs a configuration for every seed and summarizes the measurements.
+
+    Returns:
+        dict: The configuration with its wall time, ant steps per second, peak memory and cost distribution
+    """
+    costs, steps, times = [], [], []
+    for seed in seeds:
+        cost, step_count, wall_time = run_once(configuration, seed)
+        costs.append(cost)
+        steps.append(step_count)
+        times.append(wall_time)
+    costs = np.array(costs)
+    result = dict(configuration)
+    result.update({
+        'seeds': list(seeds),
+        'wall_time': {'mean': float(np.mean(times)), 'min': float(np.min(times)), 'max': float(np.max(times))},
+        'ant_steps_per_second': float(np.sum(steps) / np.sum(times)) if np.sum(times) > 0 else 0.0,
+        'peak_memory_bytes': peak_memory(configuration, seeds[0]),
+        'cost': {'mean': float(costs.mean()), 'std': float(costs.std()), 'min': float(costs.min()),
+                 'median': float(np.median(costs)), 'max': float(costs.max()), 'values': costs.tolist()},
+    })
+    return result
+
+
+def run_benchmarks(grid=None, verbose=True):
+    """
+    Benchmarks every configuration of a grid.
+
+    Args:
+        grid (dict): Grid to sweep, DEFAULT_GRID if not given
+
+    Returns:
+        dict: The environment the benchmark ran in and one result per configuration
+    """
+    grid = grid or DEFAULT_GRID
+    results = []
+    for configuration in expand_grid(grid):
+        result = benchmark_configuration(configuration, grid['seeds'])
+        if verbose:
+            print("{solver:>18} nodes={nodes:<3} ants={ants} iterations={iterations}: {time:.3f}s, cost {cost:.0f}".format(
+                time=result['wall_time']['mean'], cost=result['cost']['mean'], **configuration))
+        results.append(result)
+    return {'environment': environment(), 'grid': grid, 'results': results}
+
+
+def time_to_quality(engine, campus_graph, target, iterations, seed):
+    """
+    Runs an engine with its default settings until its best path costs at most target, or for the given number of iterations.
+
+    Returns:
+        dict: Whether the target was 'reached', the wall time ('seconds'), the 'iterations' and the final 'cost'
+    """
+    colony = ENGINES[engine](None, campus_graph, seed=seed)
+    colony.number_iterations = iterations
+    colony.iteration_callback = lambda iteration, best_cost, timing: best_cost <= target
+    start = time.perf_counter()
+    cost = colony.run()[0]
+    return {'reached': bool(cost <= target), 'seconds': time.perf_counter() - start, 'iterations': colony.iterations_run,
+            'cost': float(cost)}
+
+
+def compare_engines(node_counts, seeds, iterations=700, engines=None, verbose=True):
+    """
+    Compares the engines on time to equal quality. On the graph of every node count and seed, the target is the cost the Ant System
+    reaches in the given number of iterations, and every engine (the Ant System included) runs until it reaches it.
+
+    Returns:
+        list: Per engine and node count, the share of runs that reached the target, their mean wall time and iterations, the mean
+            final cost, and the speedup over the Ant System's mean wall time
+    """
+    engines = engines or list(ENGINES)
+    runs = {(engine, nodes): [] for engine in engines for nodes in node_counts}
+    for nodes in node_counts:
+        for seed in seeds:
+            np.random.seed(seed)
+            campus_graph = create_campus_graph(nodes)
+            target = run_aco(campus_graph, None, iterations, seed)[0]
+            for engine in engines:
+                runs[engine, nodes].append(time_to_quality(engine, campus_graph, target, iterations, seed))
+
+    results = []
+    for nodes in node_counts:
+        reference = np.mean([run['seconds'] for run in runs['ant_system', nodes]]) if 'ant_system' in engines else None
+        for engine in engines:
+            measured = runs[engine, nodes]
+            reached = [run for run in measured if run['reached']]
+            seconds = float(np.mean([run['seconds'] for run in reached])) if reached else None
+            result = {'engine': engine, 'nodes': nodes, 'iterations': iterations, 'seeds': list(seeds),
+                      'reached': len(reached) / len(measured), 'seconds_to_target': seconds,
+                      'iterations_to_target': float(np.mean([run['iterations'] for run in reached])) if reached else None,
+                      'cost': float(np.mean([run['cost'] for run in measured])),
+                      'speedup': reference / seconds if reference is not None and seconds else None}
+            if verbose:
+                print("{engine:>13} nodes={nodes:<3} reached {share:.0%}, {time}, {its} iterations, cost {cost:.0f}".format(
+                    engine=engine, nodes=nodes, share=result['reached'], cost=result['cost'],
+                    time="n/a" if seconds is None else "{:.3f}s".format(seconds),
+                    its="n/a" if seconds is None else "{:.0f}".format(result['iterations_to_target'])))
+            results.append(result)
+    return results
+
+
+def environment():
+    return {'python': sys.version.split()[0], 'numpy': np.__version__, 'platform': platform.platform(),
+            'processor': platform.processor()}
+
+
+def configuration_key(result):
+    return (result['solver'], result['nodes'], result['ants'], result['iterations'])
+
+
+def compare_to_baseline(report, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Compares a benchmark report with a stored baseline report. Configurations missing in either report are skipped.
+
+    Args:
+        report (dict): Report returned by run_benchmarks
+        baseline (dict): Earlier report
+        tolerance (float): Allowed relative increase of the mean wall time and the mean cost
+
+    Returns:
+        list: One message per regression, empty if there is none
+    """
+    previous = {configuration_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = previous.get(configuration_key(result))
+        if old is None:
+            continue
+        name = "{} nodes={} ants={} iterations={}".format(*configuration_key(result))
+        for metric in ('wall_time', 'cost'):
+            new_value, old_value = result[metric]['mean'], old[metric]['mean']
+            if old_value > 0 and new_value > old_value * (1 + tolerance):
+                regressions.append("{}: {} {:.4g} -> {:.4g} (+{:.0%})".format(
+                    name, metric, old_value, new_value, new_value / old_value - 1))
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark the path finding algorithms")
+    parser.add_argument('--output', default='bench.json', help="JSON file the results are written to")
+    parser.add_argument('--baseline', help="JSON file of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument('--solvers', nargs='+', default=DEFAULT_GRID['solvers'], choices=sorted(SOLVERS))
+    parser.add_argument('--nodes', nargs='+', type=int, default=DEFAULT_GRID['nodes'])
+    parser.add_argument('--ants', nargs='+', type=int, default=DEFAULT_GRID['ants'])
+    parser.add_argument('--iterations', nargs='+', type=int, default=DEFAULT_GRID['iterations'])
+    parser.add_argument('--seeds', nargs='+', type=int, default=DEFAULT_GRID['seeds'])
+    parser.add_argument('--engines', action='store_true', help="Also compare the colony engines on time to equal quality")
+    args = parser.parse_args(arguments)
+
+    grid = {'solvers': args.solvers, 'nodes': args.nodes, 'ants': args.ants, 'iterations': args.iterations, 'seeds': args.seeds}
+    report = run_benchmarks(grid)
+    if args.engines:
+        report['engines'] = compare_engines(args.nodes, args.seeds, max(args.iterations))
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print("Results written to {}".format(args.output))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare_to_baseline(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            return 1
+        print("No regressions against {}".format(args.baseline))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Names and map coordinates of the campus buildings.
+#
+# Summary:
+# Plain constants without imports, so the renderer and the command line can place the buildings on the map without building
+# the campus graph. Node i of createGraph.create_campus_graph is NODE_NAMES[i], drawn at POSITIONS[i] (pixels of the campus map).
+
+NODE_NAMES = ["CIF", "V1", "CMH", "NH", "E7", "MC", "PAC",
+              "SLC", "QNC", "LIB", "DC", "E3", "EV3", "STC", "SCH"]
+POSITIONS = [(815, 280), (515, 860), (1000, 790), (1100, 840), (1275, 800), (1230, 940), (1340, 1040),
+             (1300, 1150), (1310, 1440), (1470, 1200), (1525, 740), (1650, 870), (1715, 1285), (1800, 625), (2200, 1075)]
@@ -0,0 +1,292 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Command line entry point: solve, snapshot, benchmark, tune, compare and render.
+#
+# Summary:
+# Only argparse is imported up front, every subcommand imports the modules it needs when it runs, so `solve` never loads
+# matplotlib or NetworkX. Graphs can be saved as snapshots (graphSnapshot.py) that are memory-mapped when loaded, so a solve starts
+# without building the graph or computing its weights, and a snapshot can keep the pheromone learned by earlier solves.
+#
+# Usage:
+# python3 cli.py snapshot campus15 --nodes 15 --graph-seed 0
+# python3 cli.py solve --snapshot campus15 --iterations 200 --save-pheromone
+# python3 cli.py solve --snapshot campus15 --start 3 --slot 5 --json
+# python3 cli.py solve --snapshot campus15 --checkpoint run.npz --resume     restartable after being killed
+# python3 cli.py benchmark --solvers aco random_batch --nodes 10
+# python3 cli.py tune --nodes 8 12 15 --output profile.json
+# python3 cli.py solve --snapshot campus15 --profile profile.json              settings tuned for the graph size
+# python3 cli.py solve --snapshot campus15 --engine max_min --iterations 100
+# python3 cli.py compare --max-nodes 12
+# python3 cli.py render --snapshot campus15 --routes routes.json --output-dir thumbnails --size 320 240
+
+import argparse
+import json
+import os
+import sys
+import time
+
+START = time.perf_counter()
+# Random tours drawn by the random solver if --iterations is not given
+RANDOM_ITERATIONS = 700
+
+
+def load_graph(args):
+    """
+    Returns:
+        tuple: The graph of the snapshot (memory-mapped) or a newly created campus graph, and the pheromone of the snapshot (or None)
+    """
+    if args.snapshot:
+        from graphSnapshot import load_snapshot
+        return load_snapshot(args.snapshot)
+    import numpy as np
+    from createGraph import create_campus_graph
+    np.random.seed(args.graph_seed)
+    return create_campus_graph(args.nodes), None
+
+
+def solve(args):
+    import numpy as np
+
+    if args.start is not None and args.solver != 'aco':
+        args.error("--start needs --solver aco")
+    if args.start is not None:
+        # a query is solved with its own pheromone and no checkpoints
+        for option, given in (('--checkpoint', args.checkpoint), ('--resume', args.resume), ('--save-pheromone', args.save_pheromone)):
+            if given:
+                args.error("{} cannot be used with --start".format(option))
+    if args.resume and not args.checkpoint:
+        args.error("--resume needs --checkpoint")
+    campus_graph, pheromone = load_graph(args)
+    if hasattr(campus_graph, 'indptr') and args.solver != 'aco':
+        args.error("--solver {} needs a dense graph, use --solver aco with a sparse snapshot".format(args.solver))
+    loaded = time.perf_counter()
+    if args.solver == 'random':
+        from randomPath import randomPathFindingBatch
+        iterations = RANDOM_ITERATIONS if args.iterations is None else args.iterations
+        cost, path, weights = randomPathFindingBatch(campus_graph, iterations, args.seed)[:3]
+    elif args.solver == 'exact':
+        from exactSolver import exact_path
+        cost, path, weights = exact_path(campus_graph)
+    else:
+        colony = aco_colony(campus_graph, pheromone, args)
+        if args.start is not None:
+            if not 0 <= args.start < campus_graph.nr_of_nodes:
+                args.error("--start must be between 0 and {}".format(campus_graph.nr_of_nodes - 1))
+            result = colony.solve_queries([(args.start, args.slot)])[0]
+        elif args.resume and os.path.exists(args.checkpoint):
+            result = colony.resume(args.checkpoint)
+        else:
+            result = colony.run()
+        if args.save_pheromone and args.snapshot:
+            from graphSnapshot import save_pheromone
+            save_pheromone(args.snapshot, colony.pheromone)
+        if result is None:
+            # a sparse graph that is not connected has no closed walk through every node
+            print("No route visits every node, the graph is not connected", file=sys.stderr)
+            return 1
+        cost, path, weights = result
+    solved = time.perf_counter()
+
+    answer = {'cost': float(cost), 'path': [int(node) for node in path], 'weights': [float(weight) for weight in np.asarray(weights)],
+              'load_seconds': loaded - START, 'solve_seconds': solved - loaded}
+    if args.json:
+        print(json.dumps(answer))
+    else:
+        path = answer['path'] if len(answer['path']) <= 100 else "of {} steps (use --json for the nodes)".format(len(answer['path']) - 1)
+        print("Total cost: {:.1f}, with the path {}".format(answer['cost'], path))
+        print("Graph ready after {:.1f} ms, solved in {:.1f} ms".format(1000 * answer['load_seconds'], 1000 * answer['solve_seconds']))
+    return 0
+
+
+def aco_colony(campus_graph, pheromone, args):
+    import numpy as np
+
+    if hasattr(campus_graph, 'indptr'):
+        if args.engine != 'ant_system':
+            args.error("--engine {} needs a dense graph, use --engine ant_system with a sparse snapshot".format(args.engine))
+        from sparseColony import SparseAntColony
+        colony = SparseAntColony(campus_graph, seed=args.seed)
+    elif args.engine != 'ant_system':
+        from acoVariants import ENGINES
+        colony = ENGINES[args.engine](None, campus_graph, seed=args.seed)
+    else:
+        from aco import AntColony
+        colony = AntColony(None, campus_graph, seed=args.seed)
+    if pheromone is not None:
+        colony.pheromone = np.array(pheromone)
+    # explicit options override the tuned settings
+    if args.profile:
+        colony.load_profile(args.profile)
+    if args.iterations is not None:
+        colony.number_iterations = args.iterations
+    if args.ants is not None:
+        colony.number_ants = args.ants
+    colony.patience = args.patience
+    colony.time_budget = args.time_budget
+    colony.checkpoint_path = args.checkpoint
+    colony.checkpoint_interval = args.checkpoint_interval
+    return colony
+
+
+def snapshot(args):
+    import numpy as np
+    from graphSnapshot import save_snapshot
+
+    np.random.seed(args.graph_seed)
+    if args.points:
+        from sparseGraph import create_sparse_campus_graph
+        points = np.random.uniform(-800, 800, size=(args.points, 2))
+        campus_graph = create_sparse_campus_graph(points, args.neighbours, args.slots)
+    else:
+        from createGraph import create_campus_graph
+        campus_graph = create_campus_graph(args.nodes)
+    try:
+        save_snapshot(args.output, campus_graph)
+    except ValueError as error:
+        args.error(str(error))
+    print("Snapshot of {} nodes and {} time slots written to {}".format(campus_graph.nr_of_nodes, campus_graph.nr_of_slots, args.output))
+    return 0
+
+
+def benchmark(args):
+    from benchmark import main
+    return main(args.arguments)
+
+
+def tune(args):
+    from autoTuning import main
+    return main(args.arguments)
+
+
+def compare(args):
+    from experimentRunner import run_experiments
+
+    node_counts = list(range(args.min_nodes, args.max_nodes + 1))
+    config = {'algorithms': ['random', 'aco', 'exact'], 'nodes': node_counts, 'repetitions': 1,
+              'random_iterations': args.random_iterations, 'seed': args.seed}
+    cache_dir = None if args.no_cache else args.cache_dir
+    costs = {(task['algorithm'], task['nodes']): result['cost']
+             for task, result in run_experiments(config, cache_dir, args.workers, verbose=args.verbose)}
+    print("{:>5} {:>10} {:>10} {:>10}".format('nodes', 'random', 'aco', 'exact'))
+    for nodes in node_counts:
+        print("{:>5} {:>10.0f} {:>10.0f} {:>10.0f}".format(nodes, costs['random', nodes], costs['aco', nodes], costs['exact', nodes]))
+
+    if args.plot:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        plt.figure(figsize=(10, 5))
+        for algorithm, label, marker in (('random', 'Random Pathfinding', 'o'), ('aco', 'ACO Pathfinding', 'x'),
+                                         ('exact', 'Optimal (Held-Karp)', 's')):
+            plt.plot(node_counts, [costs[algorithm, nodes] for nodes in node_counts], label=label, marker=marker)
+        plt.xlabel('Number of Nodes')
+        plt.ylabel('Total Weight')
+        plt.legend()
+        plt.grid(True)
+        plt.savefig(args.plot)
+        print("Plot written to {}".format(args.plot))
+    return 0
+
+
+def render(args):
+    from VisualizeGraph import render_routes
+
+    if args.routes:
+        with open(args.routes) as file:
+            routes = json.load(file)
+        # a list of solve --json answers, or of [path, weights] pairs
+        routes = [(route['path'], route.get('weights')) if isinstance(route, dict) else route for route in routes]
+    else:
+        campus_graph, pheromone = load_graph(args)
+        result = aco_colony(campus_graph, pheromone, args).run()
+        if result is None:
+            print("No route visits every node, the graph is not connected", file=sys.stderr)
+            return 1
+        routes = [result[1:]]
+    from campusLayout import POSITIONS
+    files = render_routes(routes, args.output_dir, POSITIONS, tuple(args.size), labels=not args.no_labels, max_workers=args.workers)
+    print("{} routes rendered to {} in {:.1f} s".format(len(files), args.output_dir, time.perf_counter() - START))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Capacity based campus TSP: solve, benchmark, tune, compare and render routes")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    graph = argparse.ArgumentParser(add_help=False)
+    graph.add_argument('--snapshot', help="Snapshot directory to load the graph (and pheromone) from")
+    graph.add_argument('--nodes', type=int, default=15, help="Number of campus buildings if no snapshot is given")
+    graph.add_argument('--graph-seed', type=int, default=0, help="Seed of the random occupancies if no snapshot is given")
+
+    colony = argparse.ArgumentParser(add_help=False)
+    colony.add_argument('--iterations', type=int, help="Default 700, or the tuned value of --profile")
+    colony.add_argument('--profile', help="Tuning profile (autoTuning.py) the colony settings are taken from")
+    # acoVariants.ENGINES, not imported up front
+    colony.add_argument('--engine', choices=['ant_system', 'max_min', 'colony_system'], default='ant_system',
+                        help="Pheromone update rule: Ant System, MAX-MIN Ant System or Ant Colony System")
+    colony.add_argument('--ants', type=int)
+    colony.add_argument('--patience', type=int)
+    colony.add_argument('--time-budget', type=float, help="Seconds the colony may run")
+    colony.add_argument('--seed', type=int)
+    colony.add_argument('--checkpoint', help="File the colony state is written to periodically")
+    colony.add_argument('--checkpoint-interval', type=int, default=50, help="Iterations between two checkpoints")
+
+    command = commands.add_parser('solve', parents=[graph, colony], help="Find a route")
+    command.add_argument('--solver', choices=['aco', 'random', 'exact'], default='aco')
+    command.add_argument('--start', type=int, help="Start building (ACO only)")
+    command.add_argument('--slot', type=int, default=0, help="Departure time slot, used with --start")
+    command.add_argument('--save-pheromone', action='store_true', help="Store the learned pheromone in the snapshot")
+    command.add_argument('--resume', action='store_true', help="Continue the run saved in --checkpoint if it exists")
+    command.add_argument('--json', action='store_true')
+    command.set_defaults(handler=solve, error=command.error)
+
+    command = commands.add_parser('snapshot', help="Create a graph and save it as a snapshot")
+    command.add_argument('output', help="Snapshot directory")
+    command.add_argument('--nodes', type=int, default=15)
+    command.add_argument('--graph-seed', type=int, default=0)
+    command.add_argument('--points', type=int, help="Create a sparse synthetic walkway graph with this many nodes instead")
+    command.add_argument('--neighbours', type=int, default=6)
+    command.add_argument('--slots', type=int, default=8)
+    command.set_defaults(handler=snapshot, error=command.error)
+
+    # every other argument is passed on to benchmark.py (and autoTuning.py for tune)
+    command = commands.add_parser('benchmark', help="Run the benchmark suite (arguments are passed to benchmark.py)", add_help=False)
+    command.set_defaults(handler=benchmark)
+
+    command = commands.add_parser('tune', help="Race colony settings per graph size (arguments are passed to autoTuning.py)", add_help=False)
+    command.set_defaults(handler=tune)
+
+    command = commands.add_parser('compare', help="Compare random, ACO and the optimum over node counts")
+    command.add_argument('--min-nodes', type=int, default=4)
+    command.add_argument('--max-nodes', type=int, default=15)
+    command.add_argument('--random-iterations', type=int, default=100)
+    command.add_argument('--seed', type=int, default=0)
+    command.add_argument('--workers', type=int)
+    command.add_argument('--cache-dir', default='.experiment_cache')  # experimentRunner.DEFAULT_CACHE_DIR, not imported up front
+    command.add_argument('--no-cache', action='store_true')
+    command.add_argument('--plot', help="Image file the comparison is plotted to")
+    command.add_argument('--verbose', action='store_true')
+    command.set_defaults(handler=compare)
+
+    command = commands.add_parser('render', parents=[graph, colony], help="Render routes on the campus map to PNG files")
+    command.add_argument('--routes', help="JSON file with a list of routes ({'path', 'weights'} or [path, weights]), default solves one")
+    command.add_argument('--output-dir', default='routes')
+    command.add_argument('--size', type=int, nargs=2, default=[480, 360], metavar=('WIDTH', 'HEIGHT'))
+    command.add_argument('--no-labels', action='store_true')
+    command.add_argument('--workers', type=int)
+    command.set_defaults(handler=render, error=command.error)
+    return parser
+
+
+def main(arguments=None):
+    parser = build_parser()
+    args, unknown = parser.parse_known_args(arguments)
+    if args.command in ('benchmark', 'tune'):
+        args.arguments = unknown
+    elif unknown:
+        parser.error("unrecognized arguments: {}".format(' '.join(unknown)))
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
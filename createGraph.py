@@ -5,7 +5,7 @@
 #
 # Summary:
 # This python file contains code to generate a fully conected graph of a certain size whith randomly initialized wheights for different time intervals.
-# The graph is modeled using the Python library NetworkX.
+# The graph is stored as dense (n x n x T) NumPy tensors, a view modeled with the Python library NetworkX is kept for compatibility.
 # dist_map is based on actual distances between campus buildings (Data from Google Maps).
 # The initial costs are generated based on the distance between two nodes and the random occupancy assigned to an edge at each time slot.
 
@@ -13,7 +13,6 @@
 #                                                      Libraries
 #----------------------------------------------------------------------------------------------------------------------------------------
 
-import networkx as nx
 import numpy as np
 
 # ---------------------------------------------------------------------------------------------------------------------------------------
@@ -62,6 +61,155 @@ coordinates = [[-325,-515], # CIF       [0]
 #                                                CampusGraph Class
 # ---------------------------------------------------------------------------------------------------------------------------------------
 
+"""
+Dense, time-sliced representation of the campus graph.
+Every edge (u, v) stores its occupancy and weight for each time slot in two contiguous (n x n x T) tensors, so the weight of an edge
+at time slot t is simply weights[u, v, t] and the cost of a whole tour is a single fancy-indexed gather instead of n dictionary lookups.
+The tensors are symmetric in their first two axes and the diagonal (self loops) is zero.
+A NetworkX view of the same data is built lazily for compatibility, its edge attributes are views into the tensors.
+
+Arguments:
+- distances {[[int]] or numpy.ndarray} : (n x n) matrix with the distances between the nodes
+- occupancies {numpy.ndarray} : (n x n x T) tensor with the occupancy of each edge at each time slot
+- weights=None {numpy.ndarray} : Precomputed (n x n x T) weight tensor (e.g. in shared memory), computed with weight_function if not given
+"""
+class CampusGraph(object):
+
+    def __init__(self, distances, occupancies, weights=None):
+        self.distances = np.ascontiguousarray(distances, dtype=float)
+        self.occupancies = np.ascontiguousarray(occupancies)
+        if weights is None:
+            weights = weight_function(self.distances[:, :, None], self.occupancies, self.occupancies.shape[2])
+        self.weights = weights
+        self.version = 0 # incremented whenever the weights change, so cached values derived from them can be invalidated
+        self._graph = None
+
+    @property
+    def nr_of_nodes(self):
+        return self.distances.shape[0]
+
+    @property
+    def nr_of_slots(self):
+        return self.weights.shape[2]
+
+    @property
+    def nodes(self):
+        return range(self.nr_of_nodes)
+
+    @property
+    def edges(self):
+        return self.graph.edges
+
+    @property
+    def graph(self):
+        """
+        Returns:
+        - {networkx.classes.graph.Graph} : Fully connected NetworkX graph whose 'weights' and 'occupancies' edge attributes are views into the tensors
+        """
+        if self._graph is None:
+            import networkx as nx # only loaded when the view is used, keeps the import of this module fast
+            G = nx.complete_graph(self.nr_of_nodes)
+            for node1, node2 in G.edges:
+                G.edges[node1, node2]['occupancies'] = self.occupancies[node1, node2]
+                G.edges[node1, node2]['weights'] = self.weights[node1, node2]
+            self._graph = G
+        return self._graph
+
+    def tour_weights(self, path, start_slot=0):
+        """
+        Gathers the weight of every edge of a tour, where the i-th edge of the tour is taken at time slot start_slot + i.
+
+        Arguments:
+        - path {[int]} : Ordered list of nodes, e.g. [1,5,4,3,2,1]
+        - start_slot {int} : Time slot of the first step (departure)
+        Returns:
+        - {numpy.ndarray} : Weight of each edge of the tour at the time slot it is taken
+        """
+        path = np.asarray(path)
+        return self.weights[path[:-1], path[1:], self.time_slots(len(path) - 1, start_slot)]
+
+    def tour_costs(self, tours, start_slots=0):
+        """
+        Arguments:
+        - tours {numpy.ndarray} : (B x L) matrix, each row is an ordered list of nodes
+        - start_slots {int or numpy.ndarray} : Departure time slot of all tours or (B) departure slot of every tour
+        Returns:
+        - {numpy.ndarray} : Total cost of each of the B tours
+        """
+        tours = np.asarray(tours)
+        slots = self.time_slots(tours.shape[1] - 1, np.asarray(start_slots)[..., None])
+        return self.weights[tours[:, :-1], tours[:, 1:], slots].sum(axis=1)
+
+    def time_slots(self, nr_of_steps, start_slot=0):
+        """
+        The i-th step of a tour is taken at time slot start_slot + i, wrapping around when the tour is longer than the number of time slots.
+
+        Arguments:
+        - nr_of_steps {int} : Number of edges of the tour
+        - start_slot {int or numpy.ndarray} : Time slot of the first step, an array gives one row of slots per departure
+        Returns:
+        - {numpy.ndarray} : Time slot of each step
+        """
+        return (start_slot + np.arange(nr_of_steps)) % self.nr_of_slots
+
+    def update_occupancies(self, edges, occupancies):
+        """
+        Updates the occupancy vectors of some edges in place and recomputes only their weights.
+
+        Arguments:
+        - edges {[(int,int)]} : Edges to update, each edge is updated in both directions
+        - occupancies {[[int]]} : New occupancy vector (one value per time slot) for each edge
+        Returns:
+        - {(numpy.ndarray, numpy.ndarray)} : Row and column indices of every updated tensor entry
+        """
+        edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+        occupancies = np.asarray(occupancies).reshape(len(edges), self.nr_of_slots)
+        rows = np.concatenate([edges[:, 0], edges[:, 1]])
+        cols = np.concatenate([edges[:, 1], edges[:, 0]])
+        occupancies = np.concatenate([occupancies, occupancies])
+        self.occupancies[rows, cols] = occupancies
+        self.weights[rows, cols] = weight_function(self.distances[rows, cols][:, None], occupancies, self.nr_of_slots)
+        self.version += 1
+        return rows, cols
+
+    @classmethod
+    def from_networkx(cls, G, distances=None):
+        """
+        Builds a CampusGraph from a NetworkX graph with 'weights' and 'occupancies' edge attributes.
+        If no distances are given they are recovered from the weights of the first time slot.
+
+        Arguments:
+        - G {networkx.classes.graph.Graph} : Fully connected and initialized weighted graph
+        - distances=None {[[int]] or numpy.ndarray} : (n x n) distance matrix
+        Returns:
+        - {CampusGraph} : Dense representation of G
+        """
+        n = len(G.nodes)
+        edges = list(G.edges)
+        T = len(G.edges[edges[0]]['weights']) if edges else n
+        occupancies = np.zeros((n, n, T), dtype=int)
+        for node1, node2 in edges:
+            occupancies[node1, node2] = occupancies[node2, node1] = G.edges[node1, node2]['occupancies']
+        if distances is None:
+            distances = np.zeros((n, n))
+            for node1, node2 in edges:
+                weights = G.edges[node1, node2]['weights']
+                distances[node1, node2] = distances[node2, node1] = weights[0] / (1 + occupancies[node1, node2, 0] ** 2)
+        return cls(distances, occupancies)
+
+"""
+Returns the given graph as a CampusGraph, converting NetworkX graphs if necessary (sparse graphs are returned as they are).
+
+Arguments:
+- G {CampusGraph, SparseCampusGraph or networkx.classes.graph.Graph} : Campus graph
+Returns:
+- {CampusGraph or SparseCampusGraph} : Array representation of G
+"""
+def as_campus_graph(G):
+    if hasattr(G, 'tour_costs'): # CampusGraph or SparseCampusGraph
+        return G
+    return CampusGraph.from_networkx(G)
+
 """
 Takes input parameters to generate a fully connected graph with n nodes of campus buildungs with weighted edges.
 Each edge has n time slots with each a different weight.
@@ -71,7 +219,7 @@ Arguments:
 - nr_of_nodes=15 {int} : The number of fully connected nodes in the final graph (ids of the nodes go from 0 to nr_of_nodes-1), default (and max) value is 15
 - occupancy_range=(0,10) {(int,int)} : This range is used to randomly initialize the occupancy of an edge. Both, the upper and lower bound, are inclusive. 
 Returns:
-- {networkx.classes.graph.Graph} : Fully connected and initialized weighted graph
+- {CampusGraph} : Fully connected and initialized weighted graph (use .graph for the networkx.classes.graph.Graph view)
 """
 def create_campus_graph(nr_of_nodes=15, occupancy_range=(0,10)):
     n = nr_of_nodes
@@ -80,10 +228,77 @@ def create_campus_graph(nr_of_nodes=15, occupancy_range=(0,10)):
     elif nr_of_nodes < 0: # number of nodes has to be positive
         n = 0
 
-    G = nx.complete_graph(n) # creates a fully connected graph of type nx.Graph()
-    initialize_weigths(G, n, occupancy_range) 
+    distances = np.array(dist_map, dtype=float)[:n, :n]
+    occupancies = random_occupancies(n, n, occupancy_range)
 
-    return G
+    return CampusGraph(distances, occupancies)
+
+"""
+Estimates how many meters one unit of the coordinates table corresponds to (least squares fit of dist_map against the straight line distances).
+
+Returns:
+- {float} : Meters per coordinate unit
+"""
+def coordinate_scale():
+    straight = pairwise_distances(coordinates)
+    return float((np.array(dist_map) * straight).sum() / np.square(straight).sum())
+
+"""
+Arguments:
+- points {[[float,float]]} : x and y coordinate of every node, laid out like the coordinates table
+Returns:
+- {numpy.ndarray} : (n x n) matrix of straight line distances between the points
+"""
+def pairwise_distances(points):
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    distances = np.empty((n, n))
+    for start in range(0, n, 1024): # in blocks to keep the temporary differences small for large point sets
+        difference = points[start:start+1024, None, :] - points[None, :, :]
+        distances[start:start+1024] = np.sqrt(np.square(difference).sum(axis=2))
+    return distances
+
+"""
+Generates a synthetic, fully connected campus graph for an arbitrary set of points (e.g. thousands of buildings and intersections).
+The distances are derived from the coordinates the same way the coordinates table relates to dist_map.
+Because the tensors grow with n x n x T, the number of time slots is fixed instead of being equal to the number of nodes
+(a tour longer than the number of time slots wraps around, see CampusGraph.time_slots).
+
+Arguments:
+- points {[[float,float]]} : x and y coordinate of every node, laid out like the coordinates table
+- nr_of_slots=8 {int} : Number of time slots
+- occupancy_range=(0,10) {(int,int)} : This range is used to randomly initialize the occupancy of an edge. Both, the upper and lower bound, are inclusive. 
+- scale=None {float} : Meters per coordinate unit, estimated with coordinate_scale() if not given
+Returns:
+- {CampusGraph} : Fully connected and initialized weighted graph
+"""
+def create_synthetic_campus_graph(points, nr_of_slots=8, occupancy_range=(0,10), scale=None):
+    if scale is None:
+        scale = coordinate_scale()
+    distances = scale * pairwise_distances(points)
+    dtype = np.result_type(np.min_scalar_type(occupancy_range[0]), np.min_scalar_type(occupancy_range[1]))
+    occupancies = random_occupancies(len(distances), nr_of_slots, occupancy_range, dtype)
+
+    return CampusGraph(distances, occupancies)
+
+"""
+Generates a symmetric occupancy tensor with random integer occupancies for every edge and time slot (the diagonal stays zero).
+
+Arguments:
+- n {int} : Number of nodes in the graph
+- nr_of_slots {int} : Number of time slots
+- occupancy_range=(0,10) {(int,int)} : This range is used to randomly initialize the occupancy of an edge. Both, the upper and lower bound, are inclusive. 
+- dtype=int {numpy.dtype} : Integer type of the occupancies, large graphs use the smallest type that fits the range
+Returns:
+- {numpy.ndarray} : (n x n x nr_of_slots) occupancy tensor
+"""
+def random_occupancies(n, nr_of_slots, occupancy_range, dtype=int):
+    occupancies = np.zeros((n, n, nr_of_slots), dtype=dtype)
+    rows, cols = np.triu_indices(n, 1)
+    draws = np.random.randint(occupancy_range[0], occupancy_range[1]+1, size=(len(rows), nr_of_slots), dtype=dtype) # random occupancies
+    occupancies[rows, cols] = draws
+    occupancies[cols, rows] = draws
+    return occupancies
 
 """
 Based on occupancy and distance of an edge, its weight is generated.
@@ -114,11 +329,16 @@ Returns:
 - {[int]} : Weight vector of the edge containing the weight for each time slot
 """
 def weight_function(dist, occupancies, n):
-    weigths = dist * (np.ones(n) + np.square(occupancies)) # dist*(1+occupancy^2)
+    weigths = dist * (np.ones(n) + np.square(occupancies, dtype=float)) # dist*(1+occupancy^2)
     return weigths
 
 # Example for a graph with 5 nodes and initial occupancies between 2 and 5
 # G = create_campus_graph(5,(2,5)) # create graph
 # print(G.nodes)                   # prints the id of each node in the graph
 # print(G.edges)                   # prints every edge of the graph as a list of tuples with start and end node
-# print(G.edges[1,2]['weights'])   # prints the weight vector for the edge between the nodes with the ids 1 and 2
\ No newline at end of file
+# print(G.edges[1,2]['weights'])   # prints the weight vector for the edge between the nodes with the ids 1 and 2
+# print(G.weights[1,2])            # same weight vector, read directly from the (n x n x T) weight tensor
+#
+# Example for a synthetic graph with 2000 random points spread like the campus buildings
+# points = np.random.uniform(-800, 800, size=(2000, 2))
+# G = create_synthetic_campus_graph(points)
\ No newline at end of file
@@ -0,0 +1,99 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Exact solver for the time-slot dependent tour cost defined in createGraph.py, used as ground truth for the ACO and random algorithms.
+#
+# Summary:
+# Held-Karp style dynamic programming over subsets of visited nodes. Because the i-th edge of a tour is taken at time slot i,
+# every subset of size k is extended with the weights of time slot k, so the time dependency costs nothing extra.
+# The subsets are processed layer by layer (by number of visited nodes), only two cost layers are kept in memory at a time,
+# each layer is computed with NumPy for all subsets and end nodes at once. Practical up to about 18-20 nodes.
+
+import numpy as np
+
+from createGraph import as_campus_graph
+
+# Number of nodes above which the exact solver refuses to run (memory and time grow with 2^n * n^2)
+MAX_EXACT_NODES = 20
+
+
+"""
+Finds the cheapest tour that starts and ends at a given node.
+
+Arguments:
+- campus_graph {CampusGraph or networkx.classes.graph.Graph} : Graph to solve
+- start=0 {int} : Start (and end) node of the tour
+Returns:
+- {(float, [int], [float])} : Total cost, tour as ordered nodes and the weight of each edge, same format as AntColony.run
+"""
+def held_karp(campus_graph, start=0):
+    campus_graph = as_campus_graph(campus_graph)
+    n = campus_graph.nr_of_nodes
+    if n > MAX_EXACT_NODES:
+        raise ValueError("The exact solver supports at most {} nodes, got {}".format(MAX_EXACT_NODES, n))
+    if n < 2:
+        return 0.0, [start] * 2 if n else [], []
+
+    weights = campus_graph.weights
+    T = campus_graph.nr_of_slots
+    others = np.array([node for node in range(n) if node != start])
+    m = n - 1
+
+    # group the subsets of the other nodes by size, rank gives the row of a subset inside its layer
+    masks = np.arange(1 << m)
+    sizes = np.zeros(1 << m, dtype=np.int8)
+    for bit in range(m):
+        sizes += (masks >> bit) & 1
+    layers = [masks[sizes == size] for size in range(m + 1)]
+    rank = np.empty(1 << m, dtype=np.int64)
+    for layer in layers:
+        rank[layer] = np.arange(len(layer))
+
+    # cost[row, j]: cheapest path from start through the subset of the row, ending at others[j]
+    cost = np.full((m, m), np.inf)
+    cost[rank[1 << np.arange(m)], np.arange(m)] = weights[start, others, 0]
+    parents = []
+
+    for size in range(2, m + 1):
+        layer = layers[size]
+        step = weights[others[:, None], others[None, :], (size - 1) % T] # step[i, j]: edge others[i] -> others[j] at this time slot
+        new_cost = np.full((len(layer), m), np.inf)
+        parent = np.full((len(layer), m), -1, dtype=np.int8)
+        for j in range(m):
+            rows = np.nonzero((layer >> j) & 1)[0]
+            candidates = cost[rank[layer[rows] ^ (1 << j)]] + step[:, j]
+            best = np.argmin(candidates, axis=1)
+            new_cost[rows, j] = candidates[np.arange(len(rows)), best]
+            parent[rows, j] = best
+        cost = new_cost
+        parents.append(parent)
+
+    totals = cost[0] + weights[others, start, (n - 1) % T]
+    j = int(np.argmin(totals))
+    reversed_path = [others[j]]
+    mask = (1 << m) - 1
+    for parent in reversed(parents):
+        previous = int(parent[rank[mask], j])
+        mask ^= 1 << j
+        j = previous
+        reversed_path.append(others[j])
+
+    path = [start] + [int(node) for node in reversed(reversed_path)] + [start]
+    tour_weights = list(campus_graph.tour_weights(path))
+    return sum(tour_weights), path, tour_weights
+
+"""
+Finds the cheapest tour over all start nodes (the ACO and random algorithms pick their start node at random).
+
+Arguments:
+- campus_graph {CampusGraph or networkx.classes.graph.Graph} : Graph to solve
+Returns:
+- {(float, [int], [float])} : Total cost, tour as ordered nodes and the weight of each edge, same format as AntColony.run
+"""
+def exact_path(campus_graph):
+    campus_graph = as_campus_graph(campus_graph)
+    best = (np.inf, [], [])
+    for start in campus_graph.nodes:
+        current = held_karp(campus_graph, start)
+        if current[0] < best[0]:
+            best = current
+    return best
@@ -0,0 +1,182 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Parallel, resumable experiment engine with an on-disk result cache.
+#
+# Summary:
+# An experiment config is expanded into one task per (algorithm x node count x repetition) cell. Every task gets its own seeds,
+# derived from a hash of its content, so a task gives the same result no matter which worker runs it or which other cells are in the grid.
+# All tasks for the same node count and repetition share the same graph, so the algorithms are compared on equal terms.
+# The tasks run on a process pool and every finished result is written to the cache directory under the hash of its task,
+# so a rerun (or a run that was interrupted) only computes the cells that are missing.
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from aco import AntColony
+from createGraph import create_campus_graph
+from exactSolver import exact_path
+from randomPath import randomPathFindingBatch
+
+DEFAULT_CACHE_DIR = '.experiment_cache'
+# Bump when a change to the algorithms invalidates cached results
+CACHE_VERSION = 2
+# Iterations without improvement after which an ACO run stops
+ACO_PATIENCE = 150
+# Colony settings of the ACO tasks. They are part of every ACO task (and so of its cache key) and applied to the colony,
+# so changing a setting here, in the config or in the defaults of AntColony never reuses results computed with other settings
+ACO_SETTINGS = {'number_ants': 30, 'best_ants': 5, 'number_iterations': 700, 'decay': 0.9, 'alpha': 0.7, 'beta': 0.7,
+                'construction': 'vectorized', 'patience': ACO_PATIENCE}
+
+DEFAULT_CONFIG = {
+    'algorithms': ['random', 'aco', 'exact'],
+    'nodes': list(range(4, 16)),
+    'repetitions': 1,
+    'random_iterations': 100,
+    'seed': 0,
+}
+
+
+def stable_hash(value):
+    """
+    Returns:
+        str: SHA-256 hex digest of the JSON encoding of value (independent of the Python hash seed)
+    """
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def derive_seed(*parts):
+    return int(stable_hash(list(parts))[:8], 16)
+
+
+def expand_tasks(config):
+    """
+    Expands an experiment config into tasks.
+
+    Args:
+        config (dict): 'algorithms', 'nodes', 'repetitions', 'random_iterations' and 'seed', see DEFAULT_CONFIG, and optionally
+            'aco_settings' overriding some of ACO_SETTINGS
+
+    Returns:
+        list: One task (dict) per algorithm, node count and repetition
+    """
+    tasks = []
+    for nodes in config['nodes']:
+        for repetition in range(config.get('repetitions', 1)):
+            for algorithm in config['algorithms']:
+                task = {'algorithm': algorithm, 'nodes': nodes, 'repetition': repetition, 'seed': config.get('seed', 0)}
+                if algorithm == 'random':
+                    task['random_iterations'] = config.get('random_iterations', 100)
+                elif algorithm == 'aco':
+                    task['aco_settings'] = dict(ACO_SETTINGS, **config.get('aco_settings', {}))
+                tasks.append(task)
+    return tasks
+
+
+# Everything that affects the result of a task is in the task itself
+def task_key(task):
+    return stable_hash({'task': task, 'version': CACHE_VERSION})
+
+
+def solve_random(campus_graph, task, seed):
+    return randomPathFindingBatch(campus_graph, task['random_iterations'], seed)[:3]
+
+
+def solve_aco(campus_graph, task, seed):
+    settings = dict(task['aco_settings'])
+    colony = AntColony(None, campus_graph, construction=settings.pop('construction'), seed=seed)
+    for name, value in settings.items():
+        setattr(colony, name, value)
+    return colony.run()
+
+
+def solve_exact(campus_graph, task, seed):
+    return exact_path(campus_graph)
+
+
+ALGORITHMS = {
+    'random': solve_random,
+    'aco': solve_aco,
+    'exact': solve_exact,
+}
+
+
+def run_task(task):
+    """
+    Runs one task, executed in a worker process.
+
+    Returns:
+        dict: 'cost', 'path', 'weights' and 'wall_time' of the task
+    """
+    np.random.seed(derive_seed('graph', task['nodes'], task['repetition'], task['seed']))
+    campus_graph = create_campus_graph(task['nodes'])
+    start = time.perf_counter()
+    cost, path, weights = ALGORITHMS[task['algorithm']](campus_graph, task, derive_seed('algorithm', task))
+    return {'cost': float(cost), 'path': [int(node) for node in path], 'weights': [float(weight) for weight in weights],
+            'wall_time': time.perf_counter() - start}
+
+
+def load_result(cache_dir, key):
+    try:
+        with open(os.path.join(cache_dir, key + '.json')) as file:
+            return json.load(file)['result']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def store_result(cache_dir, key, task, result):
+    # written to a temporary file first, so an interrupted run never leaves a half written result behind
+    path = os.path.join(cache_dir, key + '.json')
+    with open(path + '.tmp', 'w') as file:
+        json.dump({'task': task, 'result': result}, file)
+    os.replace(path + '.tmp', path)
+
+
+def run_experiments(config=None, cache_dir=DEFAULT_CACHE_DIR, max_workers=None, verbose=False):
+    """
+    Runs every task of an experiment config that is not cached yet on a process pool.
+
+    Args:
+        config (dict): Experiment config, DEFAULT_CONFIG if not given
+        cache_dir (str): Directory of the result cache, None to disable caching
+        max_workers (int): Number of worker processes, default is the number of cores (1 runs in this process)
+
+    Returns:
+        list: (task, result) for every task, in the order of expand_tasks
+    """
+    tasks = expand_tasks(config or DEFAULT_CONFIG)
+    keys = [task_key(task) for task in tasks]
+    results = {}
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        for key in keys:
+            cached = load_result(cache_dir, key)
+            if cached is not None:
+                results[key] = cached
+    pending = [(key, task) for key, task in zip(keys, tasks) if key not in results]
+    if verbose:
+        print("{} tasks, {} cached, {} to run".format(len(tasks), len(tasks) - len(pending), len(pending)))
+
+    def finish(key, task, result):
+        results[key] = result
+        if cache_dir is not None:
+            store_result(cache_dir, key, task, result)
+        if verbose:
+            print("{algorithm:>7} nodes={nodes:<3} repetition={repetition}: cost {cost:.0f} in {time:.2f}s".format(
+                cost=result['cost'], time=result['wall_time'], **task))
+
+    if max_workers == 1 or len(pending) <= 1:
+        for key, task in pending:
+            finish(key, task, run_task(task))
+    elif pending:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run_task, task): (key, task) for key, task in pending}
+            for future in as_completed(futures):
+                key, task = futures[future]
+                finish(key, task, future.result())
+
+    return [(task, results[key]) for key, task in zip(keys, tasks)]
@@ -0,0 +1,123 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Graph snapshots: a campus graph (and optionally learned pheromone) saved as memory-mappable arrays.
+#
+# Summary:
+# A snapshot is a directory with one .npy file per array (distances, occupancies, weights and pheromone, or the CSR arrays of a sparse
+# graph) and a meta.json describing it. Loading memory-maps the arrays copy-on-write instead of reading them, so opening even a large
+# graph takes milliseconds and nothing has to be recomputed (the weights are stored). Changes to a loaded graph (update_occupancies)
+# stay in memory, the files are only changed by save_snapshot and save_pheromone, which replace them atomically: save_snapshot
+# writes the new snapshot next to the old one and swaps the two directories by renaming them. It only ever replaces an empty
+# directory or an earlier snapshot, any other existing path is refused.
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from createGraph import CampusGraph
+
+SNAPSHOT_VERSION = 1
+ARRAYS = {
+    'dense': ('distances', 'occupancies', 'weights'),
+    'sparse': ('indptr', 'indices', 'distances', 'occupancies', 'weights'),
+}
+
+
+def write_array(path, array):
+    # written to a temporary file first, so a reader never sees a half written array
+    with open(path + '.tmp', 'wb') as file:
+        np.save(file, np.ascontiguousarray(array))
+    os.replace(path + '.tmp', path)
+
+
+def is_snapshot(path):
+    """
+    Returns:
+        bool: Whether path is a directory with the meta.json of a snapshot of a known kind
+    """
+    try:
+        with open(os.path.join(path, 'meta.json')) as file:
+            return json.load(file).get('kind') in ARRAYS
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def save_snapshot(path, campus_graph, pheromone=None):
+    """
+    Saves a graph as a snapshot directory, replacing an existing snapshot.
+
+    Args:
+        path (str): Snapshot directory, must not exist, be empty or hold a snapshot
+        campus_graph (CampusGraph or SparseCampusGraph): Graph to save
+        pheromone (numpy.array): Pheromone learned on the graph (n x n, or nnz for a sparse graph). Default=None
+
+    Raises:
+        ValueError: If path exists and is neither an empty directory nor a snapshot
+    """
+    path = os.path.abspath(path)
+    existing = os.path.lexists(path)
+    if existing and not (os.path.isdir(path) and not os.path.islink(path) and (not os.listdir(path) or is_snapshot(path))):
+        raise ValueError("{} exists and is not a snapshot, refusing to replace it".format(path))
+    kind = 'sparse' if hasattr(campus_graph, 'indptr') else 'dense'
+    parent, name = os.path.split(path)
+    os.makedirs(parent, exist_ok=True)
+    # a new directory of its own next to the snapshot, so no existing file is ever overwritten
+    temporary = tempfile.mkdtemp(prefix='.' + name + '.', suffix='.tmp', dir=parent)
+    try:
+        for array in ARRAYS[kind]:
+            write_array(os.path.join(temporary, array + '.npy'), getattr(campus_graph, array))
+        if pheromone is not None:
+            write_array(os.path.join(temporary, 'pheromone.npy'), pheromone)
+        with open(os.path.join(temporary, 'meta.json'), 'w') as file:
+            json.dump({'version': SNAPSHOT_VERSION, 'kind': kind, 'nodes': campus_graph.nr_of_nodes,
+                       'slots': campus_graph.nr_of_slots}, file)
+        if existing and os.listdir(path):
+            # the old snapshot is moved aside and only deleted once the new one is in place
+            previous = tempfile.mkdtemp(prefix='.' + name + '.', suffix='.old', dir=parent)
+            os.replace(path, previous)
+            try:
+                os.replace(temporary, path)
+            except OSError:
+                os.replace(previous, path)
+                raise
+            shutil.rmtree(previous)
+        else:
+            os.replace(temporary, path)
+    except BaseException:
+        shutil.rmtree(temporary, ignore_errors=True)
+        raise
+
+
+def save_pheromone(path, pheromone):
+    """
+    Replaces the pheromone of an existing snapshot, e.g. after a warm-started solve.
+    """
+    write_array(os.path.join(path, 'pheromone.npy'), pheromone)
+
+
+def load_snapshot(path):
+    """
+    Memory-maps a snapshot.
+
+    Args:
+        path (str): Snapshot directory written by save_snapshot
+
+    Returns:
+        tuple: The graph (CampusGraph or SparseCampusGraph) and its pheromone (None if the snapshot has none)
+    """
+    with open(os.path.join(path, 'meta.json')) as file:
+        meta = json.load(file)
+    if meta.get('version') != SNAPSHOT_VERSION:
+        raise ValueError("Unsupported snapshot version {} in {}".format(meta.get('version'), path))
+    arrays = [np.load(os.path.join(path, name + '.npy'), mmap_mode='c') for name in ARRAYS[meta['kind']]]
+    if meta['kind'] == 'sparse':
+        from sparseGraph import SparseCampusGraph
+        campus_graph = SparseCampusGraph(*arrays)
+    else:
+        campus_graph = CampusGraph(*arrays)
+    pheromone_path = os.path.join(path, 'pheromone.npy')
+    pheromone = np.load(pheromone_path, mmap_mode='c') if os.path.exists(pheromone_path) else None
+    return campus_graph, pheromone
@@ -0,0 +1,51 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Low-overhead instrumentation for AntColony: cumulative per-phase timers and work counters.
+#
+# Summary:
+# The phases are timed with laps: start() marks the beginning of an iteration and every lap(phase) adds the time since the
+# previous mark to that phase. The counters are incremented where the work is done (AntColony.count): the roulette wheel counts
+# its draws, the constructions the steps their ants took, the evaluations and deposits the edge weights they looked up.
+# With the instrumentation disabled (AntColony.instrumentation is None) that costs one check per call.
+
+import time
+
+PHASES = ('construction', 'evaluation', 'local_search', 'pheromone', 'evaporation')
+COUNTERS = ('iterations', 'ant_steps', 'roulette_draws', 'edge_weight_lookups', 'tours_evaluated')
+
+
+class ColonyInstrumentation(object):
+
+    def __init__(self):
+        self.timers = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.last_mark = None
+
+    def start(self):
+        self.last_mark = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.timers[phase] += now - self.last_mark
+        self.last_mark = now
+
+    def count(self, counter, amount):
+        self.counters[counter] += amount
+
+    def reset(self):
+        self.__init__()
+
+    def report(self):
+        """
+        Returns:
+            dict: Copy of the cumulative 'timers' (seconds per phase) and 'counters'
+        """
+        return {'timers': dict(self.timers), 'counters': dict(self.counters)}
+
+    def metrics(self, prefix='aco_'):
+        """
+        Flat metric names for exporting, e.g. {'aco_construction_seconds': 0.12, 'aco_ant_steps_total': 31500}
+        """
+        metrics = {prefix + phase + '_seconds': seconds for phase, seconds in self.timers.items()}
+        metrics.update({prefix + counter + '_total': value for counter, value in self.counters.items()})
+        return metrics
@@ -0,0 +1,148 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Time-dependent 2-opt and Or-opt local search for the tours of the campus graph.
+#
+# Summary:
+# The i-th edge of a tour is taken at time slot i (see CampusGraph.time_slots), so moving or reversing part of a tour changes the time slot
+# of every edge in between. Instead of re-evaluating the whole tour for every candidate move, prefix sums of the edge costs are precomputed
+# once per tour for every time shift a move can cause. The cost of any 2-opt or Or-opt move is then a constant number of lookups,
+# and all moves of a neighbourhood are evaluated at once with NumPy.
+
+import numpy as np
+
+# Longest segment Or-opt moves to another place in the tour
+OR_OPT_MAX_SEGMENT = 3
+
+
+"""
+Prefix sums of the edge costs of a tour, where row r uses the time slots in slots[r].
+
+Arguments:
+- weights {numpy.ndarray} : (n x n x T) weight tensor
+- path {numpy.ndarray} : Tour as ordered nodes, the last node equals the first
+- slots {numpy.ndarray} : (R x nr_of_edges) time slot of each edge for each of the R rows
+Returns:
+- {numpy.ndarray} : (R x nr_of_edges+1) matrix, entry [r, k] is the cost of the first k edges using the time slots of row r
+"""
+def prefix_costs(weights, path, slots):
+    edge_costs = weights[path[None, :-1], path[None, 1:], slots % weights.shape[2]]
+    prefix = np.zeros((len(slots), edge_costs.shape[1] + 1))
+    np.cumsum(edge_costs, axis=1, out=prefix[:, 1:])
+    return prefix
+
+"""
+Finds the best 2-opt move (reversal of the nodes path[i+1..j]) of a tour. The start node stays in place.
+Relies on symmetric weights (weights[u, v] equals weights[v, u]), the reversed edges are only re-timed.
+
+Arguments:
+- weights {numpy.ndarray} : (n x n x T) weight tensor
+- path {numpy.ndarray} : Tour as ordered nodes, the last node equals the first
+Returns:
+- {(float, int, int)} : Change in cost of the best move and its i and j, (0, -1, -1) if the tour is too short
+"""
+def best_two_opt_move(weights, path):
+    n = len(path) - 1
+    if n < 4:
+        return 0.0, -1, -1
+    T = weights.shape[2]
+    positions = np.arange(n)
+    forward = prefix_costs(weights, path, positions[None, :])[0]
+    # edge k of a segment reversed between i and j moves to position i + j - k, one prefix row per value of i + j
+    reversed_costs = prefix_costs(weights, path, np.arange(2 * n)[:, None] - positions[None, :])
+
+    i, j = np.triu_indices(n, 2)
+    new_costs = (forward[i] + weights[path[i], path[j], i % T]
+                 + reversed_costs[i + j, j] - reversed_costs[i + j, i + 1]
+                 + weights[path[i + 1], path[j + 1], j % T] + forward[n] - forward[j + 1])
+    best = np.argmin(new_costs)
+    return new_costs[best] - forward[n], i[best], j[best]
+
+"""
+Finds the best Or-opt move (a segment of 1 to OR_OPT_MAX_SEGMENT nodes moved, without reversal, to after another node) of a tour.
+The start node stays in place. Edges between the old and new place of the segment shift by the segment length,
+the at most OR_OPT_MAX_SEGMENT-1 edges inside the segment are evaluated directly.
+
+Arguments:
+- weights {numpy.ndarray} : (n x n x T) weight tensor
+- path {numpy.ndarray} : Tour as ordered nodes, the last node equals the first
+Returns:
+- {(float, int, int, int)} : Change in cost of the best move, start a and length L of the segment path[a+1..a+L], node b it is moved behind
+"""
+def best_or_opt_move(weights, path):
+    n = len(path) - 1
+    T = weights.shape[2]
+    positions = np.arange(n)
+    shifts = np.arange(-OR_OPT_MAX_SEGMENT, OR_OPT_MAX_SEGMENT + 1)
+    shifted = prefix_costs(weights, path, shifts[:, None] + positions[None, :])
+    forward = shifted[OR_OPT_MAX_SEGMENT]
+    total = forward[n]
+    best = (0.0, -1, -1, -1)
+
+    for length in range(1, min(OR_OPT_MAX_SEGMENT, n - 2) + 1):
+        a, b = np.meshgrid(np.arange(n - length), np.arange(n), indexing='ij')
+        a, b = a.ravel(), b.ravel()
+        keep = (b < a) | (b > a + length)
+        a, b = a[keep], b[keep]
+        behind = b > a
+
+        # edges inside the segment, placed at their new position
+        segment_start = np.where(behind, b - length + 1, b + 1)
+        inner = np.zeros(len(a))
+        for t in range(1, length):
+            inner += weights[path[a + t], path[a + t + 1], (segment_start + t - 1) % T]
+
+        head = np.where(behind, a, b)
+        tail = np.where(behind, b, a + length)
+        moved_back = shifted[OR_OPT_MAX_SEGMENT - length]
+        moved_forward = shifted[OR_OPT_MAX_SEGMENT + length]
+        new_costs = np.where(
+            behind,
+            weights[path[a], path[a + length + 1], a % T] + moved_back[b] - moved_back[a + length + 1]
+            + weights[path[b], path[a + 1], (b - length) % T] + weights[path[a + length], path[b + 1], b % T],
+            weights[path[b], path[a + 1], b % T] + weights[path[a + length], path[b + 1], (b + length) % T]
+            + moved_forward[a] - moved_forward[b + 1] + weights[path[a], path[a + length + 1], (a + length) % T])
+        new_costs += forward[head] + inner + total - forward[tail + 1]
+
+        index = np.argmin(new_costs)
+        if new_costs[index] - total < best[0]:
+            best = (new_costs[index] - total, a[index], length, b[index])
+    return best
+
+"""
+Applies an Or-opt move found by best_or_opt_move.
+
+Arguments:
+- path {numpy.ndarray} : Tour as ordered nodes, the last node equals the first
+- a, length, b {int} : The segment path[a+1..a+length] is moved behind node path[b]
+Returns:
+- {numpy.ndarray} : The new tour
+"""
+def apply_or_opt_move(path, a, length, b):
+    segment = path[a + 1:a + length + 1]
+    rest = np.concatenate([path[:a + 1], path[a + length + 1:]])
+    insert = b + 1 if b < a else b - length + 1
+    return np.concatenate([rest[:insert], segment, rest[insert:]])
+
+"""
+Improves a tour with the best 2-opt or Or-opt move until no move improves it or max_passes moves have been applied.
+
+Arguments:
+- campus_graph {CampusGraph} : Graph of the tour
+- path {[int]} : Tour as ordered nodes, the last node equals the first
+- max_passes=10 {int} : Maximum number of moves applied
+Returns:
+- {(numpy.ndarray, float)} : The improved tour and its cost
+"""
+def improve_tour(campus_graph, path, max_passes=10):
+    weights = campus_graph.weights
+    path = np.array(path, dtype=np.intp)
+    for _ in range(max_passes):
+        two_opt_delta, i, j = best_two_opt_move(weights, path)
+        or_opt_delta, a, length, b = best_or_opt_move(weights, path)
+        if min(two_opt_delta, or_opt_delta) >= -1e-9:
+            break
+        if two_opt_delta <= or_opt_delta:
+            path[i + 1:j + 1] = path[i + 1:j + 1][::-1]
+        else:
+            path = apply_or_opt_move(path, a, length, b)
+    return path, campus_graph.tour_weights(path).sum()
@@ -0,0 +1,183 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Ingestion of real occupancy time series into a compact, memory-mapped on-disk format.
+#
+# Summary:
+# Sensor exports are long CSV files with one row per measurement: time, node1, node2, occupancy. convert_occupancy_csv streams
+# such a file in chunks (never holding it in memory) and writes a .npy file of shape (slots x pairs): one row per time slot and one
+# column per undirected edge (upper triangle, the occupancies are symmetric), stored in the smallest unsigned integer type that fits.
+# OccupancyHistory memory-maps that file, so opening it costs nothing, and builds a CampusGraph for a window of time slots on demand:
+# only the rows of the window are read from disk and weight_function is only applied to them.
+#
+# Usage:
+# convert_occupancy_csv('sensors.csv', 'occupancies.npy', slot_seconds=900)
+# history = OccupancyHistory('occupancies.npy')
+# campus_graph = history.campus_graph(start_slot=96, nr_of_slots=15)
+
+import csv
+from itertools import islice
+import os
+
+import numpy as np
+
+from createGraph import CampusGraph, dist_map
+
+# Number of CSV rows parsed at a time
+CHUNK_ROWS = 1 << 16
+
+
+def read_chunks(source, chunk_rows=CHUNK_ROWS):
+    """
+    Streams the numeric rows (time, node1, node2, occupancy) of a CSV file, a header line is skipped.
+
+    Yields:
+        numpy.array: (rows x 4) float chunk
+    """
+    with open(source, newline='') as file:
+        reader = csv.reader(file)
+        first = next(reader, None)
+        pending = []
+        if first is not None:
+            try:
+                pending.append([float(value) for value in first[:4]])
+            except ValueError:
+                pass  # header
+        while True:
+            rows = pending + [row[:4] for row in islice(reader, chunk_rows) if row]
+            pending = []
+            if not rows:
+                return
+            yield np.array(rows, dtype=float)
+
+
+def pair_index(node1, node2, nr_of_nodes):
+    """
+    Returns:
+        numpy.array: Column of every undirected edge (node1, node2) in the upper triangle layout, -1 for self loops
+    """
+    low = np.minimum(node1, node2)
+    high = np.maximum(node1, node2)
+    index = low * (2 * nr_of_nodes - low - 1) // 2 + (high - low - 1)
+    return np.where(low == high, -1, index)
+
+
+def convert_occupancy_csv(source, target, nr_of_nodes=None, slot_seconds=None, chunk_rows=CHUNK_ROWS):
+    """
+    Converts an occupancy time series from CSV into the memory-mappable format of OccupancyHistory. The source is read twice
+    (once for its extent, once to fill the file), one chunk at a time. Edges without a measurement in a slot get occupancy 0,
+    later rows overwrite earlier ones.
+
+    Args:
+        source (str): CSV file with the columns time, node1, node2, occupancy
+        target (str): .npy file that is written
+        nr_of_nodes (int): Number of nodes, default is the largest node id + 1
+        slot_seconds (float): Length of a time slot in seconds if the time column holds timestamps in seconds,
+            None if it already holds time slot indices
+
+    Returns:
+        tuple: Shape (slots, pairs) of the written array
+
+    Raises:
+        ValueError: If a node id is negative or not below nr_of_nodes, a time slot index or an occupancy is negative
+    """
+    first_time, last_time, largest_node, largest_occupancy = np.inf, -np.inf, -1, 0
+    smallest_node, smallest_occupancy = 0, 0
+    for chunk in read_chunks(source, chunk_rows):
+        first_time = min(first_time, chunk[:, 0].min())
+        last_time = max(last_time, chunk[:, 0].max())
+        smallest_node = min(smallest_node, int(chunk[:, 1:3].min()))
+        largest_node = max(largest_node, int(chunk[:, 1:3].max()))
+        smallest_occupancy = min(smallest_occupancy, int(chunk[:, 3].min()))
+        largest_occupancy = max(largest_occupancy, int(chunk[:, 3].max()))
+    if largest_node < 0:
+        raise ValueError("No occupancy rows in {}".format(source))
+    if smallest_node < 0:
+        raise ValueError("Negative node id {} in {}".format(smallest_node, source))
+    if nr_of_nodes is not None and largest_node >= nr_of_nodes:
+        raise ValueError("Node id {} in {} is out of range for {} nodes".format(largest_node, source, nr_of_nodes))
+    if slot_seconds is None and first_time < 0:
+        raise ValueError("Negative time slot {} in {}".format(first_time, source))
+    if smallest_occupancy < 0:
+        raise ValueError("Negative occupancy {} in {}".format(smallest_occupancy, source))
+    n = largest_node + 1 if nr_of_nodes is None else nr_of_nodes
+    origin = first_time if slot_seconds is not None else 0
+
+    def slots_of(times):
+        if slot_seconds is None:
+            return times.astype(np.intp)
+        return ((times - origin) // slot_seconds).astype(np.intp)
+
+    nr_of_slots = int(slots_of(np.array([last_time]))[0]) + 1
+    dtype = np.min_scalar_type(largest_occupancy)
+    # written to a temporary file first, so a failed conversion never leaves a half written history behind
+    temporary = target + '.tmp'
+    history = np.lib.format.open_memmap(temporary, mode='w+', dtype=dtype, shape=(nr_of_slots, n * (n - 1) // 2))
+    for chunk in read_chunks(source, chunk_rows):
+        nodes = chunk[:, 1:3].astype(np.intp)
+        columns = pair_index(nodes[:, 0], nodes[:, 1], n)
+        valid = columns >= 0
+        history[slots_of(chunk[valid, 0]), columns[valid]] = chunk[valid, 3]
+    history.flush()
+    shape = history.shape
+    del history
+    os.replace(temporary, target)
+    return shape
+
+
+class OccupancyHistory(object):
+
+    def __init__(self, path, distances=None):
+        """
+        Args:
+            path (str): .npy file written by convert_occupancy_csv, memory-mapped read-only
+            distances (2D numpy.array): Distances between the nodes. Default=dist_map (its first nr_of_nodes nodes)
+        """
+        self.occupancies = np.load(path, mmap_mode='r')
+        pairs = self.occupancies.shape[1]
+        self.nr_of_nodes = int(round((1 + np.sqrt(1 + 8 * pairs)) / 2))
+        if distances is None:
+            distances = np.array(dist_map, dtype=float)[:self.nr_of_nodes, :self.nr_of_nodes]
+        self.distances = np.asarray(distances, dtype=float)
+        if self.distances.shape != (self.nr_of_nodes, self.nr_of_nodes):
+            raise ValueError("History has {} nodes but the distances are {}".format(self.nr_of_nodes, self.distances.shape))
+        self.rows, self.cols = np.triu_indices(self.nr_of_nodes, 1)
+
+    @property
+    def nr_of_slots(self):
+        return self.occupancies.shape[0]
+
+    def window(self, start_slot, nr_of_slots):
+        """
+        Reads the occupancies of a window of time slots, the window wraps around at the end of the history.
+
+        Returns:
+            numpy.array: (n x n x nr_of_slots) symmetric occupancy tensor
+        """
+        if nr_of_slots < 1:
+            raise ValueError("A window needs at least one time slot, not {}".format(nr_of_slots))
+        first = start_slot % self.nr_of_slots
+        if first + nr_of_slots <= self.nr_of_slots:
+            measured = self.occupancies[first:first + nr_of_slots]  # contiguous rows, a single read
+        else:
+            # wraps around the end, possibly several times if the window is longer than the history
+            measured = self.occupancies[(first + np.arange(nr_of_slots)) % self.nr_of_slots]
+        occupancies = np.zeros((self.nr_of_nodes, self.nr_of_nodes, nr_of_slots), dtype=self.occupancies.dtype)
+        occupancies[self.rows, self.cols] = measured.T
+        occupancies[self.cols, self.rows] = measured.T
+        return occupancies
+
+    def campus_graph(self, start_slot, nr_of_slots=None):
+        """
+        Builds the graph of a window of time slots, the weights are only computed for that window.
+
+        Args:
+            start_slot (int): First time slot of the window (the departure)
+            nr_of_slots (int): Length of the window, default is the number of nodes (like create_campus_graph),
+                or the length of the history if it is shorter. A longer window repeats the history
+
+        Returns:
+            CampusGraph: Graph whose time slot 0 is start_slot
+        """
+        if nr_of_slots is None:
+            nr_of_slots = min(self.nr_of_nodes, self.nr_of_slots)
+        return CampusGraph(self.distances, self.window(start_slot, nr_of_slots))
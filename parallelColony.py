@@ -0,0 +1,176 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Island model for the ant colony: K independent colonies run in a process pool and exchange their best tours and pheromone every M iterations.
+#
+# Summary:
+# The weight tensor, the distances and the pheromone matrix of every colony live in shared memory, so the worker processes attach to them
+# instead of receiving a pickled copy. The main process runs the colonies in epochs of M iterations, and migrates between epochs:
+# every colony receives a share of its ring neighbour's pheromone and deposits pheromone on the global best tour.
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+
+import numpy as np
+
+from aco import AntColony
+from createGraph import CampusGraph, as_campus_graph
+
+# Shared memory blocks attached by this process, keyed by block name
+attached_arrays = {}
+
+
+def share_array(array):
+    """
+    Copies an array into a new shared memory block.
+
+    Args:
+        array (numpy.array): Array to share
+
+    Returns:
+        tuple: The SharedMemory block and the (name, shape, dtype) description used by attach_array
+    """
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def attach_array(description):
+    """
+    Returns a NumPy view of a shared memory block created by share_array. The block is attached once per process.
+
+    Args:
+        description (tuple): (name, shape, dtype) as returned by share_array
+    """
+    name, shape, dtype = description
+    if name not in attached_arrays:
+        attached_arrays[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=attached_arrays[name].buf)
+
+
+def run_island_epoch(task):
+    """
+    Runs one colony for a number of iterations on the shared graph and pheromone. Executed in a worker process.
+
+    Args:
+        task (dict): Shared array descriptions, the island index, the number of iterations, the colony settings and the RNG state
+
+    Returns:
+        tuple: The island index, the best tour of the epoch (list of nodes), its cost and the new RNG state
+    """
+    distances = attach_array(task['distances'])
+    weights = attach_array(task['weights'])
+    pheromones = attach_array(task['pheromones'])
+    island = task['island']
+
+    # occupancies are not needed by the colony, the shared weights are used as they are
+    campus_graph = CampusGraph(distances, np.zeros((0, 0, 0), dtype=int), weights=weights)
+    colony = AntColony(distances, campus_graph)
+    for name, value in task['settings'].items():
+        setattr(colony, name, value)
+    colony.rng.bit_generator.state = task['rng_state']
+    colony.pheromone = pheromones[island].copy()
+
+    best = (None, np.inf)
+    for _ in range(task['iterations']):
+        shortest_path = colony.iterate()
+        if shortest_path[1] < best[1]:
+            best = shortest_path
+
+    pheromones[island] = colony.pheromone
+    return island, best[0], best[1], colony.rng.bit_generator.state
+
+
+class ParallelAntColony(object):
+
+    def __init__(self, distances, campus_graph, nr_of_colonies=None, migration_interval=50, seed=None):
+        """
+        Args:
+            distances (2D numpy.array): Square matrix of distances, None to use the distances of the CampusGraph
+            campus_graph (CampusGraph or networkx.Graph): Graph to solve
+            nr_of_colonies (int): Number of independent colonies (K), one per worker process. Default=number of cores
+            migration_interval (int): Number of iterations (M) between two migrations. Default=50
+            seed (int): Seed from which every colony gets its own independent random generator. Default=None
+
+            number_ants, best_ants, number_iterations, decay, alpha and beta are the settings of each colony, same defaults as AntColony.
+            migration_rate (float): Share of the ring neighbour's pheromone a colony takes over at each migration
+        Example:
+            cost, path, weights = ParallelAntColony(None, campus_graph, nr_of_colonies=4).run()
+        """
+        self.campus_graph = as_campus_graph(campus_graph)
+        self.distances = np.asarray(self.campus_graph.distances if distances is None else distances, dtype=float)
+        self.nr_of_colonies = nr_of_colonies or os.cpu_count() or 1
+        self.migration_interval = migration_interval
+        self.seed = seed
+        self.number_ants = 30
+        self.best_ants = 5
+        self.number_iterations = 700
+        self.decay = 0.9
+        self.alpha = 0.7
+        self.beta = 0.7
+        self.migration_rate = 0.1
+
+    def colony_settings(self):
+        return {'number_ants': self.number_ants, 'best_ants': self.best_ants, 'decay': self.decay,
+                'alpha': self.alpha, 'beta': self.beta}
+
+    def run(self):
+        assert self.number_iterations > 0, "Number of iterations must be greater than 0"
+        n = len(self.distances)
+        k = self.nr_of_colonies
+        seeds = np.random.SeedSequence(self.seed).spawn(k)
+        rng_states = [np.random.default_rng(s).bit_generator.state for s in seeds]
+        edge_weight_sums = self.campus_graph.weights.sum(axis=2)
+
+        blocks = []
+        try:
+            shm, distances = share_array(self.distances)
+            blocks.append(shm)
+            shm, weights = share_array(self.campus_graph.weights)
+            blocks.append(shm)
+            shm, pheromones = share_array(np.ones((k, n, n)) / n)
+            blocks.append(shm)
+            shared_pheromones = np.ndarray((k, n, n), dtype=float, buffer=shm.buf)
+
+            all_time_shortest_path = (None, np.inf)
+            done = 0
+            with ProcessPoolExecutor(max_workers=k) as executor:
+                while done < self.number_iterations:
+                    iterations = min(self.migration_interval, self.number_iterations - done)
+                    tasks = [{'distances': distances, 'weights': weights, 'pheromones': pheromones, 'island': island,
+                              'iterations': iterations, 'settings': self.colony_settings(), 'rng_state': rng_states[island]}
+                             for island in range(k)]
+                    for island, path, cost, rng_state in executor.map(run_island_epoch, tasks):
+                        rng_states[island] = rng_state
+                        if cost < all_time_shortest_path[1]:
+                            all_time_shortest_path = (path, cost)
+                    done += iterations
+                    if done < self.number_iterations:
+                        self.migrate(shared_pheromones, all_time_shortest_path[0], edge_weight_sums)
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+        path, cost = all_time_shortest_path
+        weights = list(self.campus_graph.tour_weights(path))
+        return cost, path, weights
+
+    # Ring migration: each colony blends in its neighbour's pheromone and deposits on the global best tour
+    def migrate(self, pheromones, best_path, edge_weight_sums):
+        pheromones[:] = (1 - self.migration_rate) * pheromones + self.migration_rate * np.roll(pheromones, 1, axis=0)
+        best_path = np.asarray(best_path)
+        rows, cols = best_path[:-1], best_path[1:]
+        pheromones[:, rows, cols] += 1.0 / edge_weight_sums[rows, cols]
+
+    # Example usage (the pool needs the __main__ guard on platforms that spawn processes):
+    """ from parallelColony import ParallelAntColony
+    from createGraph import create_campus_graph
+
+    if __name__ == "__main__":
+        campus_graph = create_campus_graph()
+        cost, path, weights = ParallelAntColony(None, campus_graph, nr_of_colonies=4, seed=1).run()
+        print("shorted_path: {}".format(path))
+        print("cost: {}".format(cost)) """
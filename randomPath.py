@@ -3,12 +3,13 @@
 #
 # Create an algorithm to solve a capacity based version of the Traveling Salesman Problem using random selections
 
-import networkx as nx
 import numpy as np
 import random
+from createGraph import as_campus_graph
 
 
-def randomPathFinding(G): # pass in graph after initializing it
+def randomPathFinding(G): # pass in graph after initializing it (CampusGraph or NetworkX graph)
+    G = as_campus_graph(G)
     # copy index of nodes
     allNodes = list(G.nodes)
 
@@ -16,29 +17,19 @@ def randomPathFinding(G): # pass in graph after initializing it
     initialNode = random.choice(allNodes)
     allNodes.remove(initialNode)
 
-    #init lists to return
-    visitedNodes = []
-    weights = []
-
-    thisNode = initialNode
-    step = 0
-
-    visitedNodes.append(thisNode)
+    #init list to return
+    visitedNodes = [initialNode]
     #select a random node to travel from list until empty
     while len(allNodes) > 0:
         nextNode = random.choice(allNodes)
         allNodes.remove(nextNode)
 
         visitedNodes.append(nextNode)
-        weights.append(G.edges[thisNode,nextNode]['weights'][step])
-
-        #iterate to next nodes
-        thisNode = nextNode
-        step += 1
 
     #return back to initial node
     visitedNodes.append(initialNode)
-    weights.append(G.edges[thisNode,initialNode]['weights'][step])
+    #gather the weight of each edge at the time slot it is taken
+    weights = list(G.tour_weights(visitedNodes))
 
     #Example
     # Total path cost was 57, path was Nodes 1->5->4->3->2->1, weights were the 10,8,11,3,25 for those paths.
@@ -46,17 +37,31 @@ def randomPathFinding(G): # pass in graph after initializing it
     return sum(weights), visitedNodes, weights
 
 
+def randomPathFindingBatch(G, batch_size=1000, seed=None, chunk_size=65536): # batched version of randomPathFinding
+    assert batch_size > 0, "Batch size must be greater than 0"
+    G = as_campus_graph(G)
+    n = G.nr_of_nodes
+    rng = np.random.default_rng(seed)
+
+    #cost of every random tour, filled chunk by chunk so memory stays bounded for millions of samples
+    costs = np.empty(batch_size)
+    bestCost = np.inf
+    bestPath = []
+    for start in range(0, batch_size, chunk_size):
+        size = min(chunk_size, batch_size - start)
+        #argsort of a random matrix gives one uniformly random permutation (random start node included) per row
+        tours = np.argsort(rng.random((size, n)), axis=1)
+        #return back to initial node
+        tours = np.concatenate([tours, tours[:, :1]], axis=1)
+        #score all tours with one gather over the weight tensor
+        costs[start:start + size] = G.tour_costs(tours)
+
+        best = np.argmin(costs[start:start + size])
+        if costs[start + best] < bestCost:
+            bestCost = costs[start + best]
+            bestPath = tours[best].tolist()
 
-
-
-
-        
-        
-
-
-
-
-
-
-
-
+    #Example
+    # Best of 1000 tours cost 57, path was Nodes 1->5->4->3->2->1, weights were 10,8,11,3,25, costs holds all 1000 tour costs
+    #57, [1,5,4,3,2,1], [10,8,11,3,25], array([57., 84., ...])
+    return bestCost, bestPath, list(G.tour_weights(bestPath)), costs
@@ -0,0 +1,277 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Long-lived local routing service: solves routes over HTTP on localhost with warm colonies.
+#
+# Summary:
+# An asyncio HTTP server (standard library only) exposes POST /solve and GET /health. For every campus and time window the service
+# keeps the learned pheromone matrix, so each solve is a warm start instead of a cold 700 iteration colony, and the worker processes
+# keep the graphs they built. Concurrent identical queries are coalesced into one solve, the CPU-bound solves run in a process pool
+# so the event loop never blocks, and every request has a deadline (the colony gets a time budget slightly below it).
+#
+# Usage:
+# python3 routingService.py --port 8457
+# curl -X POST localhost:8457/solve -d '{"nodes": 15, "window": 3, "deadline_ms": 200}'
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+
+import numpy as np
+
+from aco import AntColony
+from createGraph import create_campus_graph, dist_map
+
+DEFAULT_DEADLINE_MS = 1000
+# Share of the deadline the colony may use, the rest is left for dispatching and answering
+SOLVE_BUDGET_SHARE = 0.8
+# Iterations of a warm solve (the time budget usually stops it first)
+WARM_ITERATIONS = 200
+# Longest accepted request body in bytes
+MAX_BODY_SIZE = 1 << 20
+
+# Graph builders per campus: (number of nodes, time window) -> CampusGraph. The window seeds the occupancies,
+# so every process builds the same graph for the same key
+CAMPUSES = {
+    'uwaterloo': create_campus_graph,
+}
+# Number of buildings of every campus, the largest graph a query may ask for
+CAMPUS_SIZES = {
+    'uwaterloo': len(dist_map),
+}
+
+# Graphs built by this (worker) process, keyed by (campus, nodes, window)
+graph_cache = {}
+
+
+def campus_graph_for(campus, nodes, window):
+    key = (campus, nodes, window)
+    if key not in graph_cache:
+        state = np.random.get_state()
+        np.random.seed(window)
+        try:
+            graph_cache[key] = CAMPUSES[campus](nodes)
+        finally:
+            np.random.set_state(state)
+    return graph_cache[key]
+
+
+def solve_route(campus, nodes, window, pheromone, best_path, time_budget):
+    """
+    Runs a warm-started colony in a worker process.
+
+    Args:
+        campus (str): Campus name, a key of CAMPUSES
+        nodes (int): Number of buildings
+        window (int): Time window, selects the occupancies
+        pheromone (numpy.array): Pheromone learned by earlier solves of the same key, None for a cold start
+        best_path (list): Best path found by earlier solves of the same key, the colony starts from it (None for a cold start)
+        time_budget (float): Seconds the colony may run
+
+    Returns:
+        tuple: The answer (dict with cost, path, weights, iterations, stop_reason) and the new pheromone matrix
+    """
+    campus_graph = campus_graph_for(campus, nodes, window)
+    colony = AntColony(None, campus_graph)
+    if pheromone is not None:
+        colony.pheromone = pheromone
+    if best_path is not None:
+        colony.incumbent = (best_path, campus_graph.tour_weights(best_path).sum())
+    colony.number_iterations = WARM_ITERATIONS
+    colony.time_budget = time_budget
+    cost, path, weights = colony.run()
+    answer = {'cost': float(cost), 'path': [int(node) for node in path], 'weights': [float(weight) for weight in weights],
+              'iterations': colony.iterations_run, 'stop_reason': colony.stop_reason}
+    return answer, colony.pheromone
+
+
+class RequestError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class RoutingService(object):
+
+    def __init__(self, executor=None, max_workers=None):
+        """
+        Args:
+            executor (concurrent.futures.Executor): Pool the solves run in. Default=ProcessPoolExecutor(max_workers)
+            max_workers (int): Number of worker processes of the default pool
+        """
+        # spawned, not forked: a forked worker would inherit the open client sockets and keep them from closing
+        self.executor = executor or ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        self.pheromones = {}  # (campus, nodes, window) -> warm pheromone matrix
+        self.best_paths = {}  # (campus, nodes, window) -> best path found so far
+        self.in_flight = {}  # query key -> future of the solve that answers it
+        self.server = None
+        self.stats = {'requests': 0, 'solves': 0, 'coalesced': 0, 'timeouts': 0}
+
+    async def start(self, host='127.0.0.1', port=0):
+        """
+        Starts listening, port 0 picks a free port.
+
+        Returns:
+            int: The port the service listens on
+        """
+        # start a worker before accepting requests, so the first request does not pay the process start up
+        await asyncio.get_running_loop().run_in_executor(self.executor, campus_graph_for, 'uwaterloo', 2, 0)
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def solve(self, query):
+        """
+        Answers a solve query, sharing the solve with identical queries that are already running.
+
+        Args:
+            query (dict): 'campus', 'nodes', 'window' and 'deadline_ms'
+
+        Returns:
+            dict: The answer of solve_route
+        """
+        if not isinstance(query, dict):
+            raise RequestError(400, "Body must be a JSON object")
+        campus = query.get('campus', 'uwaterloo')
+        if campus not in CAMPUSES:
+            raise RequestError(404, "Unknown campus: {}".format(campus))
+        try:
+            nodes = int(query.get('nodes', 15))
+            window = int(query.get('window', 0))
+            deadline = float(query.get('deadline_ms', DEFAULT_DEADLINE_MS)) / 1000
+        except (TypeError, ValueError, OverflowError):
+            raise RequestError(400, "nodes, window and deadline_ms must be numbers")
+        if nodes < 2 or not deadline > 0:
+            raise RequestError(400, "nodes must be at least 2 and deadline_ms positive")
+        # the window seeds the occupancies of the campus graph
+        if not 0 <= window < 2 ** 32:
+            raise RequestError(400, "window must be between 0 and {}".format(2 ** 32 - 1))
+        if nodes > CAMPUS_SIZES[campus]:
+            raise RequestError(400, "Campus {} has {} buildings, not {}".format(campus, CAMPUS_SIZES[campus], nodes))
+        key = (campus, nodes, window)
+
+        future = self.in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self.dispatch(key, deadline * SOLVE_BUDGET_SHARE))
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.stats['coalesced'] += 1
+        try:
+            # shielded, so one caller timing out does not cancel the solve the other callers wait for
+            return await asyncio.wait_for(asyncio.shield(future), deadline)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise RequestError(504, "Deadline of {:.0f} ms exceeded".format(deadline * 1000))
+
+    async def dispatch(self, key, time_budget):
+        self.stats['solves'] += 1
+        loop = asyncio.get_running_loop()
+        answer, pheromone = await loop.run_in_executor(
+            self.executor, solve_route, *key, self.pheromones.get(key), self.best_paths.get(key), time_budget)
+        self.pheromones[key] = pheromone
+        self.best_paths[key] = answer['path']
+        return answer
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except RequestError as error:
+                    # the rest of the stream cannot be trusted after a malformed request, so the connection is closed
+                    self.write_response(writer, error.status, {'error': str(error)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload = await self.route(method, target, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self.write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # Returns (method, target, headers, body), None at the end of the stream. Raises RequestError for a malformed request (400)
+    # or a body larger than MAX_BODY_SIZE (413)
+    async def read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise RequestError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise RequestError(400, "Content-Length must be a number")
+        if length < 0:
+            raise RequestError(400, "Content-Length must not be negative")
+        if length > MAX_BODY_SIZE:
+            raise RequestError(413, "Body larger than {} bytes".format(MAX_BODY_SIZE))
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    async def route(self, method, target, body):
+        self.stats['requests'] += 1
+        try:
+            if method == 'GET' and target == '/health':
+                return 200, {'status': 'ok', 'warm_keys': len(self.pheromones), 'stats': self.stats}
+            if method == 'POST' and target == '/solve':
+                try:
+                    query = json.loads(body or b'{}')
+                except ValueError:
+                    raise RequestError(400, "Body must be JSON")
+                return 200, await self.solve(query)
+            raise RequestError(404, "Unknown endpoint: {} {}".format(method, target))
+        except RequestError as error:
+            return error.status, {'error': str(error)}
+        except Exception as error:
+            return 500, {'error': "{}: {}".format(type(error).__name__, error)}
+
+    def write_response(self, writer, status, payload, keep_alive):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large', 500: 'Internal Server Error',
+                   504: 'Gateway Timeout'}
+        body = json.dumps(payload).encode()
+        head = "HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n".format(
+            status, reasons.get(status, ''), len(body), 'keep-alive' if keep_alive else 'close')
+        writer.write(head.encode() + body)
+
+
+async def serve(host, port, max_workers):
+    service = RoutingService(max_workers=max_workers)
+    port = await service.start(host, port)
+    print("Routing service listening on http://{}:{}".format(host, port))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local routing service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8457)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.workers))
@@ -1,19 +1,13 @@
 # Author: Tomas Nyberg (21111387)
 # Co-operative & Adaptive Algorithms (ECE457A) - Project
 
-from randomPath import randomPathFinding
+from randomPath import randomPathFinding, randomPathFindingBatch
 from createGraph import create_campus_graph, dist_map
 from VisualizeGraph import GraphVisualization
 from aco import AntColony
+from campusLayout import NODE_NAMES, POSITIONS
+from experimentRunner import ACO_PATIENCE, DEFAULT_CACHE_DIR, run_experiments
 import numpy as np
-import matplotlib.pyplot as plt
-
-
-CAMPUS_GRAPH = create_campus_graph()
-NODE_NAMES = ["CIF", "V1", "CMH", "NH", "E7", "MC", "PAC",
-              "SLC", "QNC", "LIB", "DC", "E3", "EV3", "STC", "SCH"]
-POSITIONS = [(815, 280), (515, 860), (1000, 790), (1100, 840), (1275, 800), (1230, 940), (1340, 1040),
-             (1300, 1150), (1310, 1440), (1470, 1200), (1525, 740), (1650, 870), (1715, 1285), (1800, 625), (2200, 1075)]
 
 
 def resize_dist_map(dist_map, size):
@@ -59,17 +53,21 @@ def aco_path(campus_graph):
     """
     # Convert dist_map to a numpy matrix
     new_dist_map = resize_dist_map(dist_map, len(campus_graph.nodes))
-    return AntColony(np.array(new_dist_map), campus_graph).run()
+    colony = AntColony(np.array(new_dist_map), campus_graph)
+    # Stop once the best path has not improved for a while instead of always running all iterations
+    colony.patience = ACO_PATIENCE
+    return colony.run()
 
 
 def iterate_algorithm(campus_graph, iterations=100, algorithm='random'):
     """
-    Iterates the random pathfinding algorithm a specified number of times and 
+    Iterates the random (or ACO) pathfinding algorithm a specified number of times and 
     finds the best path over all iterations.
 
     Args:
         campus_graph (NetworkX.Graph): The graph on which to perform the pathfinding.
         iterations (int): The number of iterations to perform. Default is 100.
+        algorithm (str): 'random' draws iterations random tours in one batch, 'aco' keeps the best of iterations colony runs.
 
     Returns:
         tuple: The best path found over all iterations, including its total cost,
@@ -79,16 +77,13 @@ def iterate_algorithm(campus_graph, iterations=100, algorithm='random'):
         AssertionError: If the number of iterations is not greater than 0.
     """
     assert iterations > 0, "Number of iterations must be greater than 0"
-    best = [float('inf'), [], []]
-    for it in range(iterations):
-        current = random_path(campus_graph) if algorithm == 'random' else aco_path(
-            campus_graph)
-        if current[0] < best[0]:
-            best = current
-    return best
+    if algorithm == 'random':
+        # All random tours are drawn and scored in one batch
+        return randomPathFindingBatch(campus_graph, iterations)[:3]
+    return min((aco_path(campus_graph) for _ in range(iterations)), key=lambda result: result[0])
 
 
-def visualize_path(campus_graph, algorithm='random', iterations=100):
+def visualize_path(campus_graph, algorithm='random', iterations=100, output=None):
     """
     Visualizes the best path found using the random pathfinding algorithm over a 
     number of iterations.
@@ -96,6 +91,7 @@ def visualize_path(campus_graph, algorithm='random', iterations=100):
     Args:
         campus_graph (NetworkX.Graph): The graph on which to perform the pathfinding.
         iterations (int): The number of iterations to perform. Default is 100.
+        output (str): Image file the path is rendered to without opening a window. Default is None (interactive).
     """
     g = GraphVisualization()
     total_cost, path, weights = iterate_algorithm(
@@ -103,39 +99,51 @@ def visualize_path(campus_graph, algorithm='random', iterations=100):
     print(f"Total cost: {total_cost}, with the path {path}")
     print(f"Weights for this path: {weights}")
     g.create_network(path, POSITIONS, weights)
-    g.visualize()
-
-
-def compare_algorithms(min_nodes=4, max_nodes=15):
-    random_weights = []
-    aco_weights = []
-    node_counts = range(min_nodes, max_nodes + 1)
-    for nodes in node_counts:
-        campus_graph = create_campus_graph(nodes)
+    g.visualize(output)
 
-        total_cost_random, _, _ = iterate_algorithm(
-            campus_graph, iterations=100)
-        random_weights.append(total_cost_random)
 
-        total_cost_aco, _, _ = aco_path(campus_graph)
-        aco_weights.append(total_cost_aco)
+def compare_algorithms(min_nodes=4, max_nodes=15, max_workers=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Compares the random, ACO and optimal (Held-Karp) total weights for each number of nodes and plots them.
+    The cells run in parallel on all cores and are cached on disk (see experimentRunner), so a rerun only computes missing cells.
 
-    # Plotting
+    Args:
+        min_nodes (int): Smallest number of nodes. Default is 4.
+        max_nodes (int): Largest number of nodes. Default is 15.
+        max_workers (int): Number of worker processes. Default is the number of cores.
+        cache_dir (str): Directory of the result cache, None to always recompute.
+    """
+    node_counts = range(min_nodes, max_nodes + 1)
+    config = {'algorithms': ['random', 'aco', 'exact'], 'nodes': list(node_counts),
+              'repetitions': 1, 'random_iterations': 100, 'seed': 0}
+    costs = {(task['algorithm'], task['nodes']): result['cost']
+             for task, result in run_experiments(config, cache_dir, max_workers, verbose=True)}
+    random_weights = [costs['random', nodes] for nodes in node_counts]
+    aco_weights = [costs['aco', nodes] for nodes in node_counts]
+    # Optimal tour as ground truth for the two algorithms
+    exact_weights = [costs['exact', nodes] for nodes in node_counts]
+
+    # Plotting, matplotlib is only loaded when a plot is made
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 5))
     plt.plot(node_counts, random_weights,
              label='Random Pathfinding', marker='o')
     plt.plot(node_counts, aco_weights, label='ACO Pathfinding', marker='x')
+    plt.plot(node_counts, exact_weights, label='Optimal (Held-Karp)', marker='s')
     plt.xlabel('Number of Nodes')
     plt.ylabel('Total Weight')
-    plt.title('Comparison of Total Weight for Random and ACO Pathfinding Algorithms')
+    plt.title('Comparison of Total Weight for Random, ACO and Optimal Pathfinding')
     plt.legend()
     plt.grid(True)
     plt.show()
 
 
-print("Showing example path of random pathfinding algorithm")
-visualize_path(CAMPUS_GRAPH, algorithm='random', iterations=1)
-print("Showing example path of ACO pathfinding algorithm")
-visualize_path(CAMPUS_GRAPH, algorithm='aco', iterations=1)
-print("Comparing the two algorithms. This might take a while (approx 1-2 min).")
-compare_algorithms()
+if __name__ == "__main__":
+    # built here and not at import, so importing this module stays cheap
+    campus_graph = create_campus_graph()
+    print("Showing example path of random pathfinding algorithm")
+    visualize_path(campus_graph, algorithm='random', iterations=1)
+    print("Showing example path of ACO pathfinding algorithm")
+    visualize_path(campus_graph, algorithm='aco', iterations=1)
+    print("Comparing the algorithms. Runs on all cores, cached results in {} are reused.".format(DEFAULT_CACHE_DIR))
+    compare_algorithms()
@@ -0,0 +1,295 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Ant colony on sparse (non-complete) campus graphs.
+#
+# Summary:
+# SparseAntColony runs the vectorized construction of AntColony on a SparseCampusGraph. Pheromone, visibility and deposits are stored
+# per CSR edge (nnz) instead of per node pair (n x n), and every step an ant only samples among the real neighbours of its current node,
+# so a step costs O(max degree) per ant instead of O(n).
+# Walkway graphs rarely have a Hamiltonian cycle (dead-end paths, intersections that connect two parts of the campus), so a tour is a
+# closed walk that visits every node at least once. An ant whose current node has no unvisited neighbour left walks back along its own
+# path (depth-first) until it reaches a node that has one, and once every node is visited it returns to its start the same way, or
+# directly if there is an edge. A walk therefore has at most 2(n-1) steps. An ant that is back at its start with nodes it cannot reach
+# (disconnected graph) is infeasible: it takes no more steps, its tour costs infinity and it never deposits pheromone.
+# The stopping criteria, incumbents and callbacks work as in AntColony.
+
+import time
+
+import numpy as np
+
+from aco import AntColony
+
+
+class SparseAntColony(AntColony):
+
+    def __init__(self, campus_graph, seed=None):
+        """
+        Args:
+            campus_graph (SparseCampusGraph): Walkway graph in CSR form
+            seed (int): Seed for the random generator. Default=None
+            lookahead (float): Exponent of the preference for neighbours with few unvisited neighbours left (Warnsdorff's rule), which keeps
+                ants from leaving nodes behind they later have to walk back to. 0 turns it off. Default=3
+
+            The parameters of AntColony (number_ants, best_ants, number_iterations, decay, alpha, beta, patience, time_budget, ...)
+            apply as well. The visibility is the reciprocal of the edge weight at the current time slot. Local search and candidate
+            lists need the dense CampusGraph and are not available. solve_queries answers batches of (start node, departure slot) queries.
+        Example:
+            ant_colony = SparseAntColony(create_sparse_campus_graph(points))
+            cost, walk, weights = ant_colony.run()  # None if the graph is disconnected
+        """
+        super().__init__(None, campus_graph, seed=seed)
+        self.pheromone = np.full(self.campus_graph.nr_of_edges, 1.0 / self.campus_graph.nr_of_nodes)
+        self.tour_cache = None
+        self.lookahead = 3.0  # Preference for neighbours with few unvisited neighbours, 0 for off
+
+    def prepare_visibility(self):
+        self.step_visibility = self.generate_reciprocal_matrix(self.weights) ** self.beta
+
+    def prepare_edge_deposits(self):
+        self.edge_deposits = self.generate_reciprocal_matrix(self.weights.sum(axis=1))
+
+    # Updates the occupancies of some edges in place, refreshes only their precomputed values and partially resets their pheromone
+    def update_occupancies(self, edges, occupancies):
+        self.check_graph_version()
+        positions = self.campus_graph.update_occupancies(edges, occupancies)
+        self.graph_version = self.campus_graph.version
+        if self.edge_deposits is not None:
+            self.edge_deposits[positions] = 1.0 / self.weights[positions].sum(axis=1)
+        if self.step_visibility is not None:
+            self.step_visibility[positions] = self.generate_reciprocal_matrix(self.weights[positions]) ** self.beta
+        mean_pheromone = self.pheromone.mean()
+        self.pheromone[positions] = (1 - self.pheromone_reset) * self.pheromone[positions] + self.pheromone_reset * mean_pheromone
+
+    # One iteration: construct all walks, deposit pheromone of the best feasible walks, evaporate.
+    # Returns the shortest walk of the iteration as (nodes, cost), (None, inf) if no ant completed a walk
+    def iterate(self):
+        if self.local_search or self.candidate_list_size is not None:
+            raise ValueError("Local search and candidate lists need the dense CampusGraph")
+        self.check_graph_version()
+        stats = self.instrumentation
+        if stats is not None:
+            stats.start()
+        walks, lengths, edges, feasible = self.construct_walks()
+        if stats is not None:
+            stats.lap('construction')
+        costs = self.walk_costs(edges, feasible)
+        if stats is not None:
+            stats.lap('evaluation')
+        self.deposit_pheromone(edges, costs)
+        best = np.argmin(costs)
+        shortest_path = (walks[best, :lengths[best] + 1].tolist(), costs[best]) if np.isfinite(costs[best]) else (None, np.inf)
+        if stats is not None:
+            stats.lap('pheromone')
+
+        self.pheromone = self.pheromone * self.decay
+        if stats is not None:
+            stats.lap('evaporation')
+            stats.count('iterations', 1)
+        return shortest_path
+
+    # Sum of the weights of the edges of every walk (the i-th step at time slot start_slot + i), infinite for infeasible walks
+    def walk_costs(self, edges, feasible, start_slots=0):
+        taken = edges >= 0
+        # only the walks that visited every node are tours, but the weights of every step are looked up
+        self.count('tours_evaluated', int(feasible.sum()))
+        self.count('edge_weight_lookups', int(taken.sum()))
+        slots = self.campus_graph.time_slots(edges.shape[1], np.asarray(start_slots)[..., None])
+        weights = np.where(taken, self.weights[np.maximum(edges, 0), slots], 0.0)
+        return np.where(feasible, weights.sum(axis=1), np.inf)
+
+    # edges holds the CSR position of every step of every walk (-1 after the end of the walk)
+    def deposit_pheromone(self, edges, costs):
+        if self.edge_deposits is None:
+            self.prepare_edge_deposits()
+        best = np.argsort(costs, kind='stable')[:self.best_ants]
+        best = best[np.isfinite(costs[best]) & (costs[best] != 0)]
+        taken = edges[best].ravel()
+        taken = taken[taken >= 0]
+        self.count('edge_weight_lookups', len(taken))
+        np.add.at(self.pheromone, taken, self.edge_deposits[taken])
+
+    # Builds the closed walks of all ants, all ants take one step per loop (forward to an unvisited neighbour or back along their path).
+    # By default number_ants ants start at random nodes at time slot 0 and follow self.pheromone. For batched queries, starts and
+    # start_slots give the start node and departure slot of every ant, and attractiveness is a (Q x nnz) stack of tau ** alpha of which
+    # ant i follows row colonies[i].
+    # Returns the walks (ants x 2n-1 matrix of nodes, -1 after the end), the number of steps of every walk,
+    # the CSR position of the edge of every step (-1 after the end) and which ants visited every node and returned to their start
+    def construct_walks(self, starts=None, attractiveness=None, colonies=None, start_slots=None):
+        if self.step_visibility is None:
+            self.prepare_visibility()
+        neighbours, positions = self.campus_graph.neighbour_table()
+        n = self.campus_graph.nr_of_nodes
+        if starts is None:
+            starts = self.rng.integers(n, size=self.number_ants)
+        m = len(starts)
+        if start_slots is None:
+            slots = self.campus_graph.time_slots(2 * (n - 1))
+        else:
+            slots = self.campus_graph.time_slots(2 * (n - 1), np.asarray(start_slots)[:, None])
+
+        walks = np.full((m, 2 * n - 1), -1, dtype=np.intp)
+        walks[:, 0] = starts
+        edges = np.full((m, 2 * (n - 1)), -1, dtype=np.intp)
+        lengths = np.zeros(m, dtype=np.intp)
+        feasible = np.zeros(m, dtype=bool)
+        unvisited = np.ones((m, n), dtype=bool)
+        unvisited[np.arange(m), starts] = False
+        remaining = np.full(m, n - 1)  # number of unvisited nodes
+        trail = np.empty((m, n), dtype=np.intp)  # path from the start to the current node without the parts walked back
+        trail[:, 0] = starts
+        depth = np.ones(m, dtype=np.intp)
+        if self.lookahead:
+            # number of unvisited neighbours of every node, per ant
+            free = np.repeat(self.campus_graph.degrees[None, :], m, axis=0)
+            self.leave_node(free, np.arange(m), starts, neighbours)
+        if attractiveness is None:
+            # tau ** alpha is refreshed once per iteration
+            attractiveness = self.pheromone ** self.alpha
+
+        active = np.arange(m)  # ants that are still walking
+        current = starts.copy()
+        feasible[remaining == 0] = True
+        active = active[remaining > 0]
+        step = 0
+        while len(active):
+            previous = current[active]
+            candidates = neighbours[previous]
+            candidate_edges = positions[previous]
+            allowed = (candidates >= 0) & unvisited[active[:, None], candidates]
+            forward = allowed.any(axis=1)
+            move = np.empty(len(active), dtype=np.intp)
+            edge = np.empty(len(active), dtype=np.intp)
+
+            if forward.any():
+                ants = active[forward]
+                slot = slots[step] if slots.ndim == 1 else slots[ants, step][:, None]
+                if colonies is None:
+                    rows = attractiveness[candidate_edges[forward]]
+                else:
+                    rows = attractiveness[colonies[ants][:, None], candidate_edges[forward]]
+                rows = rows * self.step_visibility[candidate_edges[forward], slot] * allowed[forward]
+                if self.lookahead:
+                    rows *= (1.0 + free[ants[:, None], candidates[forward]]) ** -self.lookahead
+                choice = self.roulette_wheel(rows, allowed[forward])
+                move[forward] = candidates[forward, choice]
+                edge[forward] = candidate_edges[forward, choice]
+                unvisited[ants, move[forward]] = False
+                remaining[ants] -= 1
+                trail[ants, depth[ants]] = move[forward]
+                depth[ants] += 1
+                if self.lookahead:
+                    self.leave_node(free, ants, move[forward], neighbours)
+
+            back = ~forward
+            stuck = np.zeros(len(active), dtype=bool)
+            if back.any():
+                ants = active[back]
+                # returning to the start: take the edge to the start if there is one, otherwise walk back along the trail
+                home = self.campus_graph.edge_positions(previous[back], starts[ants])
+                direct = (remaining[ants] == 0) & (home >= 0)
+                stuck[back] = (depth[ants] == 1) & ~direct  # back at the start, the unvisited nodes cannot be reached
+                depth[ants] = np.where(direct | (depth[ants] == 1), depth[ants], depth[ants] - 1)
+                move[back] = np.where(direct, starts[ants], trail[ants, depth[ants] - 1])
+                edge[back] = np.where(direct, home, self.campus_graph.edge_positions(previous[back], move[back]))
+
+            walking = ~stuck
+            ants = active[walking]
+            walks[ants, step + 1] = move[walking]
+            edges[ants, step] = edge[walking]
+            lengths[ants] = step + 1
+            current[ants] = move[walking]
+            finished = walking & (move == starts[active]) & (remaining[active] == 0)
+            feasible[active[finished]] = True
+            active = active[walking & ~finished]
+            step += 1
+
+        self.count('ant_steps', int(lengths.sum()))
+        return walks, lengths, edges, feasible
+
+    # Marks node as visited in the unvisited neighbour counts of the given ants
+    def leave_node(self, free, ants, node, neighbours):
+        around = neighbours[node]
+        valid = around >= 0
+        np.subtract.at(free, (np.broadcast_to(ants[:, None], around.shape)[valid], around[valid]), 1)
+
+    # Average lambda-branching factor over the neighbours of every node
+    def branching_factor(self):
+        degrees = self.campus_graph.degrees
+        offsets = self.campus_graph.indptr[:-1][degrees > 0]
+        low = np.minimum.reduceat(self.pheromone, offsets)
+        high = np.maximum.reduceat(self.pheromone, offsets)
+        threshold = np.repeat(low + self.branching_lambda * (high - low), degrees[degrees > 0])
+        return np.mean(np.add.reduceat((self.pheromone >= threshold).astype(int), offsets))
+
+    # Batched solve of many (start node, departure time slot) queries, as AntColony.solve_queries: every distinct query gets its own
+    # pheromone (nnz, seeded from the colony's) and number_ants ants, and the walks of all queries are built together by construct_walks.
+    # Returns one (cost, walk, weights) per query, in the order of the queries, None for a query whose start cannot reach every node
+    def solve_queries(self, queries, number_iterations=None):
+        if self.local_search or self.candidate_list_size is not None:
+            raise ValueError("Local search and candidate lists need the dense CampusGraph")
+        self.check_graph_version()
+        if self.step_visibility is None:
+            self.prepare_visibility()
+        if self.edge_deposits is None:
+            self.prepare_edge_deposits()
+        queries = np.asarray(queries, dtype=np.intp).reshape(-1, 2)
+        n = self.campus_graph.nr_of_nodes
+        if len(queries) == 0:
+            return []
+        if (queries[:, 0] < 0).any() or (queries[:, 0] >= n).any():
+            raise ValueError("Start nodes must be between 0 and {}".format(n - 1))
+        # identical queries are solved once
+        unique_queries, query_index = np.unique(queries, axis=0, return_inverse=True)
+        query_index = query_index.ravel()
+        nr_of_queries = len(unique_queries)
+
+        colonies = np.repeat(np.arange(nr_of_queries), self.number_ants)
+        starts = unique_queries[colonies, 0]
+        start_slots = unique_queries[colonies, 1]
+        pheromone = np.repeat(self.pheromone[None], nr_of_queries, axis=0)
+        best_costs = np.full(nr_of_queries, np.inf)
+        best_walks = [None] * nr_of_queries
+        first_ants = np.arange(nr_of_queries)[:, None] * self.number_ants
+        depositing = min(self.best_ants, self.number_ants)
+
+        start_time = time.perf_counter()
+        without_improvement = 0
+        self.iterations_run = 0
+        self.stop_reason = 'iterations'
+        for iteration in range(self.number_iterations if number_iterations is None else number_iterations):
+            walks, lengths, edges, feasible = self.construct_walks(starts, pheromone ** self.alpha, colonies, start_slots)
+            costs = self.walk_costs(edges, feasible, start_slots)
+
+            # the best feasible walks of every query deposit on that query's pheromone
+            order = np.argsort(costs.reshape(nr_of_queries, self.number_ants), axis=1, kind='stable')[:, :depositing]
+            best = (order + first_ants).ravel()
+            best = best[np.isfinite(costs[best]) & (costs[best] != 0)]
+            taken = edges[best]
+            valid = taken >= 0
+            owners = np.broadcast_to(colonies[best][:, None], taken.shape)[valid]
+            np.add.at(pheromone, (owners, taken[valid]), self.edge_deposits[taken[valid]])
+            pheromone *= self.decay
+
+            iteration_best = order[:, 0] + first_ants[:, 0]
+            improved = costs[iteration_best] < best_costs
+            for query in np.flatnonzero(improved):
+                ant = iteration_best[query]
+                best_walks[query] = walks[ant, :lengths[ant] + 1].tolist()
+            best_costs[improved] = costs[iteration_best[improved]]
+            self.iterations_run = iteration + 1
+            without_improvement = 0 if improved.any() else without_improvement + 1
+            if self.patience is not None and without_improvement >= self.patience:
+                self.stop_reason = 'patience'
+                break
+            if self.time_budget is not None and time.perf_counter() - start_time >= self.time_budget:
+                self.stop_reason = 'time_budget'
+                break
+
+        results = []
+        for query, index in zip(queries, query_index):
+            walk = best_walks[index]
+            if walk is None:
+                results.append(None)
+            else:
+                results.append((best_costs[index], walk, list(self.campus_graph.tour_weights(walk, query[1]))))
+        return results
@@ -0,0 +1,254 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Sparse (non-complete) campus graphs stored in CSR form
+#
+# Summary:
+# Real walkways only connect a building or intersection with a few neighbours, so storing the complete graph as (n x n x T) tensors
+# wastes quadratic memory and lets tours use edges that do not exist. A SparseCampusGraph stores every directed edge once in
+# compressed sparse row (CSR) order: the neighbours of node u are indices[indptr[u]:indptr[u+1]] (sorted), and the distance,
+# occupancies and weights of that edge live at the same position in the distances (nnz), occupancies (nnz x T) and weights (nnz x T) arrays.
+# Tours over a missing edge are infeasible and cost infinity.
+
+# ---------------------------------------------------------------------------------------------------------------------------------------
+#                                                      Libraries
+#----------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+
+from createGraph import coordinate_scale, weight_function
+
+# ---------------------------------------------------------------------------------------------------------------------------------------
+#                                              SparseCampusGraph Class
+# ---------------------------------------------------------------------------------------------------------------------------------------
+
+"""
+CSR representation of a campus graph whose edges are the walkways between nodes.
+Both directions of an undirected edge are stored, with the same distance and occupancies.
+
+Arguments:
+- indptr {numpy.ndarray} : (n+1) row pointers, the edges leaving node u are the positions indptr[u] to indptr[u+1]-1
+- indices {numpy.ndarray} : (nnz) target node of every edge, sorted within each row
+- distances {numpy.ndarray} : (nnz) distance of every edge
+- occupancies {numpy.ndarray} : (nnz x T) occupancy of every edge at each time slot
+- weights=None {numpy.ndarray} : Precomputed (nnz x T) weights, computed with weight_function if not given
+"""
+class SparseCampusGraph(object):
+
+    def __init__(self, indptr, indices, distances, occupancies, weights=None):
+        self.indptr = np.ascontiguousarray(indptr, dtype=np.int64)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int32)
+        self.distances = np.ascontiguousarray(distances, dtype=float)
+        self.occupancies = np.ascontiguousarray(occupancies)
+        if weights is None:
+            weights = weight_function(self.distances[:, None], self.occupancies, self.occupancies.shape[1])
+        self.weights = weights
+        self.version = 0 # incremented whenever the weights change, so cached values derived from them can be invalidated
+        # sorted key u * n + v of every edge, for edge lookups with a binary search
+        self.edge_keys = np.repeat(np.arange(self.nr_of_nodes, dtype=np.int64), self.degrees) * self.nr_of_nodes + self.indices
+        self._neighbour_table = None
+
+    @property
+    def nr_of_nodes(self):
+        return len(self.indptr) - 1
+
+    @property
+    def nr_of_slots(self):
+        return self.weights.shape[1]
+
+    @property
+    def nr_of_edges(self):
+        return len(self.indices)
+
+    @property
+    def nodes(self):
+        return range(self.nr_of_nodes)
+
+    @property
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def neighbours(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node+1]]
+
+    def neighbour_table(self):
+        """
+        Padded view of the adjacency for vectorized ant steps, built once.
+
+        Returns:
+        - {(numpy.ndarray, numpy.ndarray)} : (n x max degree) neighbour of every node and CSR position of that edge, both -1 where a node has fewer neighbours
+        """
+        if self._neighbour_table is None:
+            degrees = self.degrees
+            width = int(degrees.max()) if self.nr_of_nodes else 0
+            positions = self.indptr[:-1, None] + np.arange(width)
+            valid = np.arange(width) < degrees[:, None]
+            positions = np.where(valid, positions, -1)
+            neighbours = np.where(valid, self.indices[np.maximum(positions, 0)], -1)
+            self._neighbour_table = (neighbours, positions)
+        return self._neighbour_table
+
+    def edge_positions(self, node1, node2):
+        """
+        Arguments:
+        - node1, node2 {numpy.ndarray} : Start and end nodes of edges (any shape)
+        Returns:
+        - {numpy.ndarray} : CSR position of every edge, -1 for edges that do not exist
+        """
+        keys = np.asarray(node1, dtype=np.int64) * self.nr_of_nodes + np.asarray(node2, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.edge_keys, keys), len(self.edge_keys) - 1)
+        return np.where(self.edge_keys[positions] == keys, positions, -1)
+
+    def tour_weights(self, path, start_slot=0):
+        """
+        Gathers the weight of every edge of a tour, where the i-th edge of the tour is taken at time slot start_slot + i.
+
+        Arguments:
+        - path {[int]} : Ordered list of nodes, e.g. [1,5,4,3,2,1]
+        - start_slot {int} : Time slot of the first step (departure)
+        Returns:
+        - {numpy.ndarray} : Weight of each edge of the tour at the time slot it is taken, infinite for edges that do not exist
+        """
+        path = np.asarray(path)
+        positions = self.edge_positions(path[:-1], path[1:])
+        weights = self.weights[positions, self.time_slots(len(path) - 1, start_slot)]
+        return np.where(positions >= 0, weights, np.inf)
+
+    def tour_costs(self, tours, start_slots=0):
+        """
+        Arguments:
+        - tours {numpy.ndarray} : (B x L) matrix, each row is an ordered list of nodes
+        - start_slots {int or numpy.ndarray} : Departure time slot of all tours or (B) departure slot of every tour
+        Returns:
+        - {numpy.ndarray} : Total cost of each of the B tours, infinite for tours over an edge that does not exist
+        """
+        tours = np.asarray(tours)
+        positions = self.edge_positions(tours[:, :-1], tours[:, 1:])
+        slots = self.time_slots(tours.shape[1] - 1, np.asarray(start_slots)[..., None])
+        weights = self.weights[positions, slots]
+        return np.where(positions >= 0, weights, np.inf).sum(axis=1)
+
+    def time_slots(self, nr_of_steps, start_slot=0):
+        """
+        Same convention as CampusGraph.time_slots: the i-th step of a tour is taken at time slot start_slot + i, wrapping around.
+        """
+        return (start_slot + np.arange(nr_of_steps)) % self.nr_of_slots
+
+    def update_occupancies(self, edges, occupancies):
+        """
+        Updates the occupancies (and weights) of some edges in place, in both directions.
+
+        Arguments:
+        - edges {[(int,int)]} : Edges to update, every edge must exist
+        - occupancies {numpy.ndarray} : (len(edges) x T) new occupancies of the edges
+        Returns:
+        - {numpy.ndarray} : CSR positions of the updated edges (both directions)
+        """
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        positions = np.concatenate([self.edge_positions(edges[:, 0], edges[:, 1]), self.edge_positions(edges[:, 1], edges[:, 0])])
+        if (positions < 0).any():
+            raise ValueError("Cannot update the occupancy of an edge that does not exist")
+        occupancies = np.concatenate([occupancies, occupancies])
+        self.occupancies[positions] = occupancies
+        self.weights[positions] = weight_function(self.distances[positions, None], self.occupancies[positions], self.nr_of_slots)
+        self.version += 1
+        return positions
+
+    @classmethod
+    def from_edges(cls, nr_of_nodes, edges, distances, occupancies):
+        """
+        Builds the CSR graph from a list of undirected edges.
+
+        Arguments:
+        - nr_of_nodes {int} : Number of nodes
+        - edges {numpy.ndarray} : (m x 2) undirected edges, duplicates and self loops are dropped
+        - distances {numpy.ndarray} : (m) distance of every edge
+        - occupancies {numpy.ndarray} : (m x T) occupancies of every edge
+        Returns:
+        - {SparseCampusGraph} : Graph with both directions of every edge
+        """
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        occupancies = np.asarray(occupancies)
+        keep = edges[:, 0] != edges[:, 1]
+        low = np.minimum(edges[keep, 0], edges[keep, 1])
+        high = np.maximum(edges[keep, 0], edges[keep, 1])
+        _, first = np.unique(low * nr_of_nodes + high, return_index=True)
+        low, high = low[first], high[first]
+        distances = np.asarray(distances)[keep][first]
+        occupancies = occupancies[keep][first]
+
+        rows = np.concatenate([low, high])
+        cols = np.concatenate([high, low])
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(nr_of_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=nr_of_nodes), out=indptr[1:])
+        return cls(indptr, cols[order], np.concatenate([distances, distances])[order], np.concatenate([occupancies, occupancies])[order])
+
+"""
+Finds the (approximately) nearest nodes of every point. The points are sorted into a grid with about k points per cell and every point
+is only compared with the points of its own and the 8 surrounding cells, so the search takes linear time and memory.
+
+Arguments:
+- points {numpy.ndarray} : (n x 2) coordinates
+- k {int} : Number of nearest nodes per point
+Returns:
+- {(numpy.ndarray, numpy.ndarray)} : (n x k) nearest nodes of every point and their straight line distances
+"""
+def nearest_neighbours(points, k):
+    n = len(points)
+    low = points.min(axis=0)
+    cells_per_axis = max(1, int(np.sqrt(n / max(k, 1))))
+    size = max(float((points.max(axis=0) - low).max()) / cells_per_axis, 1e-12)
+    cell = np.minimum(((points - low) / size).astype(np.int64), cells_per_axis - 1)
+    cell_ids = cell[:, 0] * cells_per_axis + cell[:, 1]
+    order = np.argsort(cell_ids, kind='stable')
+    bounds = np.searchsorted(cell_ids[order], np.arange(cells_per_axis ** 2 + 1))
+
+    nearest = np.empty((n, k), dtype=np.int64)
+    lengths = np.empty((n, k))
+    for x in range(cells_per_axis):
+        for y in range(cells_per_axis):
+            members = order[bounds[x * cells_per_axis + y]:bounds[x * cells_per_axis + y + 1]]
+            if len(members) == 0:
+                continue
+            around = [order[bounds[i * cells_per_axis + j]:bounds[i * cells_per_axis + j + 1]]
+                      for i in range(max(x - 1, 0), min(x + 2, cells_per_axis)) for j in range(max(y - 1, 0), min(y + 2, cells_per_axis))]
+            candidates = np.concatenate(around)
+            if len(candidates) <= k: # sparse region, compare with all points
+                candidates = np.arange(n)
+            distances = np.sqrt(np.square(points[members, None, :] - points[None, candidates, :]).sum(axis=2))
+            distances[members[:, None] == candidates[None, :]] = np.inf
+            closest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            nearest[members] = candidates[closest]
+            lengths[members] = np.take_along_axis(distances, closest, axis=1)
+    return nearest, lengths
+
+"""
+Generates a synthetic walkway graph for an arbitrary set of points: every node is connected with its nr_of_neighbours nearest nodes
+(the connection is kept in both directions, so some nodes get more neighbours).
+
+Arguments:
+- points {[[float,float]]} : x and y coordinate of every node, laid out like the coordinates table
+- nr_of_neighbours=6 {int} : Number of nearest nodes each node is connected with
+- nr_of_slots=8 {int} : Number of time slots
+- occupancy_range=(0,10) {(int,int)} : This range is used to randomly initialize the occupancy of an edge. Both, the upper and lower bound, are inclusive.
+- scale=None {float} : Meters per coordinate unit, estimated with coordinate_scale() if not given
+Returns:
+- {SparseCampusGraph} : Sparse, initialized weighted graph
+"""
+def create_sparse_campus_graph(points, nr_of_neighbours=6, nr_of_slots=8, occupancy_range=(0,10), scale=None):
+    if scale is None:
+        scale = coordinate_scale()
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    k = min(nr_of_neighbours, n - 1)
+    nearest, lengths = nearest_neighbours(points, k)
+    edges = np.stack([np.repeat(np.arange(n), k), nearest.ravel()], axis=1)
+    dtype = np.result_type(np.min_scalar_type(occupancy_range[0]), np.min_scalar_type(occupancy_range[1]))
+    occupancies = np.random.randint(occupancy_range[0], occupancy_range[1]+1, size=(len(edges), nr_of_slots), dtype=dtype)
+    return SparseCampusGraph.from_edges(n, edges, scale * lengths.ravel(), occupancies)
+
+# Example for a walkway graph with 20000 random points, each connected with its 6 nearest neighbours
+# points = np.random.uniform(-800, 800, size=(20000, 2))
+# G = create_sparse_campus_graph(points)
+# print(G.neighbours(0))                    # prints the neighbours of node 0
+# print(G.weights[G.edge_positions(0, G.neighbours(0)[0])]) # prints the weight vector of the first walkway leaving node 0
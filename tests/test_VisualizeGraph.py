@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+import pytest
+
+matplotlib = pytest.importorskip('matplotlib')
+matplotlib.use('Agg')
+
+import matplotlib.image as mpimg  # noqa: E402
+
+from VisualizeGraph import RouteRenderer, render_routes  # noqa: E402
+from campusLayout import POSITIONS  # noqa: E402
+
+ROUTES = [([0, 1, 2, 0], [10, 20, 30]), ([3, 4, 5, 6, 3], None)]
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_render_routes_writes_one_png_per_route(tmp_path, max_workers):
+    files = render_routes(ROUTES, str(tmp_path), POSITIONS, size=(160, 120), max_workers=max_workers)
+    assert files == [os.path.join(str(tmp_path), "route_{:05d}.png".format(i)) for i in range(len(ROUTES))]
+    images = [mpimg.imread(file) for file in files]
+    for image in images:
+        assert image.shape[:2] == (120, 160)
+    assert not np.array_equal(images[0], images[1])
+
+
+def test_renderer_only_redraws_the_overlay():
+    renderer = RouteRenderer(POSITIONS, size=(160, 120))
+    first = renderer.render(*ROUTES[0]).copy()
+    renderer.render(*ROUTES[1])
+    # the previous route does not stay on the cached background
+    assert np.array_equal(renderer.render(*ROUTES[0]), first)
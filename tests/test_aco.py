@@ -0,0 +1,237 @@
+import numpy as np
+import pytest
+
+import aco
+from aco import AntColony
+from createGraph import create_campus_graph, create_synthetic_campus_graph
+from tourCache import TourCostCache
+
+
+@pytest.fixture
+def synthetic_graph():
+    np.random.seed(5)
+    return create_synthetic_campus_graph(np.random.uniform(-800, 800, size=(60, 2)))
+
+
+def brute_force_candidates(weights, k):
+    weights = weights.astype(float)
+    n = len(weights)
+    weights[np.arange(n), np.arange(n)] = np.inf
+    return np.stack([np.argsort(weights[:, :, slot], axis=1, kind='stable')[:, :k] for slot in range(weights.shape[2])])
+
+
+def test_candidate_lists_are_the_cheapest_edges_per_slot(synthetic_graph, monkeypatch):
+    # several blocks, the last one partial
+    monkeypatch.setattr(aco, 'CANDIDATE_BLOCK_SIZE', 16)
+    colony = AntColony(None, synthetic_graph, seed=0)
+    colony.candidate_list_size = 5
+    colony.prepare_candidate_lists()
+    assert colony.candidate_lists.shape == (synthetic_graph.nr_of_slots, 60, 5)
+    assert np.array_equal(colony.candidate_lists, brute_force_candidates(synthetic_graph.weights, 5))
+
+
+def test_candidate_lists_follow_occupancy_updates(synthetic_graph):
+    colony = AntColony(None, synthetic_graph, seed=0)
+    colony.candidate_list_size = 4
+    colony.number_iterations = 2
+    colony.run()
+    slots = synthetic_graph.nr_of_slots
+    colony.update_occupancies([(0, 1), (2, 3)], [[10] * slots, [0] * slots])
+    assert np.array_equal(colony.candidate_lists, brute_force_candidates(synthetic_graph.weights, 4))
+
+
+def test_candidate_tours_visit_every_node(synthetic_graph):
+    colony = AntColony(None, synthetic_graph, seed=0)
+    colony.candidate_list_size = 3
+    colony.number_ants = 8
+    tours = colony.construct_tours()
+    assert (tours[:, 0] == tours[:, -1]).all()
+    assert (np.sort(tours[:, :-1], axis=1) == np.arange(60)).all()
+    assert colony.step_visibility is None
+
+
+def test_vectorized_construction_keeps_no_step_visibility():
+    np.random.seed(0)
+    colony = AntColony(None, create_campus_graph(10), seed=0)
+    colony.number_iterations = 3
+    colony.run()
+    assert colony.first_visibility.shape == (10, 10)
+    assert colony.step_visibility is None
+
+
+class RoundedUpDraws(object):
+    # a generator whose draws all round up to the total of their row
+    def random(self, size):
+        return np.ones(size)
+
+
+def test_roulette_wheel_never_draws_a_zero_column():
+    np.random.seed(0)
+    colony = AntColony(None, create_campus_graph(4), seed=0)
+    colony.rng = RoundedUpDraws()
+    rows = np.array([[1.0, 2.0, 0.0, 0.0], [0.0, 0.0, 0.0, 3.0], [0.0, 0.0, 0.0, 0.0]])
+    allowed = np.array([[True, True, False, False], [False, False, False, True], [False, True, True, False]])
+    assert colony.roulette_wheel(rows, allowed).tolist() == [1, 3, 2]
+
+
+def test_roulette_wheel_draws_proportionally():
+    np.random.seed(0)
+    colony = AntColony(None, create_campus_graph(4), seed=0)
+    weights = np.array([0.0, 1.0, 0.0, 3.0, 6.0])
+    rows = np.repeat(weights[None], 20000, axis=0)
+    moves = colony.roulette_wheel(rows, rows > 0)
+    frequencies = np.bincount(moves, minlength=5) / len(moves)
+    assert frequencies[[0, 2]].sum() == 0
+    assert np.allclose(frequencies, weights / weights.sum(), atol=0.015)
+
+
+@pytest.mark.parametrize('nodes', [4, 9, 15])
+@pytest.mark.parametrize('beta', [0.7, 40.0])
+def test_vectorized_tours_are_permutations(nodes, beta):
+    np.random.seed(nodes)
+    campus_graph = create_campus_graph(nodes)
+    for seed in range(5):
+        colony = AntColony(None, campus_graph, seed=seed)
+        # a large beta underflows most of the visibility to zero
+        colony.beta = beta
+        colony.number_ants = 25
+        tours = colony.construct_tours()
+        assert tours.shape == (25, nodes + 1)
+        assert (tours[:, 0] == tours[:, -1]).all()
+        assert (np.sort(tours[:, :-1], axis=1) == np.arange(nodes)).all()
+
+
+@pytest.mark.parametrize('setting, value', [('candidate_list_size', 3), ('local_search', True)])
+def test_solve_queries_rejects_unsupported_settings(synthetic_graph, setting, value):
+    colony = AntColony(None, synthetic_graph, seed=0)
+    setattr(colony, setting, value)
+    with pytest.raises(ValueError):
+        colony.solve_queries([(0, 0)])
+
+
+@pytest.fixture
+def small_colony():
+    np.random.seed(3)
+    colony = AntColony(None, create_campus_graph(8), seed=0)
+    colony.number_ants = 6
+    colony.number_iterations = 400
+    return colony
+
+
+def test_run_stops_after_number_iterations(small_colony):
+    small_colony.number_iterations = 7
+    small_colony.run()
+    assert small_colony.stop_reason == 'iterations'
+    assert small_colony.iterations_run == 7
+
+
+def test_patience_stops_a_run_without_improvement(small_colony):
+    small_colony.patience = 5
+    improved = []
+    for cost, path, weights in small_colony.solutions():
+        improved.append(small_colony.iterations_run)
+    assert small_colony.stop_reason == 'patience'
+    assert small_colony.iterations_run == improved[-1] + 5
+
+
+def test_time_budget_stops_a_run(small_colony):
+    small_colony.time_budget = 0.0
+    small_colony.run()
+    assert small_colony.stop_reason == 'time_budget'
+    assert small_colony.iterations_run == 1
+
+
+def test_convergence_stops_a_run(small_colony):
+    # every branching factor is at most the number of nodes
+    small_colony.convergence_branching = 8
+    small_colony.run()
+    assert small_colony.stop_reason == 'convergence'
+    assert small_colony.iterations_run == 1
+
+
+def test_callback_stops_a_run(small_colony):
+    calls = []
+
+    def callback(iteration, best_cost, timing):
+        calls.append((iteration, best_cost))
+        assert timing['iteration'] >= 0 and timing['elapsed'] >= timing['iteration']
+        return iteration == 4
+
+    small_colony.iteration_callback = callback
+    cost = small_colony.run()[0]
+    assert small_colony.stop_reason == 'callback'
+    assert small_colony.iterations_run == 5
+    assert [iteration for iteration, _ in calls] == list(range(5))
+    assert calls[-1][1] == cost
+
+
+def test_solutions_yield_every_improvement(small_colony):
+    small_colony.number_iterations = 30
+    yielded = list(small_colony.solutions())
+    costs = [cost for cost, path, weights in yielded]
+    assert costs == sorted(costs, reverse=True) and len(set(costs)) == len(costs)
+    for cost, path, weights in yielded:
+        assert cost == pytest.approx(sum(weights))
+
+    np.random.seed(3)
+    colony = AntColony(None, create_campus_graph(8), seed=0)
+    colony.number_ants = 6
+    colony.number_iterations = 30
+    cost, path, weights = colony.run()
+    assert cost == costs[-1]
+    assert path == yielded[-1][1]
+
+
+def test_update_occupancies_resets_only_the_updated_edges(small_colony):
+    small_colony.number_iterations = 20
+    small_colony.run()
+    pheromone = small_colony.pheromone.copy()
+    small_colony.pheromone_reset = 0.25
+    small_colony.update_occupancies([(1, 4)], [[50] * small_colony.campus_graph.nr_of_slots])
+
+    expected = pheromone.copy()
+    expected[[1, 4], [4, 1]] = 0.75 * pheromone[[1, 4], [4, 1]] + 0.25 * pheromone.mean()
+    assert np.allclose(small_colony.pheromone, expected)
+    assert np.allclose(small_colony.edge_deposits[[1, 4], [4, 1]], 1.0 / small_colony.weights[[1, 4], [4, 1]].sum(axis=1))
+
+
+def test_reoptimize_starts_from_the_recosted_best_path(small_colony):
+    small_colony.number_iterations = 20
+    old_cost, path, weights = small_colony.run()
+    edges = list(zip(path[:-1], path[1:]))
+    slots = small_colony.campus_graph.nr_of_slots
+
+    # without iterations the warm run returns the incumbent, costed on the new occupancies
+    cost, new_path, new_weights = small_colony.reoptimize(edges, np.full((len(edges), slots), 100), number_iterations=0)
+    assert new_path == path
+    assert cost == pytest.approx(small_colony.campus_graph.tour_weights(path).sum())
+    assert cost > old_cost
+    assert small_colony.number_iterations == 20
+
+    small_colony.warm_iterations = 10
+    cost = small_colony.reoptimize(edges[:1], np.zeros((1, slots)))[0]
+    assert small_colony.iterations_run == 10
+    assert cost <= small_colony.campus_graph.tour_weights(path).sum()
+
+
+def test_tour_cache_evicts_the_least_recently_used_tour():
+    cache = TourCostCache(max_size=2)
+    first, second, third = (TourCostCache.encode(path) for path in ([0, 1, 2, 0], [0, 2, 1, 0], [1, 0, 2, 1]))
+    cache.put(first, 10.0)
+    cache.put(second, 20.0)
+    assert cache.get(first) == 10.0
+    cache.put(third, 30.0)
+    assert cache.get(second) is None
+    assert cache.get(first) == 10.0 and cache.get(third) == 30.0
+    assert cache.stats() == {'size': 2, 'hits': 3, 'misses': 1, 'evictions': 1, 'hit_rate': 0.75}
+
+
+def test_tour_cache_is_cleared_when_occupancies_change(small_colony):
+    small_colony.construction = 'per_ant'
+    small_colony.number_iterations = 5
+    np.random.seed(0)
+    cost, path, weights = small_colony.run()
+    assert len(small_colony.tour_cache) > 0
+    assert small_colony.tour_cache.get(TourCostCache.encode(path)) == pytest.approx(cost)
+    small_colony.update_occupancies([(path[0], path[1])], [[80] * small_colony.campus_graph.nr_of_slots])
+    assert len(small_colony.tour_cache) == 0
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from acoVariants import ENGINES
+from createGraph import create_campus_graph
+
+ENGINE_NAMES = ['max_min', 'colony_system']
+
+
+@pytest.fixture
+def campus_graph():
+    np.random.seed(4)
+    return create_campus_graph(10)
+
+
+def is_tour(tour, start, n):
+    return tour[0] == tour[-1] == start and sorted(tour[:-1]) == list(range(n))
+
+
+@pytest.mark.parametrize('name', ENGINE_NAMES)
+def test_run_keeps_no_visibility_tensor(campus_graph, name):
+    colony = ENGINES[name](None, campus_graph, seed=0)
+    colony.number_iterations = 20
+    cost, path, weights = colony.run()
+    assert is_tour(path, path[0], 10)
+    assert cost == pytest.approx(sum(weights))
+    assert colony.step_visibility is None
+
+
+@pytest.mark.parametrize('name', ENGINE_NAMES)
+def test_solve_queries_walks_from_the_departure_slot(campus_graph, name):
+    colony = ENGINES[name](None, campus_graph, seed=0)
+    colony.number_iterations = 10
+    queries = [(0, 0), (4, 3), (0, 0)]
+    results = colony.solve_queries(queries)
+    for (start, slot), (cost, path, weights) in zip(queries, results):
+        assert is_tour(path, start, 10)
+        assert weights == list(campus_graph.tour_weights(path, slot))
+        assert cost == pytest.approx(sum(weights))
+    assert results[0][1] == results[2][1]
+
+
+def test_walk_tours_uses_the_slot_of_every_ant(campus_graph):
+    colony = ENGINES['max_min'](None, campus_graph, seed=0)
+    n = campus_graph.nr_of_nodes
+    seen = []
+    visibility = colony.visibility
+    colony.visibility = lambda previous, slots: seen.append(np.copy(slots)) or visibility(previous, slots)
+    colony.walk_tours(np.zeros(2, dtype=np.intp), np.ones((n, n)), start_slots=np.array([2, 9]))
+    assert [slots.tolist() for slots in seen[:2]] == [[2, 9], [3, 0]]
+    assert len(seen) == n - 1
+
+
+@pytest.mark.parametrize('name', ENGINE_NAMES)
+def test_reoptimize_recosts_the_best_tour(campus_graph, name):
+    colony = ENGINES[name](None, campus_graph, seed=0)
+    colony.number_iterations = 30
+    colony.warm_iterations = 5
+    colony.run()
+    old_cost = colony.best_cost
+    tour = colony.best_tour.tolist()
+    # the best tour becomes very expensive
+    edges = list(zip(tour[:-1], tour[1:]))
+    colony.reoptimize(edges, np.full((len(edges), campus_graph.nr_of_slots), 200))
+    assert colony.best_cost == pytest.approx(campus_graph.tour_weights(colony.best_tour.tolist()).sum())
+    assert colony.best_cost < old_cost * 10
+    if name == 'max_min':
+        assert colony.tau_max == pytest.approx(colony.decay / ((1 - colony.decay) * colony.best_cost))
+        assert colony.pheromone.max() <= colony.tau_max
+    else:
+        assert colony.trail_start == pytest.approx(1.0 / (10 * colony.nearest_neighbour_cost()))
+
+
+@pytest.mark.parametrize('name', ENGINE_NAMES)
+def test_graph_changed_behind_the_colony_recosts_the_best_tour(campus_graph, name):
+    colony = ENGINES[name](None, campus_graph, seed=0)
+    colony.number_iterations = 10
+    colony.run()
+    tour = colony.best_tour.tolist()
+    campus_graph.update_occupancies([(tour[0], tour[1])], [[300] * campus_graph.nr_of_slots])
+    colony.check_graph_version()
+    assert colony.best_cost == pytest.approx(campus_graph.tour_weights(tour).sum())
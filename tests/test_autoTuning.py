@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import autoTuning
+from aco import AntColony
+from autoTuning import DEFAULT_SETTINGS, MIN_TUNED_ITERATIONS, UNSOLVED_PENALTY, eliminate, race, sample_candidates, save_profile, score_runs, tune
+from createGraph import create_campus_graph
+
+
+def test_score_runs_penalises_unsolved_runs():
+    runs = [{'reached': True, 'seconds': 1.0, 'excess': 0.9},
+            {'reached': True, 'seconds': 4.0, 'excess': 1.0},
+            {'reached': False, 'seconds': 2.0, 'excess': 1.5}]
+    score_runs(runs)
+    assert [run['score'] for run in runs] == [1.0, 4.0, pytest.approx(UNSOLVED_PENALTY * 4.0 * 1.5)]
+
+
+def test_eliminate_drops_only_significantly_slower_candidates():
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 0.05, size=(4, 8))
+    log_scores = np.array([[0.0] * 8, [2.0] * 8, [0.0] * 8, [5.0] * 8]) + noise
+    alive = np.array([True, True, True, False])
+    # a dropped candidate's scores are not raced any more
+    log_scores[3] = 0.0
+    survivors = eliminate(log_scores, alive)
+    assert survivors.tolist() == [True, False, True, False]
+
+
+def test_eliminate_keeps_the_best_candidate():
+    log_scores = np.array([[1.0, 1.0, 1.0], [1.0, 1.0, 1.0]])
+    assert eliminate(log_scores, np.array([True, True])).tolist() == [True, True]
+
+
+def test_race_profile_entry():
+    candidates = sample_candidates(3, seed=1)
+    assert candidates[0] == DEFAULT_SETTINGS
+    # every run reaches the target in its first iteration
+    entry = race(5, candidates, [np.inf] * 3, 2, 100, 0, None)
+    assert entry['settings'] in [dict(candidate, number_iterations=MIN_TUNED_ITERATIONS) for candidate in candidates]
+    assert entry['reached'] == 1.0
+    assert 2 <= entry['instances'] <= 3
+    assert entry['evaluations'] >= 2 * len(candidates)
+
+
+def test_race_number_iterations_stays_within_the_budget():
+    entry = race(5, sample_candidates(2), [np.inf] * 2, 2, 10, 0, None)
+    assert entry['settings']['number_iterations'] == 10
+
+
+def test_profile_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(autoTuning, 'training_graphs', {})
+    profile = tune([5, 7], nr_of_candidates=2, nr_of_instances=2, first_instances=2, max_iterations=20, max_workers=1)
+    path = str(tmp_path / 'profile.json')
+    save_profile(path, profile)
+
+    np.random.seed(0)
+    colony = AntColony(None, create_campus_graph(7), seed=0)
+    assert colony.load_profile(path) == 7
+    for name, value in profile['sizes']['7']['settings'].items():
+        assert getattr(colony, name) == value
+    assert colony.first_visibility is None
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from aco import AntColony
+from acoVariants import ENGINES
+from createGraph import create_campus_graph
+from sparseColony import SparseAntColony
+from sparseGraph import create_sparse_campus_graph
+
+
+def dense_graph():
+    np.random.seed(1)
+    return create_campus_graph(8)
+
+
+def sparse_graph():
+    np.random.seed(1)
+    return create_sparse_campus_graph(np.random.rand(20, 2) * 1000, nr_of_neighbours=4, nr_of_slots=4)
+
+
+COLONIES = {
+    'vectorized': lambda: AntColony(None, dense_graph(), seed=7),
+    'per_ant': lambda: AntColony(None, dense_graph(), construction='per_ant', seed=7),
+    'sparse': lambda: SparseAntColony(sparse_graph(), seed=7),
+    'max_min': lambda: ENGINES['max_min'](None, dense_graph(), seed=7),
+    'colony_system': lambda: ENGINES['colony_system'](None, dense_graph(), seed=7),
+}
+
+
+def make_colony(name):
+    colony = COLONIES[name]()
+    colony.number_ants = 6
+    colony.number_iterations = 20
+    # the per-ant construction draws from numpy's global generator
+    np.random.seed(11)
+    return colony
+
+
+def kill_at(iteration):
+    def callback(current, best_cost, timing):
+        if current == iteration:
+            raise KeyboardInterrupt
+    return callback
+
+
+@pytest.mark.parametrize('name', sorted(COLONIES))
+def test_resume_is_bit_exact(tmp_path, name):
+    uninterrupted = make_colony(name)
+    cost, path, weights = uninterrupted.run()
+
+    path_file = str(tmp_path / 'run.npz')
+    killed = make_colony(name)
+    killed.checkpoint_path = path_file
+    killed.checkpoint_interval = 3
+    killed.iteration_callback = kill_at(10)
+    with pytest.raises(KeyboardInterrupt):
+        killed.run()
+
+    # a fresh process: new colony, the global generator in some other state
+    resumed = COLONIES[name]()
+    resumed.number_ants = 6
+    resumed.number_iterations = 20
+    np.random.seed(99)
+    resumed_cost, resumed_path, resumed_weights = resumed.resume(path_file)
+
+    assert resumed_cost == cost
+    assert resumed_path == path
+    assert list(resumed_weights) == list(weights)
+    assert np.array_equal(resumed.pheromone, uninterrupted.pheromone)
+    assert resumed.iterations_run == uninterrupted.iterations_run == 20
+
+
+def test_resume_rejects_another_graph(tmp_path):
+    colony = make_colony('vectorized')
+    colony.checkpoint_path = str(tmp_path / 'run.npz')
+    colony.run()
+    np.random.seed(2)
+    other = AntColony(None, create_campus_graph(8), seed=7)
+    with pytest.raises(ValueError):
+        other.resume(colony.checkpoint_path)
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import cli
+from cli import main
+from graphSnapshot import save_snapshot
+from sparseGraph import SparseCampusGraph, create_sparse_campus_graph
+
+
+@pytest.fixture
+def sparse_snapshot(tmp_path):
+    np.random.seed(0)
+    path = str(tmp_path / 'sparse')
+    save_snapshot(path, create_sparse_campus_graph(np.random.rand(20, 2) * 1000, nr_of_neighbours=4, nr_of_slots=4))
+    return path
+
+
+@pytest.mark.parametrize('arguments', [['--solver', 'exact'], ['--solver', 'random'], ['--engine', 'max_min'],
+                                       ['--start', '20'], ['--solver', 'random', '--start', '0']])
+def test_solve_rejects_unsupported_options_on_sparse_snapshots(sparse_snapshot, arguments, capsys):
+    with pytest.raises(SystemExit) as error:
+        main(['solve', '--snapshot', sparse_snapshot] + arguments)
+    assert error.value.code == 2
+    assert 'error:' in capsys.readouterr().err
+
+
+def test_solve_start_on_sparse_snapshot(sparse_snapshot, capsys):
+    assert main(['solve', '--snapshot', sparse_snapshot, '--start', '3', '--slot', '1', '--iterations', '3', '--json']) == 0
+    path = capsys.readouterr().out
+    assert '"path": [3' in path
+
+
+def test_solve_disconnected_graph_has_no_route(tmp_path, capsys):
+    path = str(tmp_path / 'disconnected')
+    save_snapshot(path, SparseCampusGraph.from_edges(4, [(0, 1), (2, 3)], np.full(2, 10), np.ones((2, 4))))
+    assert main(['solve', '--snapshot', path, '--iterations', '2']) == 1
+    assert 'not connected' in capsys.readouterr().err
+
+
+def test_campus_layout_does_not_build_the_graph():
+    code = "import sys, campusLayout; assert len(campusLayout.POSITIONS) == 15; assert 'createGraph' not in sys.modules"
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(cli.__file__)))
+
+
+def test_solve_resume_needs_checkpoint(capsys):
+    with pytest.raises(SystemExit) as error:
+        main(['solve', '--nodes', '5', '--resume'])
+    assert error.value.code == 2
+    assert '--resume needs --checkpoint' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('arguments', [['--checkpoint', 'run.npz'], ['--checkpoint', 'run.npz', '--resume'], ['--save-pheromone']])
+def test_solve_start_rejects_run_options(arguments, capsys):
+    with pytest.raises(SystemExit) as error:
+        main(['solve', '--nodes', '5', '--start', '0'] + arguments)
+    assert error.value.code == 2
+    assert 'cannot be used with --start' in capsys.readouterr().err
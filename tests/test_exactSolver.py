@@ -0,0 +1,41 @@
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from createGraph import create_campus_graph, create_synthetic_campus_graph
+from exactSolver import MAX_EXACT_NODES, exact_path, held_karp
+
+
+def brute_force(campus_graph, start):
+    others = [node for node in range(campus_graph.nr_of_nodes) if node != start]
+    tours = np.array([[start] + list(order) + [start] for order in permutations(others)])
+    return campus_graph.tour_costs(tours).min()
+
+
+def graphs():
+    for nodes in range(2, 9):
+        np.random.seed(nodes)
+        yield create_campus_graph(nodes)
+        # fewer time slots than nodes
+        yield create_synthetic_campus_graph(np.random.uniform(-800, 800, size=(nodes, 2)), nr_of_slots=3)
+
+
+@pytest.mark.parametrize('campus_graph', list(graphs()), ids=lambda graph: "{}x{}".format(graph.nr_of_nodes, graph.nr_of_slots))
+def test_held_karp_matches_brute_force(campus_graph):
+    best = np.inf
+    for start in range(campus_graph.nr_of_nodes):
+        cost, path, weights = held_karp(campus_graph, start)
+        assert cost == pytest.approx(brute_force(campus_graph, start))
+        assert path[0] == path[-1] == start
+        assert sorted(path[:-1]) == list(range(campus_graph.nr_of_nodes))
+        assert weights == list(campus_graph.tour_weights(path))
+        best = min(best, cost)
+    assert exact_path(campus_graph)[0] == pytest.approx(best)
+
+
+def test_held_karp_rejects_large_graphs():
+    np.random.seed(0)
+    graph = create_synthetic_campus_graph(np.random.uniform(-800, 800, size=(MAX_EXACT_NODES + 1, 2)))
+    with pytest.raises(ValueError):
+        held_karp(graph)
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import experimentRunner
+from experimentRunner import expand_tasks, run_experiments, task_key
+
+CONFIG = {'algorithms': ['random', 'aco', 'exact'], 'nodes': [4, 5], 'repetitions': 1, 'random_iterations': 10, 'seed': 0}
+
+
+def keys(config):
+    return {(task['algorithm'], task['nodes']): task_key(task) for task in expand_tasks(config)}
+
+
+def test_cache_key_covers_the_colony_settings(monkeypatch):
+    default = keys(CONFIG)
+    tuned = keys(dict(CONFIG, aco_settings={'decay': 0.8}))
+    monkeypatch.setitem(experimentRunner.ACO_SETTINGS, 'patience', 10)
+    patient = keys(CONFIG)
+    for nodes in CONFIG['nodes']:
+        assert len({default['aco', nodes], tuned['aco', nodes], patient['aco', nodes]}) == 3
+        # the other algorithms do not use the colony settings
+        for algorithm in ('random', 'exact'):
+            assert default[algorithm, nodes] == tuned[algorithm, nodes] == patient[algorithm, nodes]
+
+
+def test_colony_settings_are_applied(monkeypatch):
+    colonies = []
+    run = experimentRunner.AntColony.run
+    monkeypatch.setattr(experimentRunner.AntColony, 'run', lambda colony: colonies.append(colony) or run(colony))
+    config = dict(CONFIG, algorithms=['aco'], nodes=[4], aco_settings={'number_iterations': 3, 'patience': 2})
+    run_experiments(config, cache_dir=None, max_workers=1)
+    colony, = colonies
+    assert (colony.number_iterations, colony.patience, colony.decay) == (3, 2, experimentRunner.ACO_SETTINGS['decay'])
+
+
+def test_cached_results_are_reused(tmp_path, monkeypatch):
+    config = dict(CONFIG, aco_settings={'number_iterations': 5})
+    first = run_experiments(config, str(tmp_path), max_workers=1)
+    monkeypatch.setattr(experimentRunner, 'run_task', lambda task: pytest.fail("{} was not cached".format(task)))
+    assert run_experiments(config, str(tmp_path), max_workers=1) == first
+
+
+def test_importing_run_experiments_builds_no_graph():
+    code = ("import createGraph\n"
+            "def fail(*arguments): raise AssertionError('graph built at import')\n"
+            "createGraph.create_campus_graph = fail\n"
+            "import runExperiments\n")
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(experimentRunner.__file__)))
+
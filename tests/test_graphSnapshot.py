@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pytest
+
+from cli import main
+from createGraph import create_campus_graph
+from graphSnapshot import load_snapshot, save_snapshot
+
+
+@pytest.fixture
+def campus_graph():
+    np.random.seed(0)
+    return create_campus_graph(5)
+
+
+def test_snapshot_round_trip(tmp_path, campus_graph):
+    path = str(tmp_path / 'campus')
+    save_snapshot(path, campus_graph, pheromone=np.full((5, 5), 0.5))
+    loaded, pheromone = load_snapshot(path)
+    assert np.array_equal(loaded.weights, campus_graph.weights)
+    assert np.array_equal(pheromone, np.full((5, 5), 0.5))
+
+
+def test_snapshot_replaces_an_earlier_snapshot(tmp_path, campus_graph):
+    path = str(tmp_path / 'campus')
+    save_snapshot(path, campus_graph, pheromone=np.ones((5, 5)))
+    save_snapshot(path, campus_graph)
+    assert load_snapshot(path)[1] is None
+    # no temporary or old directories are left behind
+    assert os.listdir(str(tmp_path)) == ['campus']
+
+
+def test_snapshot_into_an_empty_directory(tmp_path, campus_graph):
+    path = tmp_path / 'campus'
+    path.mkdir()
+    save_snapshot(str(path), campus_graph)
+    assert load_snapshot(str(path))[0].nr_of_nodes == 5
+
+
+@pytest.mark.parametrize('meta', [None, '{"kind": "unknown"}', 'not json'])
+def test_snapshot_refuses_unrelated_directories(tmp_path, campus_graph, meta):
+    path = tmp_path / 'important'
+    path.mkdir()
+    (path / 'notes.txt').write_text('keep me')
+    if meta is not None:
+        (path / 'meta.json').write_text(meta)
+    with pytest.raises(ValueError):
+        save_snapshot(str(path), campus_graph)
+    assert (path / 'notes.txt').read_text() == 'keep me'
+    assert sorted(os.listdir(str(tmp_path))) == ['important']
+
+
+def test_snapshot_refuses_files(tmp_path, campus_graph):
+    path = tmp_path / 'notes.txt'
+    path.write_text('keep me')
+    with pytest.raises(ValueError):
+        save_snapshot(str(path), campus_graph)
+    assert path.read_text() == 'keep me'
+
+
+def test_cli_snapshot_reports_refused_directory(tmp_path, capsys):
+    (tmp_path / 'notes.txt').write_text('keep me')
+    with pytest.raises(SystemExit) as error:
+        main(['snapshot', str(tmp_path), '--nodes', '4'])
+    assert error.value.code == 2
+    assert 'not a snapshot' in capsys.readouterr().err
+    assert (tmp_path / 'notes.txt').exists()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from aco import AntColony
+from acoVariants import ENGINES
+from createGraph import create_campus_graph
+from sparseColony import SparseAntColony
+from sparseGraph import create_sparse_campus_graph
+
+N = 8
+ANTS = 6
+ITERATIONS = 4
+
+
+@pytest.fixture
+def campus_graph():
+    np.random.seed(2)
+    return create_campus_graph(N)
+
+
+def counted_run(colony):
+    colony.number_ants = ANTS
+    colony.number_iterations = ITERATIONS
+    stats = colony.enable_instrumentation()
+    colony.run()
+    return stats.report()['counters']
+
+
+def test_vectorized_counters(campus_graph):
+    counters = counted_run(AntColony(None, campus_graph, seed=0))
+    assert counters['iterations'] == ITERATIONS
+    assert counters['ant_steps'] == ITERATIONS * ANTS * N
+    assert counters['roulette_draws'] == ITERATIONS * ANTS * (N - 1)
+    assert counters['tours_evaluated'] == ITERATIONS * ANTS
+    # every tour is evaluated and the best 5 ants deposit
+    assert counters['edge_weight_lookups'] == ITERATIONS * (ANTS + 5) * N
+
+
+def test_colony_system_counts_only_the_sampled_steps(campus_graph):
+    colony = ENGINES['colony_system'](None, campus_graph, seed=0)
+    counters = counted_run(colony)
+    # the exploiting steps take the best edge without a draw
+    assert 0 < counters['roulette_draws'] < ITERATIONS * ANTS * (N - 1)
+    assert counters['edge_weight_lookups'] == ITERATIONS * ANTS * N
+
+
+def test_per_ant_cache_hits_look_up_no_weights(campus_graph):
+    colony = AntColony(None, campus_graph, construction='per_ant', seed=0)
+    np.random.seed(0)
+    counters = counted_run(colony)
+    stats = colony.tour_cache.stats()
+    assert counters['tours_evaluated'] == ITERATIONS * ANTS
+    assert counters['edge_weight_lookups'] == (stats['misses'] + min(5, ANTS) * ITERATIONS) * N
+
+
+def test_sparse_counters_follow_the_walks():
+    np.random.seed(2)
+    graph = create_sparse_campus_graph(np.random.rand(20, 2) * 1000, nr_of_neighbours=3, nr_of_slots=4)
+    colony = SparseAntColony(graph, seed=0)
+    counters = counted_run(colony)
+    # walks step back along their trail, so they take more steps than there are nodes
+    assert counters['ant_steps'] > ITERATIONS * ANTS * 20
+    assert counters['roulette_draws'] <= ITERATIONS * ANTS * 19
+    assert counters['tours_evaluated'] <= ITERATIONS * ANTS
+
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from createGraph import create_campus_graph, create_synthetic_campus_graph
+from localSearch import OR_OPT_MAX_SEGMENT, apply_or_opt_move, best_or_opt_move, best_two_opt_move, improve_tour
+
+
+def random_instances(count=50):
+    # campus graphs (one time slot per node) and synthetic graphs with fewer slots than nodes, so tours wrap around
+    rng = np.random.default_rng(0)
+    for instance in range(count):
+        np.random.seed(instance)
+        nodes = int(rng.integers(5, 13))
+        if instance % 2:
+            campus_graph = create_campus_graph(nodes)
+        else:
+            campus_graph = create_synthetic_campus_graph(np.random.uniform(-800, 800, size=(nodes, 2)))
+        path = np.append(rng.permutation(nodes), 0)
+        path[-1] = path[0]
+        yield campus_graph, path
+
+
+def cost(campus_graph, path):
+    return campus_graph.tour_weights(list(path)).sum()
+
+
+def brute_force_two_opt(campus_graph, path):
+    n = len(path) - 1
+    best = 0.0
+    for i in range(n):
+        for j in range(i + 2, n):
+            moved = path.copy()
+            moved[i + 1:j + 1] = moved[i + 1:j + 1][::-1]
+            best = min(best, cost(campus_graph, moved) - cost(campus_graph, path))
+    return best
+
+
+def brute_force_or_opt(campus_graph, path):
+    n = len(path) - 1
+    best = 0.0
+    for length in range(1, min(OR_OPT_MAX_SEGMENT, n - 2) + 1):
+        for a in range(n - length):
+            segment = list(path[a + 1:a + length + 1])
+            for b in range(n):
+                if a <= b <= a + length:
+                    continue
+                rest = list(path[:a + 1]) + list(path[a + length + 1:])
+                # behind the first occurrence of path[b] that is not the closing start node
+                insert = rest.index(path[b]) + 1
+                moved = np.array(rest[:insert] + segment + rest[insert:])
+                best = min(best, cost(campus_graph, moved) - cost(campus_graph, path))
+    return best
+
+
+def test_moves_match_brute_force():
+    mismatches = []
+    for instance, (campus_graph, path) in enumerate(random_instances()):
+        two_opt, i, j = best_two_opt_move(campus_graph.weights, path)
+        or_opt, a, length, b = best_or_opt_move(campus_graph.weights, path)
+        if not np.isclose(two_opt, brute_force_two_opt(campus_graph, path)):
+            mismatches.append((instance, '2-opt'))
+        if not np.isclose(or_opt, brute_force_or_opt(campus_graph, path)):
+            mismatches.append((instance, 'or-opt'))
+        # the returned moves change the cost by the returned delta
+        if i >= 0:
+            moved = path.copy()
+            moved[i + 1:j + 1] = moved[i + 1:j + 1][::-1]
+            assert cost(campus_graph, moved) - cost(campus_graph, path) == pytest.approx(two_opt)
+        if a >= 0:
+            assert cost(campus_graph, apply_or_opt_move(path, a, length, b)) - cost(campus_graph, path) == pytest.approx(or_opt)
+    assert mismatches == []
+
+
+def test_improve_tour_never_worsens():
+    for campus_graph, path in random_instances(20):
+        improved, improved_cost = improve_tour(campus_graph, path)
+        assert improved[0] == improved[-1] == path[0]
+        assert sorted(improved[:-1]) == sorted(path[:-1])
+        assert improved_cost == pytest.approx(cost(campus_graph, improved))
+        assert improved_cost <= cost(campus_graph, path) + 1e-9
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from occupancyData import OccupancyHistory, convert_occupancy_csv
+
+
+@pytest.fixture
+def history(tmp_path):
+    # 3 nodes, 4 time slots, the occupancy of edge (0, 1) is the slot number + 1
+    source = tmp_path / 'sensors.csv'
+    rows = ["time,node1,node2,occupancy"]
+    for slot in range(4):
+        rows.append("{},0,1,{}".format(slot, slot + 1))
+        rows.append("{},1,2,5".format(slot))
+    source.write_text("\n".join(rows) + "\n")
+    target = str(tmp_path / 'occupancies.npy')
+    convert_occupancy_csv(str(source), target, nr_of_nodes=3)
+    return OccupancyHistory(target, distances=np.ones((3, 3)))
+
+
+@pytest.mark.parametrize('start, length, expected', [
+    (0, 4, [1, 2, 3, 4]),
+    (1, 2, [2, 3]),
+    (3, 3, [4, 1, 2]),
+    (0, 5, [1, 2, 3, 4, 1]),
+    (0, 6, [1, 2, 3, 4, 1, 2]),
+    (2, 6, [3, 4, 1, 2, 3, 4]),
+    (6, 9, [3, 4, 1, 2, 3, 4, 1, 2, 3]),
+])
+def test_window_wraps_around_the_history(history, start, length, expected):
+    window = history.window(start, length)
+    assert window.shape == (3, 3, length)
+    assert window[0, 1].tolist() == expected
+    assert window[1, 0].tolist() == expected
+    assert window[1, 2].tolist() == [5] * length
+
+
+def test_window_needs_a_slot(history):
+    with pytest.raises(ValueError):
+        history.window(0, 0)
+
+
+def test_campus_graph_default_window_fits_the_history(history):
+    campus_graph = history.campus_graph(2)
+    assert campus_graph.nr_of_slots == 3
+    assert campus_graph.occupancies[0, 1].tolist() == [3, 4, 1]
+    assert history.campus_graph(0, 7).nr_of_slots == 7
+
+
+@pytest.mark.parametrize('rows, nr_of_nodes', [
+    (["0,0,3,9", "0,1,2,1"], 3),
+    (["0,-1,2,4", "0,1,2,1"], None),
+    (["-1,0,1,4", "0,1,2,1"], 3),
+    (["0,0,1,-4", "0,1,2,1"], 3),
+])
+def test_convert_rejects_invalid_rows(tmp_path, rows, nr_of_nodes):
+    source = tmp_path / 'sensors.csv'
+    source.write_text("\n".join(["time,node1,node2,occupancy"] + rows) + "\n")
+    target = tmp_path / 'occupancies.npy'
+    with pytest.raises(ValueError):
+        convert_occupancy_csv(str(source), str(target), nr_of_nodes=nr_of_nodes)
+    assert not target.exists()
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from createGraph import create_campus_graph
+from parallelColony import ParallelAntColony
+
+N = 8
+
+
+@pytest.fixture
+def campus_graph():
+    np.random.seed(6)
+    return create_campus_graph(N)
+
+
+def small_colony(campus_graph, seed):
+    colony = ParallelAntColony(None, campus_graph, nr_of_colonies=2, migration_interval=3, seed=seed)
+    colony.number_ants = 6
+    colony.number_iterations = 7
+    return colony
+
+
+def test_run_returns_a_costed_tour(campus_graph):
+    cost, path, weights = small_colony(campus_graph, 1).run()
+    assert path[0] == path[-1]
+    assert sorted(path[:-1]) == list(range(N))
+    assert weights == list(campus_graph.tour_weights(path))
+    assert cost == pytest.approx(sum(weights))
+
+
+def test_same_seed_same_result(campus_graph):
+    first = small_colony(campus_graph, 3).run()
+    second = small_colony(campus_graph, 3).run()
+    assert first[0] == second[0]
+    assert first[1] == second[1]
+
+
+def test_run_needs_iterations(campus_graph):
+    colony = small_colony(campus_graph, 0)
+    colony.number_iterations = 0
+    with pytest.raises(AssertionError):
+        colony.run()
+
+
+def test_migrate_blends_the_neighbour_and_deposits_on_the_best_tour(campus_graph):
+    colony = small_colony(campus_graph, 0)
+    colony.migration_rate = 0.25
+    pheromones = np.stack([np.full((N, N), 1.0), np.full((N, N), 2.0)])
+    best_path = [0, 2, 1] + list(range(3, N)) + [0]
+    edge_weight_sums = campus_graph.weights.sum(axis=2).astype(float)
+    colony.migrate(pheromones, best_path, edge_weight_sums)
+
+    # colony 0 takes over a share of colony 1 and the other way round
+    expected = np.stack([np.full((N, N), 0.75 * 1 + 0.25 * 2), np.full((N, N), 0.75 * 2 + 0.25 * 1)])
+    rows, cols = np.array(best_path[:-1]), np.array(best_path[1:])
+    expected[:, rows, cols] += 1.0 / edge_weight_sums[rows, cols]
+    assert np.allclose(pheromones, expected)
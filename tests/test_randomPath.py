@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from createGraph import create_campus_graph
+from randomPath import randomPathFindingBatch
+
+
+@pytest.fixture
+def campus_graph():
+    np.random.seed(1)
+    return create_campus_graph(7)
+
+
+def test_batch_returns_the_cheapest_sampled_tour(campus_graph):
+    cost, path, weights, costs = randomPathFindingBatch(campus_graph, 50, seed=0, chunk_size=16)
+    assert len(costs) == 50
+    assert path[0] == path[-1] and sorted(path[:-1]) == list(range(7))
+    assert cost == costs.min() == pytest.approx(sum(weights))
+
+
+def test_batch_does_not_depend_on_the_chunk_size(campus_graph):
+    chunked = randomPathFindingBatch(campus_graph, 50, seed=0, chunk_size=16)
+    whole = randomPathFindingBatch(campus_graph, 50, seed=0)
+    assert np.array_equal(chunked[3], whole[3])
+    assert chunked[1] == whole[1]
+
+
+def test_batch_needs_tours(campus_graph):
+    with pytest.raises(AssertionError):
+        randomPathFindingBatch(campus_graph, 0)
@@ -0,0 +1,91 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+
+import routingService
+from routingService import RoutingService
+
+
+async def exchange(port, request):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    status = int(head.split(b' ')[1]) if head else None
+    return status, json.loads(body) if body else None
+
+
+def run_with_service(scenario):
+    async def main():
+        service = RoutingService(executor=ThreadPoolExecutor(max_workers=2))
+        port = await service.start()
+        try:
+            return await scenario(service, port)
+        finally:
+            await service.close()
+    return asyncio.run(main())
+
+
+def post(body, extra_headers=b''):
+    return (b"POST /solve HTTP/1.1\r\nConnection: close\r\nContent-Length: " + str(len(body)).encode() + b"\r\n" + extra_headers +
+            b"\r\n" + body)
+
+
+def test_malformed_request_line_is_a_bad_request():
+    status, payload = run_with_service(lambda service, port: exchange(port, b"GARBAGE\r\n\r\n"))
+    assert status == 400
+    assert 'error' in payload
+
+
+def test_invalid_content_length_is_a_bad_request():
+    request = b"POST /solve HTTP/1.1\r\nContent-Length: abc\r\n\r\n{}"
+    status, _ = run_with_service(lambda service, port: exchange(port, request))
+    assert status == 400
+
+
+def test_oversized_body_is_rejected(monkeypatch):
+    monkeypatch.setattr(routingService, 'MAX_BODY_SIZE', 16)
+    status, _ = run_with_service(lambda service, port: exchange(port, post(b'{"nodes": 5, "window": 0, "x": "........"}')))
+    assert status == 413
+
+
+def test_too_many_nodes_is_a_bad_request():
+    status, payload = run_with_service(lambda service, port: exchange(port, post(b'{"nodes": 40}')))
+    assert status == 400
+    assert '15' in payload['error']
+
+
+def test_solve_over_http():
+    status, payload = run_with_service(lambda service, port: exchange(port, post(b'{"nodes": 6, "window": 1, "deadline_ms": 5000}')))
+    assert status == 200
+    assert sorted(payload['path'][:-1]) == list(range(6))
+    assert payload['path'][0] == payload['path'][-1]
+
+
+def test_identical_queries_are_coalesced():
+    async def scenario(service, port):
+        query = {'nodes': 6, 'window': 2, 'deadline_ms': 5000}
+        answers = await asyncio.gather(service.solve(query), service.solve(dict(query)))
+        return answers, dict(service.stats)
+
+    (first, second), stats = run_with_service(scenario)
+    assert first == second
+    assert stats['solves'] == 1
+    assert stats['coalesced'] == 1
+
+
+def test_body_must_be_an_object():
+    status, payload = run_with_service(lambda service, port: exchange(port, post(b'[1, 2]')))
+    assert status == 400
+    assert 'object' in payload['error']
+
+
+def test_window_out_of_range_is_a_bad_request():
+    async def scenario(service, port):
+        return [await exchange(port, post(body)) for body in
+                (b'{"nodes": 4, "window": -1}', b'{"nodes": 4, "window": 1e12}', b'{"nodes": 4, "window": 1e400}')]
+    for status, payload in run_with_service(scenario):
+        assert status == 400
+        assert 'error' in payload
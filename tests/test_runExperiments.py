@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+import runExperiments
+from createGraph import create_campus_graph
+
+
+@pytest.mark.parametrize('algorithm', ['random', 'aco'])
+def test_iterate_algorithm_returns_the_best_tour(algorithm, monkeypatch):
+    np.random.seed(0)
+    campus_graph = create_campus_graph(5)
+    if algorithm == 'aco':
+        costs = iter([30.0, 10.0, 20.0])
+        monkeypatch.setattr(runExperiments, 'aco_path', lambda graph: (next(costs), [0, 1, 2, 3, 4, 0], []))
+        assert runExperiments.iterate_algorithm(campus_graph, 3, algorithm)[0] == 10.0
+    else:
+        cost, path, weights = runExperiments.iterate_algorithm(campus_graph, 50, algorithm)
+        assert sorted(path[:-1]) == list(range(5)) and path[0] == path[-1]
+        assert cost == pytest.approx(sum(weights))
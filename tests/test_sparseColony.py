@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from sparseColony import SparseAntColony
+from sparseGraph import SparseCampusGraph, create_sparse_campus_graph
+
+
+@pytest.fixture
+def sparse_graph():
+    np.random.seed(3)
+    return create_sparse_campus_graph(np.random.rand(25, 2) * 1000, nr_of_neighbours=4, nr_of_slots=6)
+
+
+def is_closed_walk(graph, walk, start):
+    steps = zip(walk[:-1], walk[1:])
+    return (walk[0] == walk[-1] == start and set(walk) == set(range(graph.nr_of_nodes))
+            and all(graph.edge_positions(u, v) >= 0 for u, v in steps))
+
+
+def test_solve_queries_returns_closed_walks_from_every_start(sparse_graph):
+    colony = SparseAntColony(sparse_graph, seed=1)
+    colony.number_iterations = 15
+    queries = [(0, 0), (7, 3), (0, 0), (12, 5)]
+    results = colony.solve_queries(queries)
+    assert len(results) == len(queries)
+    for (start, slot), (cost, walk, weights) in zip(queries, results):
+        assert is_closed_walk(sparse_graph, walk, start)
+        assert weights == list(sparse_graph.tour_weights(walk, slot))
+        assert cost == pytest.approx(sum(weights))
+    # identical queries are solved once
+    assert results[0][1] == results[2][1]
+
+
+def test_solve_queries_departure_slot_shifts_the_weights():
+    # a cycle whose weights only depend on the time slot: leaving at slot 1 skips the expensive slot 0
+    occupancies = np.array([[100, 0, 0, 0, 0]] * 4)
+    graph = SparseCampusGraph.from_edges(4, [(0, 1), (1, 2), (2, 3), (3, 0)], np.full(4, 10), occupancies)
+    colony = SparseAntColony(graph, seed=0)
+    colony.number_iterations = 5
+    (early, _, _), (late, _, _) = colony.solve_queries([(0, 0), (0, 1)])
+    assert late < early
+
+
+def test_solve_queries_unreachable_start_is_none():
+    graph = SparseCampusGraph.from_edges(4, [(0, 1), (2, 3)], np.full(2, 10), np.ones((2, 2)))
+    colony = SparseAntColony(graph, seed=0)
+    colony.number_iterations = 3
+    assert colony.solve_queries([(0, 0), (3, 1)]) == [None, None]
+
+
+def test_solve_queries_rejects_unknown_start(sparse_graph):
+    with pytest.raises(ValueError):
+        SparseAntColony(sparse_graph, seed=0).solve_queries([(25, 0)])
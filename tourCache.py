@@ -0,0 +1,64 @@
+# Co-operative & Adaptive Algorithms (ECE457A) - Project
+#
+# Bounded tour-cost cache for AntColony.
+#
+# Summary:
+# Once the colony converges most ants rebuild tours that were already evaluated. The cache maps a compact encoding of a tour
+# (its nodes as raw int32 bytes) to its cost, evicts the least recently used tour when it is full and counts hits and misses.
+# The costs are only valid for one set of edge weights, AntColony clears the cache whenever the weights of its graph change.
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+class TourCostCache(object):
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.costs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def encode(path):
+        """
+        Args:
+            path (list or numpy.array): Tour as ordered nodes
+
+        Returns:
+            bytes: Compact key of the tour
+        """
+        return np.asarray(path, dtype=np.int32).tobytes()
+
+    def get(self, key):
+        cost = self.costs.get(key)
+        if cost is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.costs.move_to_end(key)
+        return cost
+
+    def put(self, key, cost):
+        self.costs[key] = cost
+        self.costs.move_to_end(key)
+        if len(self.costs) > self.max_size:
+            self.costs.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.costs.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Number of cached tours, hits, misses, evictions and the hit rate
+        """
+        lookups = self.hits + self.misses
+        return {'size': len(self.costs), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def __len__(self):
+        return len(self.costs)